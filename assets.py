@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+TEXTURE_CACHE_DIR = os.path.join('.cache', 'textures')
+TEXTURE_CACHE_VERSION = b'rgb-bottom-up-1'  # Part of every key; bump when the stored layout changes
+TEXTURE_CACHE_MAX_BYTES = 256 * 2 ** 20  # Least recently used entries beyond this are pruned
+TEXTURE_CACHE_MAX_AGE = 30 * 24 * 3600  # Seconds; entries unused for longer (e.g. of edited textures) are pruned
+
+
+def decode_image(source):
+    """Read an image file (path or file object) into a bottom-up RGB array, the layout OpenGL expects."""
+    from PIL import Image  # Imported on first use: with a warm texture cache it is never needed
+
+    with Image.open(source) as img:
+        return np.asarray(img.transpose(Image.FLIP_TOP_BOTTOM).convert("RGB"))
+
+
+class TextureCache:
+    """Decoded textures stored on disk so later launches skip PIL entirely.
+
+    Entries are ``.npy`` files holding the flipped RGB array exactly as it
+    is uploaded, keyed by a hash of the source file's bytes, so an edited
+    texture simply misses. Hits are memory-mapped and handed to the GL
+    upload without a copy. The cache is best-effort: entries that cannot be
+    read are decoded again and write errors are ignored.
+
+    A hit refreshes the entry's modification time, and opening the cache
+    prunes it: entries unused for ``max_age`` seconds go first (this is how
+    the entries of edited textures leave), then the least recently used
+    ones until the cache fits in ``max_bytes``.
+    """
+    def __init__(self, directory=TEXTURE_CACHE_DIR, max_bytes=TEXTURE_CACHE_MAX_BYTES,
+                 max_age=TEXTURE_CACHE_MAX_AGE):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()  # decode runs on AssetLoader threads
+        self.pruned = self.prune(max_bytes, max_age)
+
+    def entry_path(self, data):
+        digest = hashlib.sha1(TEXTURE_CACHE_VERSION + data).hexdigest()
+        return os.path.join(self.directory, digest + '.npy')
+
+    def decode(self, path):
+        """Drop-in for ``decode_image``: the cached array if there is one, else decode and store it."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        entry = self.entry_path(data)
+        try:
+            pixels = np.load(entry, mmap_mode='r')
+        except (OSError, ValueError):
+            pixels = None  # Missing, or a truncated file from an interrupted run
+        if pixels is not None and pixels.ndim == 3 and pixels.shape[2] == 3 and pixels.dtype == np.uint8:
+            try:
+                os.utime(entry)  # Recently used, so pruning keeps it
+            except OSError:
+                pass
+            with self.lock:
+                self.hits += 1
+            return pixels
+        pixels = decode_image(io.BytesIO(data))
+        self.store(entry, pixels)
+        with self.lock:
+            self.misses += 1
+        return pixels
+
+    def store(self, entry, pixels):
+        temporary = f'{entry}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, 'wb') as f:
+                np.save(f, pixels)
+            os.replace(temporary, entry)  # Atomic, so readers never see a partial entry
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def prune(self, max_bytes=TEXTURE_CACHE_MAX_BYTES, max_age=TEXTURE_CACHE_MAX_AGE):
+        """Delete expired entries, then the least recently used until at most ``max_bytes`` remain.
+
+        Returns the number of files deleted. Leftover temporary files of
+        interrupted writes count as entries, so they expire too.
+        """
+        files = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return 0  # No cache yet
+        files.sort(reverse=True)  # Most recently used first
+        expired = time.time() - max_age
+        total = 0
+        deleted = 0
+        for modified, size, path in files:
+            total += size
+            if modified >= expired and total <= max_bytes:
+                continue
+            try:
+                os.remove(path)
+                deleted += 1
+            except OSError:
+                pass
+        return deleted
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'pruned': self.pruned}
+
+
+class AssetLoader:
+    """Reads and decodes asset files on a thread pool, handing results back to the GL thread.
+
+    Workers only touch files and PIL; finished jobs are queued so the thread
+    that owns the GL context can ``poll`` them and do the uploads itself.
+    """
+    def __init__(self, max_workers=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='assets')
+        self.completed = queue.SimpleQueue()  # (key, future) in completion order
+        self.in_flight = 0
+
+    def submit(self, key, path, decode=decode_image):
+        """Start decoding ``path``; ``poll`` later returns ``(key, result)``."""
+        self.in_flight += 1
+        future = self.executor.submit(decode, path)
+        future.add_done_callback(lambda done: self.completed.put((key, done)))
+
+    def poll(self, block=False):
+        """Return the next finished ``(key, result)``, or None if nothing is ready.
+
+        Exceptions raised while decoding are re-raised here, on the caller's thread.
+        """
+        if not self.in_flight:
+            return None
+        try:
+            key, future = self.completed.get(block=block)
+        except queue.Empty:
+            return None
+        self.in_flight -= 1
+        return key, future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
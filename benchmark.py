@@ -0,0 +1,354 @@
+"""Headless engine benchmark.
+
+Generates a synthetic scene, replays an input trace through an offscreen
+``RyanEngine`` and writes per-frame CPU/GPU timings as JSON so runs can be
+compared across commits. Works without a display or GPU (EGL + llvmpipe).
+
+    python benchmark.py --platforms 5000 --textures 8 --frames 600 --output bench.json
+    python benchmark.py --trace trace.json   # replay a trace recorded with engine.py --record
+    python benchmark.py --player             # Player update microbenchmark
+    python benchmark.py --collision          # vectorized collision against the per-platform loop
+    python benchmark.py --entities 10000     # EntityBatch ticks with that many bodies and boxes
+    python benchmark.py --profile frames.json  # per-phase timings, Chrome trace for chrome://tracing
+    python benchmark.py --platforms 40000 --stream  # stream the level in chunks around the player
+    python benchmark.py --capture frames/     # write every frame as a PNG; diff runs with capture.py
+    python benchmark.py --startup 5 --textures 32 --texture-size 512  # cold and warm launch times
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import nullcontext
+import numpy as np
+from world import InputState
+from scene_format import load_scene_data, write_binary
+from streaming import partition_scene
+from synthetic import generate_scene, random_platforms
+
+INVALID_QUERY = 2 ** 32 - 1  # Some drivers report this instead of a time when the query failed
+# Run in a fresh interpreter per launch: python -c STARTUP_SCRIPT scene_file texture_cache_dir
+STARTUP_SCRIPT = '''
+import json, sys
+from engine import RyanEngine
+engine = RyanEngine(offscreen=True, scene_file=sys.argv[1], texture_cache=sys.argv[2] or None)
+engine.render()
+engine.renderer.materials.wait()
+engine.startup.mark('textures')
+summary = engine.startup.summary()
+summary['texture_cache'] = engine.texture_cache.stats() if engine.texture_cache is not None else None
+print(json.dumps(summary))
+'''
+
+
+def synthetic_trace(frames, frame_time=1 / 60):
+    """Walk forward while sweeping the camera, jumping once a second."""
+    return [{'dt': frame_time, 'forward': 1, 'right': (i // 120) % 3 - 1, 'jump': i % 60 == 0,
+             'look_x': 4.0 * np.sin(i / 30.0), 'look_y': 0.0} for i in range(frames)]
+
+
+def load_trace(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def percentiles(samples):
+    samples = np.asarray(samples, dtype='f8')
+    if len(samples) == 0:
+        return None
+    return {
+        'mean': float(samples.mean()),
+        'p50': float(np.percentile(samples, 50)),
+        'p95': float(np.percentile(samples, 95)),
+        'p99': float(np.percentile(samples, 99)),
+        'max': float(samples.max()),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scene_file, trace, width=800, height=600, tick_rate=60, track_allocations=False, culling=True,
+        profile_file=None, async_assets=True, stream_radius=96.0, collision_mode='discrete', capture_dir=None,
+        capture_format='png', texture_cache=None):
+    """Replay ``trace`` against ``scene_file`` offscreen and return the report dict.
+
+    With ``profile_file`` the engine's frame profiler is enabled, its per-phase
+    summary is added to the report and its Chrome trace is written to that file.
+    With ``capture_dir`` every replayed frame is captured there. Textures
+    are decoded from their files unless a ``texture_cache`` directory is
+    given, so runs neither read nor fill the engine's on-disk cache
+    (startup_benchmark measures that).
+    """
+    from engine import RyanEngine
+
+    start = time.perf_counter()
+    engine = RyanEngine(width, height, scene_file, tick_rate=tick_rate, offscreen=True, culling=culling,
+                        profile=profile_file is not None, async_assets=async_assets,
+                        stream_radius=stream_radius, collision_mode=collision_mode, texture_cache=texture_cache)
+    load_time = time.perf_counter() - start
+    # First frame (placeholders for textures still decoding), then wait so the replay measures steady state
+    engine.render()
+    engine.ctx.finish()
+    first_frame_time = time.perf_counter() - start
+    engine.renderer.materials.wait()
+    assets_ready_time = time.perf_counter() - start
+
+    # GL time queries cannot nest, so the profiler's render query replaces this one when enabled
+    profile = profile_file is not None
+    gpu_query = nullcontext() if profile else engine.ctx.query(time=True)
+    profiler = engine.profiler
+    cpu_ms, gpu_ms, alloc_bytes, submitted, culled = [], [], [], [], []
+    if track_allocations:
+        tracemalloc.start()
+    if capture_dir is not None:
+        engine.start_capture(capture_dir, capture_format)
+
+    for frame in trace:
+        commands = InputState(frame['forward'], frame['right'], frame['jump'])
+        if track_allocations:
+            tracemalloc.reset_peak()
+            allocated_before = tracemalloc.get_traced_memory()[0]
+
+        frame_start = time.perf_counter()
+        profiler.begin_frame()
+        engine.player.process_mouse_movement(frame['look_x'], frame['look_y'])
+        alpha = engine.update(frame['dt'], commands)
+        with gpu_query:
+            engine.render(alpha, frame['dt'])
+            cpu_ms.append((time.perf_counter() - frame_start) * 1e3)
+            engine.ctx.finish()  # Deferred renderers (llvmpipe) only execute on flush
+        profiler.end_frame()
+        submitted.append(engine.renderer.submitted)
+        culled.append(engine.renderer.culled)
+
+        if track_allocations:
+            alloc_bytes.append(tracemalloc.get_traced_memory()[1] - allocated_before)
+        if not profile and gpu_query.elapsed < INVALID_QUERY:
+            gpu_ms.append(gpu_query.elapsed / 1e6)
+
+    if track_allocations:
+        tracemalloc.stop()
+    frames_captured = engine.stop_capture()
+
+    report = {
+        'revision': git_revision(),
+        'renderer': engine.ctx.info['GL_RENDERER'],
+        'scene': scene_file,
+        'platforms': len(engine.platforms),
+        'frames': len(trace),
+        'ticks': engine.world.tick,
+        'load_time_s': load_time,
+        'first_frame_s': first_frame_time,
+        'startup': engine.startup.summary(),
+        'assets_ready_s': assets_ready_time,
+        'resources': engine.resources.stats(),
+        'materials': engine.renderer.materials.stats(),
+        'streaming': engine.streamer.stats() if engine.streamer is not None else None,
+        'cpu_ms': percentiles(cpu_ms),
+        'gpu_ms': percentiles(gpu_ms),
+        'draw_calls': engine.renderer.draw_calls(),
+        'submitted': percentiles(submitted),
+        'culled': percentiles(culled),
+        'frames_captured': frames_captured,
+        'per_frame': {'cpu_ms': cpu_ms, 'gpu_ms': gpu_ms},
+    }
+    if profile:
+        profiler.collect_gpu(profiler.frame_index)
+        report['profile'] = profiler.summary()
+        report['gpu_ms'] = percentiles([frame.gpu['render'] for frame in profiler.frames if 'render' in frame.gpu])
+        profiler.export_chrome_trace(profile_file)
+    if track_allocations:
+        report['alloc_bytes'] = percentiles(alloc_bytes)
+        report['per_frame']['alloc_bytes'] = alloc_bytes
+    return report
+
+
+def startup_benchmark(scene_file, launches=5):
+    """Launch the engine ``launches`` times in fresh processes and report startup phases.
+
+    The first launch starts from an empty texture cache (cold), the rest reuse
+    it (warm); one more launch runs with the cache disabled for comparison.
+    ``process_s`` is wall time around the whole interpreter, exit included.
+    """
+    repository = os.path.dirname(os.path.abspath(__file__))
+
+    def launch(cache_directory):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, os.path.abspath(scene_file), cache_directory],
+                                cwd=repository, capture_output=True, text=True, check=True)
+        summary = json.loads(result.stdout.strip().splitlines()[-1])
+        summary['process_s'] = time.perf_counter() - start
+        return summary
+
+    with tempfile.TemporaryDirectory() as cache_directory:
+        runs = [launch(cache_directory) for _ in range(launches)]
+    uncached = launch('')
+    warm = runs[1:]
+    return {
+        'launches': launches,
+        'cold': runs[0],
+        'warm': {key: float(np.median([run[key] for run in warm]))
+                 for key, value in runs[0].items() if isinstance(value, float)} if warm else None,
+        'warm_texture_cache': warm[-1]['texture_cache'] if warm else None,
+        'uncached': uncached,
+    }
+
+
+def player_microbenchmark(ticks=100_000, tick_time=1 / 60):
+    """Time one player update (input, look, gravity, interpolation, view matrix) and count its allocations."""
+    from player import Player
+
+    player = Player([0.0, 5.0, 0.0], [0.0, 1.0, 0.0])
+    player.grounded = True
+
+    def tick(i):
+        player.previous_position[:] = player.position
+        player.update_velocity(1, (i >> 6) % 3 - 1, tick_time)
+        player.process_mouse_movement(0.5, 0.0)
+        player.apply_gravity(tick_time)
+        player.create_view_matrix(tick_time, player.interpolated_position(0.5))
+
+    for i in range(1000):  # Warm up caches and free lists
+        tick(i)
+    start = time.perf_counter()
+    for i in range(ticks):
+        tick(i)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(1000):
+        tick(i)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ticks': ticks, 'us_per_tick': elapsed / ticks * 1e6,
+            'retained_bytes': after - before, 'peak_bytes': peak - before}
+
+
+def collision_microbenchmark(sizes=(1_000, 10_000, 100_000), seed=0):
+    """Time resolving one player with ``CollisionWorld.resolve_player`` against ``Platform.check_collision`` in a loop."""
+    from player import Player
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for count in sizes:
+        platforms, world = random_platforms(count, rng)
+        player = Player(platforms[count // 2].position, [0.0, 1.0, 0.0])
+        start = platforms[-1].position + np.array([0.0, 1.5, 0.0], dtype='f4')  # Usually late in the list, so the loop scans most of it
+        repeats = max(1, 20_000 // count)
+
+        def scalar_resolve():
+            for platform in platforms:
+                if platform.check_collision(player):
+                    return
+
+        timings = {}
+        for name, resolve in (('python_loop_ms', scalar_resolve), ('vectorized_ms', lambda: world.resolve_player(player))):
+            elapsed = time.perf_counter()
+            for _ in range(repeats):
+                player.position[:] = start
+                resolve()
+            timings[name] = (time.perf_counter() - elapsed) / repeats * 1e3
+        results.append({'boxes': count, **timings, 'speedup': timings['python_loop_ms'] / timings['vectorized_ms']})
+    return results
+
+
+def entity_microbenchmark(bodies=10_000, ticks=300, collision_mode='discrete', seed=0, tick_time=1 / 60):
+    """Time ``EntityBatch.step`` for ``bodies`` walking bodies dropped onto as many random platforms."""
+    from entities import EntityBatch
+
+    rng = np.random.default_rng(seed)
+    platforms, world = random_platforms(bodies, rng)
+    batch = EntityBatch()
+    starts = np.array([platforms[i].position for i in rng.integers(bodies, size=bodies)], dtype='f4')
+    starts[:, 1] += 1.5
+    slots = batch.spawn_many(starts, yaw=rng.uniform(-180.0, 180.0, bodies))
+    batch.forward[slots] = rng.integers(-1, 2, bodies)
+    batch.right[slots] = rng.integers(-1, 2, bodies)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        batch.step(tick_time, world, collision_mode)
+    elapsed = (time.perf_counter() - start) / ticks
+    return {'bodies': bodies, 'boxes': bodies, 'collision_mode': collision_mode, 'ms_per_tick': elapsed * 1e3,
+            'body_updates_per_s': bodies / elapsed, 'grounded': int(batch.grounded[slots].sum())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scene', help='existing scene file (default: generate a synthetic one)')
+    parser.add_argument('--platforms', type=int, default=1000)
+    parser.add_argument('--textures', type=int, default=4)
+    parser.add_argument('--texture-size', type=int, default=64)
+    parser.add_argument('--sync-assets', action='store_true', help='decode textures on the main thread')
+    parser.add_argument('--binary', action='store_true', help='convert the scene to the binary format first')
+    parser.add_argument('--stream', action='store_true', help='partition the scene into chunks and stream it')
+    parser.add_argument('--stream-radius', type=float, default=96.0)
+    parser.add_argument('--trace', help='input trace recorded with engine.py --record')
+    parser.add_argument('--frames', type=int, default=600, help='length of the synthetic trace')
+    parser.add_argument('--tick-rate', type=int, default=60)
+    parser.add_argument('--swept', action='store_true', help='use swept (continuous) player collision')
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--height', type=int, default=600)
+    parser.add_argument('--allocations', action='store_true', help='track per-frame allocations (slower)')
+    parser.add_argument('--no-culling', action='store_true', help='submit every platform each frame')
+    parser.add_argument('--player', action='store_true', help='only run the Player update microbenchmark')
+    parser.add_argument('--collision', action='store_true', help='only run the collision microbenchmark')
+    parser.add_argument('--entities', type=int, metavar='BODIES', help='only run the EntityBatch microbenchmark')
+    parser.add_argument('--profile', help='enable the frame profiler and write a Chrome trace to this file')
+    parser.add_argument('--output', help='write the full report, including per-frame samples, to this file')
+    parser.add_argument('--capture', help='capture every replayed frame into this directory')
+    parser.add_argument('--capture-format', choices=('png', 'raw'), default='png',
+                        help='PNG sequence, or one raw RGB24 video file')
+    parser.add_argument('--startup', type=int, metavar='LAUNCHES',
+                        help='only time this many engine launches, cold then warm texture cache')
+    args = parser.parse_args()
+
+    if args.player:
+        print(json.dumps(player_microbenchmark(), indent=2))
+        return
+    if args.collision:
+        print(json.dumps(collision_microbenchmark(), indent=2))
+        return
+    if args.entities:
+        print(json.dumps(entity_microbenchmark(args.entities, collision_mode='swept' if args.swept else 'discrete'),
+                         indent=2))
+        return
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.frames)
+    with tempfile.TemporaryDirectory() as directory:
+        scene_file = args.scene or generate_scene(directory, args.platforms, args.textures, args.texture_size)
+        if args.binary:
+            binary_file = os.path.join(directory, 'scene.pqs')
+            write_binary(load_scene_data(scene_file), binary_file)
+            scene_file = binary_file
+        if args.startup:
+            print(json.dumps(startup_benchmark(scene_file, args.startup), indent=2))
+            return
+        if args.stream:
+            chunk_directory = os.path.join(directory, 'chunks')
+            partition_scene(scene_file, chunk_directory)
+            scene_file = chunk_directory
+        report = run(scene_file, trace, args.width, args.height, args.tick_rate, args.allocations,
+                     not args.no_culling, args.profile,
+                     not args.sync_assets, args.stream_radius, 'swept' if args.swept else 'discrete',
+                     args.capture, args.capture_format)
+
+    summary = {key: value for key, value in report.items() if key != 'per_frame'}
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Frame capture without pipeline stalls, and a frame diff for CI.
+
+``FrameCapture`` copies each rendered frame into one of a ring of GPU
+buffers and only maps a buffer again ``latency`` frames later, when the
+copy has long finished, so the CPU never waits on the GPU. Background
+threads write the frames as a PNG sequence or one raw RGB24 video file:
+
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 60 -i frames.rgb out.mp4
+
+Compare two PNG captures (exit status 1 on any difference beyond the tolerance):
+
+    python capture.py diff expected_frames/ actual_frames/ [tolerance]
+"""
+import os
+import queue
+import sys
+import threading
+import numpy as np
+from PIL import Image
+
+from profiler import NULL_PROFILER
+
+RAW_FILE = 'frames.rgb'
+FORMATS = ('png', 'raw')
+
+
+class FrameWriter:
+    """Writes captured frames on background threads so encoding never runs on the render thread.
+
+    PNG frames are encoded by ``threads`` workers (Pillow releases the GIL
+    while compressing); a raw video is appended in order by a single one.
+    When the queue is full ``put`` blocks rather than dropping frames.
+    """
+    def __init__(self, directory, size, file_format='png', max_queued=8, threads=None):
+        if file_format not in FORMATS:
+            raise ValueError(f"unknown capture format {file_format!r}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.size = size
+        self.file_format = file_format
+        self.frames = queue.Queue(maxsize=max_queued)  # Bounded: a slow disk applies back-pressure
+        self.written = 0
+        self.lock = threading.Lock()
+        self.error = None
+        self.raw_file = open(os.path.join(directory, RAW_FILE), 'wb') if file_format == 'raw' else None
+        if file_format == 'raw':
+            threads = 1
+        elif threads is None:
+            threads = min(4, os.cpu_count() or 1)
+        self.threads = [threading.Thread(target=self.run, name=f'frame-writer-{i}', daemon=True)
+                        for i in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, index, data):
+        if self.error is not None:
+            raise RuntimeError("frame writer failed") from self.error
+        self.frames.put((index, data))
+
+    def run(self):
+        width, height = self.size
+        while True:
+            item = self.frames.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # Keep draining so put() never blocks on a dead writer
+            index, data = item
+            try:
+                # OpenGL rows start at the bottom; files store the top row first
+                pixels = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)[::-1]
+                if self.raw_file is not None:
+                    self.raw_file.write(pixels.tobytes())
+                else:
+                    Image.fromarray(pixels).save(os.path.join(self.directory, f'frame_{index:06d}.png'),
+                                                 compress_level=1)
+                with self.lock:
+                    self.written += 1
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        for _ in self.threads:
+            self.frames.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.raw_file is not None:
+            self.raw_file.close()
+        if self.error is not None:
+            raise RuntimeError("frame writer failed") from self.error
+
+
+class FrameCapture:
+    """Asynchronous readback of a framebuffer through a ring of ``latency`` buffer objects.
+
+    Call ``capture`` once per frame after rendering: it starts the copy of
+    the current frame and hands the frame from ``latency - 1`` captures ago
+    to the writer. ``finish`` flushes the frames still in flight.
+    """
+    def __init__(self, ctx, fbo, directory, file_format='png', latency=3, max_queued=8):
+        self.ctx = ctx
+        self.fbo = fbo
+        self.size = fbo.size
+        width, height = self.size
+        self.frame_bytes = width * height * 3
+        self.buffers = [ctx.buffer(reserve=self.frame_bytes) for _ in range(max(latency, 1))]
+        self.in_flight = []  # (frame index, buffer slot) oldest first
+        self.next_slot = 0
+        self.frame_index = 0
+        self.writer = FrameWriter(directory, self.size, file_format, max_queued)
+
+    def capture(self, profiler=NULL_PROFILER):
+        if len(self.in_flight) == len(self.buffers):
+            self.collect(profiler)
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % len(self.buffers)
+        # Into a buffer object the copy is queued on the GPU and this call returns immediately
+        self.fbo.read_into(self.buffers[slot], components=3, alignment=1)
+        self.in_flight.append((self.frame_index, slot))
+        self.frame_index += 1
+
+    def collect(self, profiler=NULL_PROFILER):
+        """Map the oldest buffer in flight and pass its frame to the writer."""
+        index, slot = self.in_flight.pop(0)
+        data = self.buffers[slot].read()
+        self.writer.put(index, data)
+        profiler.count('capture_bytes', len(data))
+
+    def finish(self):
+        """Write every frame still in flight and wait for the writer; returns the frames written."""
+        while self.in_flight:
+            self.collect()
+        self.writer.close()
+        for buffer in self.buffers:
+            buffer.release()
+        self.buffers = []
+        return self.writer.written
+
+
+def diff_frames(expected_directory, actual_directory, tolerance=0):
+    """Compare two PNG captures frame by frame.
+
+    Returns ``(name, differing pixels)`` for every frame that is missing or has
+    pixels whose channels differ by more than ``tolerance``.
+    """
+    expected = sorted(name for name in os.listdir(expected_directory) if name.endswith('.png'))
+    actual = set(name for name in os.listdir(actual_directory) if name.endswith('.png'))
+    failures = []
+    for name in expected:
+        if name not in actual:
+            failures.append((name, None))
+            continue
+        a = np.asarray(Image.open(os.path.join(expected_directory, name)).convert('RGB'), dtype=np.int16)
+        b = np.asarray(Image.open(os.path.join(actual_directory, name)).convert('RGB'), dtype=np.int16)
+        if a.shape != b.shape:
+            failures.append((name, None))
+            continue
+        differing = int((np.abs(a - b).max(axis=2) > tolerance).sum())
+        if differing:
+            failures.append((name, differing))
+    failures += [(name, None) for name in sorted(actual - set(expected))]
+    return failures
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5) or sys.argv[1] != 'diff':
+        sys.exit("usage: python capture.py diff <expected dir> <actual dir> [tolerance]")
+    tolerance = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+    failures = diff_frames(sys.argv[2], sys.argv[3], tolerance)
+    for name, differing in failures:
+        print(f"{name}: {'missing or resized' if differing is None else f'{differing} pixels differ'}")
+    if failures:
+        sys.exit(1)
+    print("frames match")
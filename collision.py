@@ -0,0 +1,360 @@
+import numpy as np
+from spatial import cells_covered
+
+CELL_OFFSET = 1 << 20  # Cell coordinates must stay within +-2**20 for cell_keys
+SWEEP_ITERATIONS = 3  # Hits resolved per tick in swept mode; each one removes a direction of motion
+SKIN = 1e-3  # Gap left between a body and a surface it was stopped against
+GROUND_PROBE = 0.02  # How far below the feet a surface still counts as ground in swept mode
+
+
+class CollisionWorld:
+    """Static axis-aligned boxes stored as contiguous ``(N, 3)`` float32 arrays.
+
+    Overlap tests and resolution run for every box (or a candidate subset from
+    the broad phase) and for one or many bodies in a single vectorized pass.
+    The resolution rules are the same as ``Platform.check_collision``: each
+    body is pushed out of the first box it touches along the axis of minimum
+    penetration, with the Y axis preferred for landing.
+
+    "First" means first added. Freed slots are reused, so a newer box can sit
+    at a lower index; every box therefore gets a sequence number when it is
+    added, and whole-world passes break ties by it. ``World`` adds platforms
+    to the spatial grid in the same order, so this matches the insertion
+    order its ``query_aabb`` candidates come in.
+    """
+    TOLERANCE = 0.01
+    MAX_PAIRS = 1 << 22  # Bodies are processed in chunks so bodies x boxes stays bounded
+
+    def __init__(self, capacity=1024, cell_size=8.0):
+        self.min_bounds = np.zeros((capacity, 3), dtype='f4')
+        self.max_bounds = np.zeros((capacity, 3), dtype='f4')
+        self.active = np.zeros(capacity, dtype=bool)
+        self.sequence = np.zeros(capacity, dtype=np.int64)  # Order in which the boxes were added
+        self.next_sequence = 0
+        self.count = 0  # High-water mark of used slots
+        self.free = []
+        self.cell_size = cell_size
+        self.cell_index = None  # Cell keys, starts, counts and box indices; rebuilt after any change
+        self.padded_bounds = None
+
+    def __len__(self):
+        return int(self.active[:self.count].sum())
+
+    def _grow(self, needed):
+        capacity = len(self.min_bounds)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('min_bounds', 'max_bounds', 'active', 'sequence'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, min_bound, max_bound):
+        """Add a box and return its index."""
+        if self.free:
+            index = self.free.pop()
+        else:
+            self._grow(self.count + 1)
+            index = self.count
+            self.count += 1
+        self.min_bounds[index] = min_bound
+        self.max_bounds[index] = max_bound
+        self.active[index] = True
+        self.sequence[index] = self.next_sequence
+        self.next_sequence += 1
+        self.cell_index = None
+        return index
+
+    def add_many(self, min_bounds, max_bounds):
+        """Add a block of boxes, reusing freed slots first, and return their indices."""
+        n = len(min_bounds)
+        reused = [self.free.pop() for _ in range(min(n, len(self.free)))]
+        appended = n - len(reused)
+        self._grow(self.count + appended)
+        indices = np.concatenate((np.array(reused, dtype=np.intp), np.arange(self.count, self.count + appended)))
+        self.min_bounds[indices] = min_bounds
+        self.max_bounds[indices] = max_bounds
+        self.active[indices] = True
+        self.sequence[indices] = np.arange(self.next_sequence, self.next_sequence + n)
+        self.next_sequence += n
+        self.count += appended
+        self.cell_index = None
+        return indices
+
+    def update(self, index, min_bound, max_bound):
+        self.min_bounds[index] = min_bound
+        self.max_bounds[index] = max_bound
+        self.cell_index = None
+
+    def remove(self, index):
+        self.active[index] = False
+        self.free.append(index)
+        self.cell_index = None
+
+    def candidates(self, indices=None):
+        """``indices`` as an array, or every active box in the order they were added."""
+        if indices is None:
+            live = np.flatnonzero(self.active[:self.count])
+            return live[np.argsort(self.sequence[live], kind='stable')]
+        return np.asarray(indices, dtype=np.intp)
+
+    def overlaps(self, body_min, body_max, indices=None):
+        """Return a ``(bodies, boxes)`` mask of which boxes each body touches.
+
+        ``body_min``/``body_max`` are ``(M, 3)`` arrays (or single 3-vectors);
+        the box tolerance matches ``Platform.check_collision``.
+        """
+        indices = self.candidates(indices)
+        body_min = np.atleast_2d(body_min)[:, None, :]
+        body_max = np.atleast_2d(body_max)[:, None, :]
+        box_min = self.min_bounds[indices] - self.TOLERANCE
+        box_max = self.max_bounds[indices] + self.TOLERANCE
+        return ((body_min < box_max) & (body_max > box_min)).all(axis=2)
+
+    def penetration(self, body_min, body_max, indices=None):
+        """Return the ``(bodies, boxes, 3)`` per-axis penetration depths."""
+        indices = self.candidates(indices)
+        body_min = np.atleast_2d(body_min)[:, None, :]
+        body_max = np.atleast_2d(body_max)[:, None, :]
+        box_min = self.min_bounds[indices].astype('f8')
+        box_max = self.max_bounds[indices].astype('f8')
+        return np.minimum(body_max - box_min, box_max - body_min)
+
+    def sweep(self, body_min, body_max, displacement, indices=None):
+        """Time of impact of a box moving by ``displacement`` against the static boxes.
+
+        Returns ``(t, box, axis)`` for the earliest hit with ``0 <= t <= 1``,
+        where ``axis`` is the axis whose faces met, or None if the path is
+        clear. Boxes the body already overlaps at ``t = 0`` are ignored so a
+        body can always move out of them; touching faces count as hits only
+        when moving into them.
+        """
+        indices = self.candidates(indices)
+        if len(indices) == 0:
+            return None
+        box_min = self.min_bounds[indices].astype('f8')
+        box_max = self.max_bounds[indices].astype('f8')
+        body_min, body_max = np.asarray(body_min, dtype='f8'), np.asarray(body_max, dtype='f8')
+        displacement = np.asarray(displacement, dtype='f8')
+
+        moving = displacement != 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Entry and exit times per axis; static axes either always overlap or never do
+            to_min = (box_min - body_max) / displacement
+            to_max = (box_max - body_min) / displacement
+        enter = np.where(displacement > 0, to_min, to_max)
+        leave = np.where(displacement > 0, to_max, to_min)
+        overlapping = (body_min < box_max) & (body_max > box_min)
+        enter = np.where(moving, enter, np.where(overlapping, -np.inf, np.inf))
+        leave = np.where(moving, leave, np.where(overlapping, np.inf, -np.inf))
+
+        t_enter = enter.max(axis=1)
+        hit = (t_enter <= leave.min(axis=1)) & (t_enter >= 0.0) & (t_enter <= 1.0)
+        if not hit.any():
+            return None
+        first = np.flatnonzero(hit)[t_enter[hit].argmin()]  # Earliest hit, lowest candidate on ties
+        return float(t_enter[first]), int(indices[first]), int(enter[first].argmax())
+
+    def sweep_bodies(self, body_min, body_max, displacement):
+        """``sweep`` for many bodies at once, with the cell index as broad phase.
+
+        ``body_min``, ``body_max`` and ``displacement`` are ``(M, 3)`` arrays.
+        Returns ``(t, box, axis)`` arrays with ``box == -1`` for bodies whose
+        path is clear; ties go to the box added first.
+        """
+        count = len(body_min)
+        t = np.full(count, np.inf)
+        box = np.full(count, -1, dtype=np.intp)
+        axis = np.zeros(count, dtype=np.intp)
+        if count == 0 or not self.count:
+            return t, box, axis
+        end_min, end_max = body_min + displacement, body_max + displacement
+        pair_body, pair_box = self.candidate_pairs(np.minimum(body_min, end_min), np.maximum(body_max, end_max))
+        if len(pair_body) == 0:
+            return t, box, axis
+        # Same slab test as ``sweep``, one row per (body, box) pair
+        box_min = self.min_bounds[pair_box].astype('f8')
+        box_max = self.max_bounds[pair_box].astype('f8')
+        pair_min, pair_max, pair_displacement = body_min[pair_body], body_max[pair_body], displacement[pair_body]
+        moving = pair_displacement != 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            to_min = (box_min - pair_max) / pair_displacement
+            to_max = (box_max - pair_min) / pair_displacement
+        enter = np.where(pair_displacement > 0, to_min, to_max)
+        leave = np.where(pair_displacement > 0, to_max, to_min)
+        overlapping = (pair_min < box_max) & (pair_max > box_min)
+        enter = np.where(moving, enter, np.where(overlapping, -np.inf, np.inf))
+        leave = np.where(moving, leave, np.where(overlapping, np.inf, -np.inf))
+        t_enter = enter.max(axis=1)
+        hit = np.flatnonzero((t_enter <= leave.min(axis=1)) & (t_enter >= 0.0) & (t_enter <= 1.0))
+        if len(hit) == 0:
+            return t, box, axis
+
+        # Earliest hit per body: sort by body, then time, then age, and keep each body's first row
+        order = hit[np.lexsort((self.sequence[pair_box[hit]], t_enter[hit], pair_body[hit]))]
+        first = order[np.concatenate(([True], pair_body[order][1:] != pair_body[order][:-1]))]
+        bodies = pair_body[first]
+        t[bodies] = t_enter[first]
+        box[bodies] = pair_box[first]
+        axis[bodies] = enter[first].argmax(axis=1)
+        return t, box, axis
+
+    def resolve(self, positions, half_extents, grounded, indices=None):
+        """Push bodies out of the first box they overlap, in place.
+
+        ``positions`` is an ``(M, 3)`` float32 array of body centres,
+        ``half_extents`` an ``(M, 3)`` or ``(3,)`` array and ``grounded`` an
+        ``(M,)`` bool array. ``indices`` restricts the test to a candidate
+        list, whose order decides which box is "first". Returns the mask of
+        bodies that collided; bodies that did not collide are left untouched.
+        """
+        indices = self.candidates(indices)
+        collided = np.zeros(len(positions), dtype=bool)
+        if len(indices) == 0:
+            return collided
+        chunk = max(1, self.MAX_PAIRS // len(indices))
+        for start in range(0, len(positions), chunk):
+            stop = min(start + chunk, len(positions))
+            extents = half_extents if np.ndim(half_extents) == 1 else half_extents[start:stop]
+            collided[start:stop] = self._resolve_chunk(positions[start:stop], extents,
+                                                       grounded[start:stop], indices)
+        return collided
+
+    def _resolve_chunk(self, positions, half_extents, grounded, indices):
+        body_center = positions.astype('f8')
+        body_min = body_center - half_extents
+        body_max = body_center + half_extents
+
+        hits = self.overlaps(body_min, body_max, indices)
+        collided = hits.any(axis=1)
+        bodies = np.flatnonzero(collided)
+        if len(bodies) == 0:
+            return collided
+        boxes = indices[hits[bodies].argmax(axis=1)]  # First overlapping candidate per body
+        self._push_out(positions, body_center, body_min, body_max, grounded, bodies, boxes)
+        return collided
+
+    def _push_out(self, positions, body_center, body_min, body_max, grounded, bodies, boxes):
+        """Resolve each of ``bodies`` against its matching entry in ``boxes``, in place."""
+        box_min = self.min_bounds[boxes]
+        box_max = self.max_bounds[boxes]
+        center = body_center[bodies]
+        overlap = np.minimum(body_max[bodies] - box_min, box_max - body_min[bodies])
+        overlap_x, overlap_y, overlap_z = overlap[:, 0], overlap[:, 1], overlap[:, 2]
+
+        # Resolve along Y when it is the strictly smallest overlap, otherwise X or Z
+        along_y = (overlap_y < overlap_x) & (overlap_y < overlap_z)
+        along_x = ~along_y & (overlap_x < overlap_z)
+        along_z = ~along_y & ~along_x
+
+        delta = np.zeros_like(center)
+        delta[:, 1] = np.where(along_y, np.where(center[:, 1] < box_min[:, 1], -overlap_y, overlap_y), 0.0)
+        for axis, along, amount in ((0, along_x, overlap_x), (2, along_z, overlap_z)):
+            push = np.where(center[:, axis] < box_min[:, axis], -amount,
+                            np.where(center[:, axis] > box_max[:, axis], amount, 0.0))
+            delta[:, axis] = np.where(along, push, 0.0)
+        resolved = (center + delta).astype('f4')
+        # Only write the axis that moved, so untouched components keep their exact value
+        moved = delta != 0
+        body_positions = positions[bodies]
+        body_positions[moved] = resolved[moved]
+        positions[bodies] = body_positions
+
+        body_grounded = grounded[bodies] | along_y
+        on_side = ((body_positions[:, 0] < box_min[:, 0] + self.TOLERANCE) |
+                   (body_positions[:, 0] > box_max[:, 0] - self.TOLERANCE) |
+                   (body_positions[:, 2] < box_min[:, 2] + self.TOLERANCE) |
+                   (body_positions[:, 2] > box_max[:, 2] - self.TOLERANCE))
+        within_y = (body_positions[:, 1] < box_max[:, 1]) & (body_positions[:, 1] > box_min[:, 1])
+        body_grounded[on_side] = False
+        body_grounded[~on_side & within_y] = True
+        grounded[bodies] = body_grounded
+
+    @staticmethod
+    def cell_keys(cell_i, cell_j, cell_k):
+        # Pack (i, j, k) into one int64; each component gets 21 bits around an offset
+        return ((cell_i + CELL_OFFSET) << 42) | ((cell_j + CELL_OFFSET) << 21) | (cell_k + CELL_OFFSET)
+
+    def cells_of(self, min_bounds, max_bounds):
+        """Return ``(owner, key)`` for every grid cell each box touches, tolerance included."""
+        low = np.floor((min_bounds - self.TOLERANCE) / self.cell_size).astype(np.int64)
+        high = np.floor((max_bounds + self.TOLERANCE) / self.cell_size).astype(np.int64)
+        owner, cell_i, cell_j, cell_k = cells_covered(low, high)
+        return owner, self.cell_keys(cell_i, cell_j, cell_k)
+
+    def build_cell_index(self):
+        """Bucket the active boxes into grid cells as sorted arrays for ``candidate_pairs``."""
+        boxes = self.candidates()
+        owner, keys = self.cells_of(self.min_bounds[boxes].astype('f8'), self.max_bounds[boxes].astype('f8'))
+        order = np.argsort(keys, kind='stable')  # Stable, so each cell lists its boxes in the order they were added
+        cell_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self.cell_index = (cell_keys, starts, counts, boxes[owner[order]])
+        # Tolerance-padded bounds as float64 rows per axis, for the narrow phase in resolve_bodies
+        self.padded_bounds = ((self.min_bounds[:self.count] - self.TOLERANCE).astype('f8').T.copy(),
+                              (self.max_bounds[:self.count] + self.TOLERANCE).astype('f8').T.copy())
+        return self.cell_index
+
+    def candidate_pairs(self, body_min, body_max):
+        """Broad phase for many bodies: ``(bodies, boxes)`` index arrays of pairs sharing a grid cell.
+
+        Pairs are grouped by body in ascending order and may repeat when a
+        body and a box share more than one cell.
+        """
+        cell_keys, starts, counts, boxes = self.cell_index if self.cell_index is not None else self.build_cell_index()
+        owner, body_keys = self.cells_of(body_min, body_max)
+        if len(cell_keys) == 0:
+            return owner[:0], boxes[:0]
+        cell = np.minimum(np.searchsorted(cell_keys, body_keys), len(cell_keys) - 1)
+        found = cell_keys[cell] == body_keys
+        owner, cell = owner[found], cell[found]
+        start, count = starts[cell], counts[cell]
+        pair_body = np.repeat(owner, count)
+        offsets = np.arange(len(pair_body)) - np.repeat(np.cumsum(count) - count, count)
+        return pair_body, boxes[np.repeat(start, count) + offsets]
+
+    def resolve_bodies(self, positions, half_extents, grounded):
+        """Resolve many bodies against the whole world using the cell index as broad phase.
+
+        Same rules and arguments as ``resolve`` with ``indices=None``: each body
+        is pushed out of the first-added box it overlaps. The cost grows with
+        the number of nearby pairs rather than bodies x boxes.
+        """
+        collided = np.zeros(len(positions), dtype=bool)
+        if len(positions) == 0 or not self.count:
+            return collided
+        body_center = positions.astype('f8')
+        body_min = body_center - half_extents
+        body_max = body_center + half_extents
+        pair_body, pair_box = self.candidate_pairs(body_min, body_max)
+        # Same overlap test as ``overlaps``, one axis at a time so each pass gathers fewer pairs
+        box_min, box_max = self.padded_bounds
+        for axis in (0, 2, 1):
+            body_axis_min, body_axis_max = body_min[:, axis], body_max[:, axis]
+            hit = ((body_axis_min[pair_body] < box_max[axis][pair_box]) &
+                   (body_axis_max[pair_body] > box_min[axis][pair_box]))
+            pair_body, pair_box = pair_body[hit], pair_box[hit]
+        if len(pair_body) == 0:
+            return collided
+
+        # First-added overlapping box per body; pairs are already grouped by body. Sequence and slot
+        # are packed into one key so a single reduction finds the box
+        first = np.flatnonzero(np.concatenate(([True], pair_body[1:] != pair_body[:-1])))
+        stride = len(self.sequence)
+        bodies, boxes = pair_body[first], np.minimum.reduceat(self.sequence[pair_box] * stride + pair_box, first) % stride
+        collided[bodies] = True
+        self._push_out(positions, body_center, body_min, body_max, grounded, bodies, boxes)
+        return collided
+
+    def resolve_player(self, player, indices=None):
+        """Resolve a single ``Player`` against the world; returns True on collision."""
+        positions = player.position.reshape(1, 3)
+        half_extents = np.array([player.width / 2, player.height / 2, player.length / 2])
+        grounded = np.array([player.grounded])
+        collided = self.resolve(positions, half_extents, grounded, indices)
+        if collided[0]:
+            player.grounded = bool(grounded[0])
+        return bool(collided[0])
+
@@ -1,53 +1,130 @@
+import time
+# Must stay above the imports below: IMPORT_TIME is what they cost a launch (StartupProfile 'imports')
+IMPORT_START = time.perf_counter()
 import json
-import pygame
+import os
+import sys
 import moderngl
 import numpy as np
-from player import Player
-from platform import Platform
+from resources import ResourceManager
+from renderer import InstancedRenderer
+from world import World, InputState
+from frustum import Frustum
+from profiler import FrameProfiler, StartupProfile
+from assets import AssetLoader, TextureCache, TEXTURE_CACHE_DIR
+# pygame (window and input), streaming, the overlay, capture and hot reload are imported where first needed:
+# an offscreen engine or a plain scene file never pays for them
+IMPORT_TIME = time.perf_counter() - IMPORT_START
 
 class RyanEngine:
-    def __init__(self, width=800, height=600, scene_file='scenes/testing.json'):
+    def __init__(self, width=800, height=600, scene_file='scenes/testing.json', tick_rate=60, max_fps=60,
+                 offscreen=False, culling=True, profile=False, async_assets=True,
+                 stream_radius=96.0, collision_mode='discrete', hot_reload=False,
+                 texture_cache=TEXTURE_CACHE_DIR):
+        self.startup = StartupProfile(IMPORT_TIME)  # Phase timings up to the first frame (see --startup)
         self.width, self.height = width, height
         self.last_mouse_pos = None
+        self.max_fps = max_fps  # 0 renders as fast as possible; physics still ticks at tick_rate
+        self.max_frame_time = 0.25  # Clamp long hitches so the accumulator cannot spiral
+        self.accumulator = 0.0
+        self.offscreen = offscreen  # Render into a framebuffer with no window, display or input
+        self.culling = culling
+        self.frustum = Frustum()
+        self.stream_radius = stream_radius  # Used when the scene is a chunk directory (see streaming.py)
+        self.streamer = None
+        self.overlay = None  # TextOverlay, created the first time it is shown
+        self.show_overlay = False
+        self.overlay_interval = 15  # Frames between overlay text refreshes
+        self.capture = None  # FrameCapture while frames are being recorded (see start_capture)
+        self.reloader = None  # HotReloader watching the scene and shader files
+        self.pygame = None  # The pygame module, imported once when a window is opened
 
-        pygame.init()
-        pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.OPENGL)
-        pygame.display.set_caption("Ryan Manning 3D Engine")
-
-        self.ctx = moderngl.create_context()
+        if offscreen:
+            self.ctx = self.create_standalone_context()
+            self.fbo = self.ctx.simple_framebuffer((self.width, self.height))
+            self.fbo.use()
+        else:
+            import pygame
+            self.pygame = pygame
+            pygame.display.init()  # Only the display, events and input are used; pygame.init() starts audio too
+            pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.OPENGL)
+            pygame.display.set_caption("Ryan Manning 3D Engine")
+            self.ctx = moderngl.create_context()
+            self.fbo = self.ctx.screen
         self.ctx.enable(moderngl.DEPTH_TEST)
+        self.startup.mark('context')
+        self.resources = ResourceManager(self.ctx)
+        # Textures decode on worker threads and appear as they finish; until then a placeholder is drawn
+        self.loader = AssetLoader() if async_assets else None
+        # Decoded textures are kept on disk, so repeat launches memory-map them instead of running PIL
+        self.texture_cache = TextureCache(texture_cache) if texture_cache else None
+        self.renderer = InstancedRenderer(self.ctx, self.resources, self.loader, self.texture_cache)
+        self.profiler = FrameProfiler(self.ctx, enabled=profile)
+        self.renderer.profiler = self.profiler
+        self.startup.mark('renderer')
 
-        self.platforms = []
-        self.player = None
+        self.world = World(tick_rate, collision_mode)
+        self.world.profiler = self.profiler
         self.load_scene(scene_file)  # Load the scene during initialization
+        self.startup.mark('scene')
         self.projection = self.create_projection_matrix()
+        self.renderer.set_projection(self.projection)
+        if hot_reload and self.streamer is None:
+            from hot_reload import HotReloader
+            self.reloader = HotReloader(self, scene_file)
         self.light_pos = np.array([10.0, 10.0, 10.0], dtype='f4')
 
-        pygame.event.set_grab(True)
-        pygame.mouse.set_visible(False)
-        self.center_mouse()
+        if not offscreen:
+            self.pygame.event.set_grab(True)
+            self.pygame.mouse.set_visible(False)
+            self.center_mouse()
+
+    @staticmethod
+    def create_standalone_context():
+        """Create a windowless context, preferring EGL so it works without a display or GPU."""
+        try:
+            return moderngl.create_standalone_context(backend='egl')
+        except Exception:
+            return moderngl.create_standalone_context()
+
+    @property
+    def player(self):
+        return self.world.player
+
+    @property
+    def platforms(self):
+        return self.world.platforms
 
     def load_scene(self, scene_file):
-        """Load platforms and the player from a scene file."""
-        with open(scene_file, 'r') as f:
-            scene_data = json.load(f)
-
-        # Load platforms
-        for platform_data in scene_data['platforms']:
-            position = platform_data['position']
-            texture_top = platform_data['texture_top']
-            texture_side = platform_data['texture_side']
-            platform = Platform(self.ctx, texture_top, texture_side)
-            platform.position = np.array(position, dtype='f4')  # Set the platform position
-            self.platforms.append(platform)
-
-        # Load player
-        if 'player' in scene_data:
-            player_data = scene_data['player']
-            player_position = player_data['position']
-            self.player = Player(player_position, [0.0, 1.0, 0.0])
-            self.player.velocity = np.array(player_data['velocity'], dtype='f4')
-            self.player.rotation = np.array(player_data['rotation'], dtype='f4')
+        """Load platforms and the player from a scene file, or start streaming a chunk directory."""
+        if os.path.isdir(scene_file):
+            from streaming import ChunkStreamer
+            self.streamer = ChunkStreamer(self.world, scene_file, self.renderer, self.resources, self.stream_radius)
+            self.world.load_player(self.streamer.player)
+            self.streamer.wait(self.player.position)  # The ground under the player must exist on the first tick
+            print(f"Streaming {scene_file}: {self.streamer.stats()}, materials: {self.renderer.materials.stats()}",
+                  file=sys.stderr)
+            return
+        self.world.load_scene(scene_file, self.resources)
+        for platform in self.world.platforms:
+            self.renderer.add(platform)
+
+        print(f"Loaded {len(self.platforms)} platforms: {self.resources.stats()}, "
+              f"materials: {self.renderer.materials.stats()}", file=sys.stderr)  # stdout stays free for reports
+
+    def add_platform(self, platform):
+        self.world.add_platform(platform)
+        self.renderer.add(platform)
+
+    def remove_platform(self, platform):
+        self.world.remove_platform(platform)
+        self.renderer.remove(platform)
+        platform.release()
+
+    def move_platform(self, platform, position):
+        """Move a platform; only its instance slot is re-uploaded on the next frame."""
+        self.world.move_platform(platform, position)
+        self.renderer.update(platform)
 
     def create_projection_matrix(self):
         aspect_ratio = self.width / self.height
@@ -62,10 +139,13 @@ class RyanEngine:
         ], dtype='f4')
 
     def center_mouse(self):
-        pygame.mouse.set_pos(self.width // 2, self.height // 2)
-        self.last_mouse_pos = pygame.mouse.get_pos()
+        mouse = self.pygame.mouse
+        mouse.set_pos(self.width // 2, self.height // 2)
+        self.last_mouse_pos = mouse.get_pos()
 
-    def handle_input(self, delta_time):
+    def handle_input(self):
+        """Read the keyboard into the commands for the next physics ticks."""
+        pygame = self.pygame
         keys = pygame.key.get_pressed()
         forward_input = 0
         right_input = 0
@@ -79,68 +159,153 @@ class RyanEngine:
         if keys[pygame.K_s]:
             forward_input = -1
 
-        self.player.update_velocity(forward_input, right_input, delta_time)
-
-        # Jumping logic: Check if space is pressed and player is grounded
-        if keys[pygame.K_SPACE]:
-            self.player.jump()
+        # Jumping logic: the player only jumps if grounded when the tick runs
+        return InputState(forward_input, right_input, keys[pygame.K_SPACE])
 
     def handle_mouse_movement(self):
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.pygame.mouse.get_pos()
         x_offset = mouse_pos[0] - self.last_mouse_pos[0]
         y_offset = mouse_pos[1] - self.last_mouse_pos[1]
         self.player.process_mouse_movement(x_offset, y_offset)
         self.center_mouse()
+        return x_offset, y_offset
 
-    def apply_gravity(self, delta_time):
-        self.player.apply_gravity(delta_time)
-
-    def render(self):
+    def render(self, alpha=1.0, delta_time=0.016):
+        """Draw the scene with the camera interpolated ``alpha`` of the way into the current tick."""
         self.ctx.clear(0.1, 0.1, 0.1)
 
-        # Bind the projection and view matrices
-        self.player.view_matrix = self.player.create_view_matrix()
-        program = self.platforms[0].vao.program  # Assuming you're using the first platform
-        program['view'].write(self.player.view_matrix.tobytes())
-        program['projection'].write(self.projection.tobytes())
+        # Draw every platform group with its per-instance model matrices
+        camera_position = self.player.interpolated_position(alpha)
+        self.player.view_matrix = self.player.create_view_matrix(delta_time, camera_position)
+        visible = frustum = None
+        if self.culling:
+            frustum = self.frustum
+            frustum.update(self.projection, self.player.view_matrix)
+            # Static chunks are culled by the renderer; only the dynamic platforms get the per-platform test
+            visible = frustum.visible(self.renderer.slots, self.world.collision)
+        with self.profiler.gpu_scope('render'):
+            self.renderer.render(self.player.view_matrix, self.light_pos, visible, frustum)
 
-        # Render each platform or collidable object
-        for platform in self.platforms:
-            model_matrix = np.eye(4, dtype='f4')  # Identity matrix for now
-            platform.render(program, model_matrix, self.light_pos)
+        if self.show_overlay:
+            self.render_overlay()
+        if self.capture is not None:
+            with self.profiler.scope('capture'):
+                self.capture.capture(self.profiler)
+        if not self.offscreen:
+            self.pygame.display.flip()
+        if not self.startup.first_frame_done:
+            self.ctx.finish()  # Once, so the first frame's time includes the GPU work
+            self.startup.first_frame_done = True
+            self.startup.mark('first_frame')
 
-        pygame.display.flip()
+    def toggle_overlay(self):
+        """Show or hide the profiler overlay; profiling is switched on while it is visible."""
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.profiler.enabled = True
+            if self.overlay is None:
+                from overlay import TextOverlay
+                self.overlay = TextOverlay(self.ctx, self.resources)
 
-    def check_collisions(self):
-        """Check for collisions with all platforms."""
-        for platform in self.platforms:
-            if platform.check_collision(self.player):
-                break  # Exit after finding a collision
-        else:
-            self.player.grounded = False  # Reset grounded state if no collision is detected
+    def start_capture(self, directory, file_format='png', latency=3):
+        """Write every rendered frame to ``directory`` (PNG sequence or raw RGB24) without stalling."""
+        from capture import FrameCapture
+        self.capture = FrameCapture(self.ctx, self.fbo, directory, file_format, latency)
+
+    def stop_capture(self):
+        """Flush the frames still in flight; returns how many were written."""
+        if self.capture is None:
+            return 0
+        written = self.capture.finish()
+        self.capture = None
+        return written
 
-    def main_loop(self):
+    def render_overlay(self):
+        if self.profiler.frame_index % self.overlay_interval == 0:
+            self.overlay.set_lines(self.profiler.overlay_text())
+        self.overlay.render((self.width, self.height))
+
+    def update(self, frame_time, commands):
+        """Run every fixed physics tick that fits in the elapsed time; return the render alpha."""
+        tick_time = self.world.tick_time
+        if self.streamer is not None:
+            with self.profiler.scope('streaming'):
+                self.streamer.update(self.player.position)
+        self.accumulator += min(frame_time, self.max_frame_time)
+        while self.accumulator >= tick_time:
+            self.world.step(commands)
+            self.accumulator -= tick_time
+        return self.accumulator / tick_time
+
+    def main_loop(self, record_file=None, profile_file=None, capture_dir=None, startup_report=False):
+        """Run the game until the window closes.
+
+        Optionally records the input trace to ``record_file``, writes the
+        profiler's last frames to ``profile_file`` as a Chrome trace,
+        captures every frame as PNGs into ``capture_dir`` and prints the
+        startup phases after the first frame. F3 toggles the profiler overlay.
+        """
+        pygame = self.pygame
         clock = pygame.time.Clock()
+        profiler = self.profiler
         running = True
+        trace = []
+        if capture_dir is not None:
+            self.start_capture(capture_dir)
 
         while running:
-            delta_time = clock.tick(60) / 1000.0
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
+            frame_time = clock.tick(self.max_fps) / 1000.0
+            profiler.begin_frame()
 
-            self.handle_input(delta_time)
-            self.handle_mouse_movement()
-            self.apply_gravity(delta_time)
+            with profiler.scope('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                        self.toggle_overlay()
 
-            # Check collision with all platforms
-            self.check_collisions()
+            # Mouse look is applied per rendered frame, movement per fixed physics tick
+            with profiler.scope('input'):
+                look_x, look_y = self.handle_mouse_movement()
+                commands = self.handle_input()
+            if record_file is not None:
+                trace.append({'dt': frame_time, 'forward': commands.forward, 'right': commands.right,
+                              'jump': bool(commands.jump), 'look_x': look_x, 'look_y': look_y})
 
-            self.render()
+            if self.reloader is not None:
+                with profiler.scope('hot_reload'):
+                    self.reloader.poll()
+            with profiler.scope('physics'):
+                alpha = self.update(frame_time, commands)
+            self.render(alpha, frame_time)
+            profiler.end_frame()
+            if startup_report:
+                startup_report = False
+                print(self.startup.report())
+                if self.texture_cache is not None:
+                    print(f"texture cache: {self.texture_cache.stats()}")  # Async decodes may still be running
 
+        self.stop_capture()
         pygame.quit()
+        if self.loader is not None:
+            self.loader.shutdown()
+        if self.streamer is not None:
+            self.streamer.shutdown()
+        if record_file is not None:
+            with open(record_file, 'w') as f:
+                json.dump(trace, f)
+        if profile_file is not None:
+            profiler.export_chrome_trace(profile_file)
 
 if __name__ == "__main__":
-    engine = RyanEngine()
-    engine.main_loop()
+    # python engine.py [--record trace.json] [--profile chrome_trace.json] [--capture frames/] [--tick-rate 20]
+    #                  [--swept] [--hot-reload] [--startup] [--no-texture-cache]
+    record_file = sys.argv[sys.argv.index('--record') + 1] if '--record' in sys.argv else None
+    profile_file = sys.argv[sys.argv.index('--profile') + 1] if '--profile' in sys.argv else None
+    capture_dir = sys.argv[sys.argv.index('--capture') + 1] if '--capture' in sys.argv else None
+    tick_rate = int(sys.argv[sys.argv.index('--tick-rate') + 1]) if '--tick-rate' in sys.argv else 60
+    engine = RyanEngine(tick_rate=tick_rate, profile=profile_file is not None,
+                        collision_mode='swept' if '--swept' in sys.argv else 'discrete',
+                        hot_reload='--hot-reload' in sys.argv,
+                        texture_cache=None if '--no-texture-cache' in sys.argv else TEXTURE_CACHE_DIR)
+    engine.main_loop(record_file, profile_file, capture_dir, '--startup' in sys.argv)
@@ -0,0 +1,207 @@
+import numpy as np
+
+from collision import SWEEP_ITERATIONS, SKIN, GROUND_PROBE
+from player import JUMP_FORCE, GRAVITY, FRICTION, ACCELERATION, MOUSE_SENSITIVITY, PITCH_LIMIT, BODY_SIZE
+
+
+class EntityBatch:
+    """Movable bodies (bots, remote players) simulated together as contiguous arrays.
+
+    Each entity is a slot in ``(capacity, ...)`` arrays of position, velocity,
+    yaw/pitch, grounded flag and half extents. Callers write per-entity
+    commands into ``forward``, ``right``, ``jump``, ``look_x`` and ``look_y``;
+    ``step`` then applies the same rules as ``Player`` (movement, jumping,
+    mouse look, gravity) and the world's collision mode to every active
+    entity at once: ``CollisionWorld.resolve_bodies`` when discrete, or the
+    batched sweep in ``sweep`` when swept.
+    """
+    def __init__(self, capacity=1024):
+        self.count = 0  # High-water mark of used slots
+        self.free = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = getattr(self, 'positions', None)
+        arrays = {
+            'positions': ((capacity, 3), 'f4'),
+            'previous_positions': ((capacity, 3), 'f4'),
+            'velocities': ((capacity, 3), 'f4'),
+            'half_extents': ((capacity, 3), 'f8'),
+            'yaw': ((capacity,), 'f8'),  # Degrees, double precision like Player's Python floats
+            'pitch': ((capacity,), 'f8'),
+            'front': ((capacity, 3), 'f4'),
+            'right_vector': ((capacity, 3), 'f4'),
+            'grounded': ((capacity,), bool),
+            'active': ((capacity,), bool),
+            # Commands for the next tick
+            'forward': ((capacity,), 'f4'),
+            'right': ((capacity,), 'f4'),
+            'jump': ((capacity,), bool),
+            'look_x': ((capacity,), 'f8'),
+            'look_y': ((capacity,), 'f8'),
+        }
+        for name, (shape, dtype) in arrays.items():
+            new = np.zeros(shape, dtype=dtype)
+            if old is not None:
+                new[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, new)
+
+    def __len__(self):
+        return int(self.active[:self.count].sum())
+
+    def spawn(self, position, yaw=-90.0, pitch=0.0, size=BODY_SIZE):
+        """Add an entity at rest and return its slot."""
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.count == len(self.positions):
+                self._allocate(len(self.positions) * 2)
+            index = self.count
+            self.count += 1
+        self.positions[index] = self.previous_positions[index] = position
+        self.velocities[index] = 0.0
+        self.half_extents[index] = np.asarray(size, dtype='f8') / 2
+        self.yaw[index], self.pitch[index] = yaw, pitch
+        self.grounded[index] = False
+        self.active[index] = True
+        self.clear_commands(index)
+        self.update_camera_vectors(np.array([index]))
+        return index
+
+    def spawn_many(self, positions, yaw=-90.0, pitch=0.0, size=BODY_SIZE):
+        """Add a block of entities from an ``(N, 3)`` array and return their slots."""
+        n = len(positions)
+        capacity = len(self.positions)
+        if self.count + n > capacity:
+            while capacity < self.count + n:
+                capacity *= 2
+            self._allocate(capacity)
+        indices = np.arange(self.count, self.count + n)
+        self.count += n
+        self.positions[indices] = self.previous_positions[indices] = positions
+        self.velocities[indices] = 0.0
+        self.half_extents[indices] = np.asarray(size, dtype='f8') / 2
+        self.yaw[indices], self.pitch[indices] = yaw, pitch
+        self.grounded[indices] = False
+        self.active[indices] = True
+        self.clear_commands(indices)
+        self.update_camera_vectors(indices)
+        return indices
+
+    def despawn(self, index):
+        self.active[index] = False
+        self.clear_commands(index)
+        self.free.append(index)
+
+    def clear_commands(self, indices):
+        self.forward[indices] = self.right[indices] = 0.0
+        self.look_x[indices] = self.look_y[indices] = 0.0
+        self.jump[indices] = False
+
+    def update_camera_vectors(self, indices):
+        """Recompute front and right from yaw and pitch, as ``Player.update_camera_vectors`` does."""
+        yaw = np.radians(self.yaw[indices])
+        pitch = np.radians(self.pitch[indices])
+        front = np.stack((np.cos(yaw) * np.cos(pitch), np.sin(pitch), np.sin(yaw) * np.cos(pitch)), axis=1)
+        front /= np.linalg.norm(front, axis=1, keepdims=True)
+        # right = normalize(front x world_up) with world_up = +Y
+        right = np.stack((-front[:, 2], np.zeros(len(front)), front[:, 0]), axis=1)
+        right /= np.linalg.norm(right, axis=1, keepdims=True)
+        self.front[indices] = front
+        self.right_vector[indices] = right
+
+    def step(self, delta_time, collision=None, collision_mode='discrete'):
+        """Advance every active entity by one tick, in the same order as ``World.step``."""
+        live = np.flatnonzero(self.active[:self.count])
+        if len(live) == 0:
+            return
+        positions = self.positions[live]
+        velocities = self.velocities[live].astype('f8')
+        grounded = self.grounded[live]
+        self.previous_positions[live] = positions
+
+        # Movement (Player.update_velocity): accelerate along the flattened front and right vectors
+        forward, right = self.forward[live].astype('f8'), self.right[live].astype('f8')
+        front = self.front[live].astype('f8')
+        right_vector = self.right_vector[live].astype('f8')
+        front_xz = front[:, [0, 2]] / np.hypot(front[:, 0], front[:, 2])[:, None]
+        forward_acceleration = ACCELERATION * forward
+        right_acceleration = ACCELERATION * right
+        for column, axis in ((0, 0), (1, 2)):
+            velocity = velocities[:, axis] + (right_acceleration * right_vector[:, axis] +
+                                              forward_acceleration * front_xz[:, column]) * delta_time
+            velocities[:, axis] = (velocity * (1.0 - FRICTION)).astype('f4')
+            positions[:, axis] = positions[:, axis] + velocities[:, axis] * delta_time
+
+        # Jumping (Player.jump) only from the ground
+        jumping = self.jump[live] & grounded
+        velocities[jumping, 1] = JUMP_FORCE
+        grounded[jumping] = False
+
+        # Mouse look (Player.process_mouse_movement)
+        look_x, look_y = self.look_x[live], self.look_y[live]
+        looking = (look_x != 0) | (look_y != 0)
+        if looking.any():
+            turned = live[looking]
+            self.yaw[turned] += look_x[looking] * MOUSE_SENSITIVITY
+            self.pitch[turned] = np.clip(self.pitch[turned] - look_y[looking] * MOUSE_SENSITIVITY, -PITCH_LIMIT, PITCH_LIMIT)
+            self.update_camera_vectors(turned)
+
+        # Gravity (Player.apply_gravity)
+        falling = ~grounded
+        velocities[falling, 1] = (velocities[falling, 1] + GRAVITY * delta_time).astype('f4')
+        positions[:, 1] = positions[:, 1] + velocities[:, 1] * delta_time
+
+        if collision is not None and collision_mode == 'swept':
+            grounded = self.sweep(collision, live, positions, velocities)
+        elif collision is not None:
+            # Same contract as World.check_collisions: no contact means airborne
+            collided = collision.resolve_bodies(positions, self.half_extents[live], grounded)
+            grounded[~collided] = False
+        self.velocities[live] = velocities
+        self.positions[live] = positions
+        self.grounded[live] = grounded
+
+    def sweep(self, collision, live, positions, velocities):
+        """Batched ``World.sweep_collisions``: replay this tick's motion as swept boxes.
+
+        ``positions`` (end of the tick, rewritten in place) and ``velocities``
+        belong to the ``live`` slots. Each round sweeps every body still
+        moving, stops the ones that hit ``SKIN`` short of the surface and
+        slides the rest of their motion along it. Returns the grounded mask.
+        """
+        half = self.half_extents[live]
+        position = self.previous_positions[live].astype('f8')
+        remaining = positions.astype('f8') - position
+        landed = np.zeros(len(live), dtype=bool)
+        moving = np.flatnonzero(remaining.any(axis=1))
+
+        for _ in range(SWEEP_ITERATIONS):
+            if len(moving) == 0:
+                break
+            start = position[moving]
+            t, box, axis = collision.sweep_bodies(start - half[moving], start + half[moving], remaining[moving])
+            hit = box >= 0
+            clear = moving[~hit]
+            position[clear] += remaining[clear]
+            moving, t, axis = moving[hit], t[hit], axis[hit]
+            direction = np.where(remaining[moving, axis] > 0, 1.0, -1.0)
+            position[moving] += remaining[moving] * t[:, None]
+            position[moving, axis] -= direction * SKIN
+            remaining[moving] *= (1.0 - t)[:, None]
+            remaining[moving, axis] = 0.0
+            velocities[moving, axis] = 0.0
+            landed[moving[(axis == 1) & (direction < 0)]] = True
+            moving = moving[remaining[moving].any(axis=1)]
+        positions[:] = position
+
+        # Resting contact: probe just below the feet, starting SKIN higher as World.sweep_collisions does
+        probing = np.flatnonzero(~landed & (velocities[:, 1] <= 0))
+        if len(probing):
+            lift = np.array([0.0, SKIN, 0.0])
+            probe_min = position[probing] - half[probing] + lift
+            probe_max = position[probing] + half[probing] + lift
+            drop = np.broadcast_to((0.0, -(SKIN + GROUND_PROBE), 0.0), probe_min.shape)
+            landed[probing] = collision.sweep_bodies(probe_min, probe_max, drop)[1] >= 0
+        return landed
+
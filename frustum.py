@@ -0,0 +1,62 @@
+import numpy as np
+
+# Unit cube corners in normalized device coordinates, used to bound the frustum
+NDC_CORNERS = np.array([[x, y, z, 1.0] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype='f8')
+
+
+class Frustum:
+    """View frustum planes extracted from ``projection @ view`` for AABB culling."""
+    def __init__(self):
+        self.planes = np.zeros((6, 4), dtype='f8')  # (a, b, c, d) with the normal pointing inwards
+        self.min_bound = np.zeros(3, dtype='f8')
+        self.max_bound = np.zeros(3, dtype='f8')
+
+    def update(self, projection, view_matrix):
+        """Recompute the planes for this frame's camera.
+
+        Both matrices are in the engine's column-major layout (what gets written
+        to the shader), so the row-vector product is transposed back here.
+        """
+        clip = (np.asarray(view_matrix, dtype='f8').reshape(4, 4) @ np.asarray(projection, dtype='f8')).T
+        planes = self.planes
+        planes[0] = clip[3] + clip[0]  # Left
+        planes[1] = clip[3] - clip[0]  # Right
+        planes[2] = clip[3] + clip[1]  # Bottom
+        planes[3] = clip[3] - clip[1]  # Top
+        planes[4] = clip[3] + clip[2]  # Near
+        planes[5] = clip[3] - clip[2]  # Far
+        planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+        corners = NDC_CORNERS @ np.linalg.inv(clip).T
+        corners = corners[:, :3] / corners[:, 3:]
+        self.min_bound[:] = corners.min(axis=0)
+        self.max_bound[:] = corners.max(axis=0)
+
+    def test_aabbs(self, min_bounds, max_bounds):
+        """Return a mask of the boxes that are at least partly inside the frustum.
+
+        For every plane only the box corner furthest along the plane normal is
+        tested; a box is culled if that corner is behind any plane.
+        """
+        normals = self.planes[:, :3]
+        positive = normals > 0
+        corners = np.where(positive[None], max_bounds[:, None, :], min_bounds[:, None, :])
+        distances = np.einsum('npk,pk->np', corners, normals) + self.planes[:, 3]
+        return (distances >= 0).all(axis=1)
+
+    def visible(self, items, collision):
+        """Return the ``items`` inside the frustum.
+
+        Their boxes are tested against the frustum's bounding box and planes in
+        one pass using the ``CollisionWorld`` arrays (items must carry a
+        ``collision_id``), so the cost follows the number of items passed in,
+        not the size of the scene.
+        """
+        items = list(items)
+        if not items:
+            return items
+        indices = np.fromiter((item.collision_id for item in items), dtype=np.intp, count=len(items))
+        min_bounds, max_bounds = collision.min_bounds[indices], collision.max_bounds[indices]
+        mask = ((min_bounds <= self.max_bound) & (max_bounds >= self.min_bound)).all(axis=1)
+        mask &= self.test_aabbs(min_bounds, max_bounds)
+        return [item for item, inside in zip(items, mask) if inside]
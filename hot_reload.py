@@ -0,0 +1,173 @@
+"""Hot-reload of the scene file and the scene shaders while the engine runs.
+
+    python engine.py --hot-reload
+
+``HotReloader`` polls file modification times a few times per second. A
+changed scene is diffed against the platforms already loaded, so only the
+platforms that were added, moved or removed are touched; changed shaders
+are recompiled once, with the last good programs kept on errors.
+"""
+import os
+import sys
+import time
+import numpy as np
+
+from renderer import SHADER_FILES
+from scene_format import SceneData, load_scene_data, PLATFORM_DYNAMIC
+
+
+# One row per platform; its bytes are the platform's identity when diffing scenes
+PLATFORM_RECORD = np.dtype([('position', '<f4', 3), ('size', '<f4', 3), ('textures', '<i4', 2), ('dynamic', 'u1')])
+POSITION_BYTES = 12  # A record without its leading position is the platform's shape, which a move keeps
+
+
+def record_keys(positions, sizes, textures, dynamic):
+    """Pack per-platform arrays into PLATFORM_RECORD rows and return each row's bytes."""
+    records = np.zeros(len(positions), dtype=PLATFORM_RECORD)
+    records['position'] = positions
+    records['size'] = sizes
+    records['textures'] = textures
+    records['dynamic'] = dynamic
+    return records.view(f'V{PLATFORM_RECORD.itemsize}').tolist()
+
+
+def diff_scene(loaded, new_keys, is_dynamic):
+    """Match loaded platforms against the records of a new scene.
+
+    ``loaded`` maps platforms to their record keys. Returns ``(added, moved,
+    removed)``: scene indices to create, ``(platform, scene index)`` pairs
+    that only changed position, and platforms to destroy. Unchanged
+    platforms are matched exactly; a leftover dynamic platform is paired, in
+    file order, with a new one of the same shape. Static platforms are
+    baked, so moving one means recreating it.
+    """
+    old_set, new_set = set(loaded.values()), set(new_keys)
+    if len(old_set) == len(loaded) and len(new_set) == len(new_keys):
+        # No duplicate platforms: plain set membership, which stays fast on large levels
+        leftover = [index for index, key in enumerate(new_keys) if key not in old_set]
+        stale = [platform for platform, key in loaded.items() if key not in new_set]
+    else:
+        unchanged = {}
+        for platform, key in loaded.items():
+            unchanged.setdefault(key, []).append(platform)
+        leftover = []
+        for index, key in enumerate(new_keys):
+            matches = unchanged.get(key)
+            if matches:
+                matches.pop()
+            else:
+                leftover.append(index)
+        stale = [platform for matches in unchanged.values() for platform in matches]
+
+    movable = {}  # Shape -> dynamic platforms that may have moved
+    removed = []
+    for platform in stale:
+        if is_dynamic(platform):
+            movable.setdefault(loaded[platform][POSITION_BYTES:], []).append(platform)
+        else:
+            removed.append(platform)
+    added, moved = [], []
+    for index in leftover:
+        candidates = movable.get(new_keys[index][POSITION_BYTES:])
+        if candidates:
+            moved.append((candidates.pop(0), index))
+        else:
+            added.append(index)
+    removed += [platform for candidates in movable.values() for platform in candidates]
+    return added, moved, removed
+
+
+class HotReloader:
+    """Watches the engine's scene file and shaders and applies changes between frames."""
+    def __init__(self, engine, scene_file, shader_files=SHADER_FILES, interval=0.25):
+        self.engine = engine
+        self.scene_file = scene_file
+        self.shader_files = sorted(set(shader_files))
+        self.interval = interval  # Seconds between modification time checks
+        self.next_check = 0.0
+        self.mtimes = {path: self.mtime(path) for path in [scene_file] + self.shader_files}
+        self.texture_ids = {}  # Texture path -> id used in platform records
+        self.keys = self.platform_keys(engine.world.platforms)  # Loaded platform -> record key, kept up to date
+
+    def texture_id(self, path):
+        return self.texture_ids.setdefault(path, len(self.texture_ids))
+
+    def platform_keys(self, platforms):
+        positions = np.array([platform.position for platform in platforms], dtype='f4').reshape(-1, 3)
+        sizes = np.array([(platform.width, platform.height, platform.length) for platform in platforms],
+                         dtype='f4').reshape(-1, 3)
+        textures = [(self.texture_id(platform.texture_path), self.texture_id(platform.side_texture_path))
+                    for platform in platforms]
+        return dict(zip(platforms, record_keys(positions, sizes, np.array(textures, dtype='i4').reshape(-1, 2),
+                                               [platform.dynamic for platform in platforms])))
+
+    def scene_keys(self, scene):
+        ids = np.array([self.texture_id(path) for path in scene.texture_paths], dtype='i4')
+        return record_keys(scene.positions, scene.sizes, ids[scene.texture_indices],
+                           (scene.flags & PLATFORM_DYNAMIC) != 0)
+
+    @staticmethod
+    def mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None  # Missing while an editor replaces the file; picked up once it is back
+
+    def changed(self):
+        changed = []
+        for path, last in self.mtimes.items():
+            current = self.mtime(path)
+            if current is not None and current != last:
+                self.mtimes[path] = current
+                changed.append(path)
+        return changed
+
+    def poll(self, now=None):
+        """Check the watched files if the interval has passed and reload what changed."""
+        now = time.perf_counter() if now is None else now
+        if now < self.next_check:
+            return
+        self.next_check = now + self.interval
+        changed = self.changed()
+        if any(path in self.shader_files for path in changed):
+            start = time.perf_counter()
+            if self.engine.renderer.reload_shaders():
+                print(f"Reloaded shaders in {(time.perf_counter() - start) * 1e3:.1f} ms", file=sys.stderr)
+        if self.scene_file in changed:
+            self.reload_scene()
+
+    def reload_scene(self):
+        """Apply the scene file's current contents; returns ``(added, moved, removed)`` counts or None."""
+        start = time.perf_counter()
+        try:
+            scene = load_scene_data(self.scene_file)
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Scene reload failed, keeping the loaded scene: {error}", file=sys.stderr)  # Often a half-saved file
+            return None
+        engine = self.engine
+        world, renderer = engine.world, engine.renderer
+        new_keys = self.scene_keys(scene)
+        added, moved, removed = diff_scene(self.keys, new_keys, lambda platform: platform.dynamic)
+
+        # New platforms first, so textures shared with removed ones keep their layers
+        if added:
+            indices = np.array(added)
+            subset = SceneData(scene.positions[indices], scene.sizes[indices], scene.texture_indices[indices],
+                               scene.texture_paths, flags=scene.flags[indices])
+            for platform, index in zip(world.add_scene(subset, engine.resources), added):
+                renderer.add(platform)
+                self.keys[platform] = new_keys[index]
+        for platform, index in moved:
+            engine.move_platform(platform, scene.positions[index])
+            self.keys[platform] = new_keys[index]
+        if removed:
+            world.remove_platforms(removed)
+            for platform in removed:
+                renderer.remove(platform)
+                platform.release()
+                del self.keys[platform]
+        scene.close()
+        print(f"Reloaded {self.scene_file}: {len(added)} added, {len(moved)} moved, {len(removed)} removed "
+              f"in {(time.perf_counter() - start) * 1e3:.1f} ms", file=sys.stderr)
+        return len(added), len(moved), len(removed)
+
@@ -0,0 +1,266 @@
+import time
+import numpy as np
+import moderngl
+
+from assets import decode_image
+from profiler import NULL_PROFILER
+
+SIZE_CLASSES = 8  # Square power-of-two layer sizes, one texture array each
+MIN_LAYER_SIZE = 16
+MAX_LAYER_SIZE = MIN_LAYER_SIZE << (SIZE_CLASSES - 1)  # 2048; larger textures are downsampled to it
+LAYER_TABLE_WIDTH = 256  # Texels per row of the layer table; must match the fragment shader
+LAYER_TABLE_UNIT = SIZE_CLASSES  # Texture unit of the layer table, after the size class arrays on units 0-7
+TEXTURE_UNITS = SIZE_CLASSES + 1  # Units the scene binds; other users (the overlay) go above them
+LOADING = (-1.0, 0.0)  # Layer table entry while the texture is loading; the shader draws a checker
+
+
+def size_class_index(width, height):
+    """Index of the size class a ``width`` x ``height`` texture is stored in (its side rounded up to a power of two)."""
+    side = min(max(width, height, MIN_LAYER_SIZE), MAX_LAYER_SIZE)
+    return (side - 1).bit_length() - (MIN_LAYER_SIZE - 1).bit_length()
+
+
+def nearest_indices(source, target):
+    """Source texel per target texel, summed step by step like Pillow's NEAREST resize so results match it."""
+    steps = np.full(target, source / target)
+    steps[0] *= 0.5  # Sample texel centres
+    return np.cumsum(steps).astype(np.intp)
+
+
+class SizeClass:
+    """One ``texture_array`` holding the textures of one size class, each resampled (nearest) to ``size`` squared."""
+    def __init__(self, ctx, size):
+        self.ctx = ctx
+        self.size = size
+        self.images = []  # Decoded (height, width, 3) RGB arrays, one per layer; None when free
+        self.free_layers = []
+        self.texture_array = None
+        self.dirty = False  # The texture array must be reallocated for new layers
+
+    def layer_pixels(self, img):
+        """Pixels of one layer, as bytes or a C-contiguous array (possibly memory-mapped)."""
+        if img is None:
+            return bytes(self.size * self.size * 3)
+        if img.shape[:2] != (self.size, self.size):
+            img = img[nearest_indices(img.shape[0], self.size)[:, None], nearest_indices(img.shape[1], self.size)]
+        return img
+
+    def add(self, img, profiler=NULL_PROFILER):
+        """Store an image in a free layer, or in a new one written when the array is next reallocated."""
+        if self.free_layers:
+            layer = self.free_layers.pop()
+            self.images[layer] = img
+            if not self.dirty:
+                self.write_layer(layer, img, profiler)
+        else:
+            layer = len(self.images)
+            self.images.append(img)
+            self.dirty = True
+        return layer
+
+    def remove(self, layer):
+        self.images[layer] = None
+        self.free_layers.append(layer)
+
+    def write_layer(self, layer, img, profiler=NULL_PROFILER):
+        self.texture_array.write(self.layer_pixels(img), viewport=(0, 0, layer, self.size, self.size, 1))
+        profiler.count('texture_uploads')
+        profiler.count('upload_bytes', self.size * self.size * 3)
+
+    def reallocate(self, profiler=NULL_PROFILER):
+        """Rebuild the texture array at the current layer count."""
+        data = b''.join(self.layer_pixels(img) for img in self.images)
+        if self.texture_array is not None:
+            self.texture_array.release()
+        self.texture_array = self.ctx.texture_array((self.size, self.size, len(self.images)), 3, data)
+        self.texture_array.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.dirty = False
+        profiler.count('texture_uploads')
+        profiler.count('upload_bytes', len(data))
+
+    def nbytes(self):
+        return self.size * self.size * 3 * len(self.images) if self.texture_array is not None else 0
+
+    def release(self):
+        if self.texture_array is not None:
+            self.texture_array.release()
+            self.texture_array = None
+
+
+class MaterialLibrary:
+    """Packs the scene textures into one ``texture_array`` per size class, bound together for the whole scene.
+
+    Each texture path gets a layer index; platforms pass their top and side
+    layers per instance and the fragment shader picks one per face. The
+    vertex shaders resolve an index through a small layer table texture to a
+    (size class, layer) pair, so it can be handed out before the image size
+    is known. Textures
+    are resampled (nearest) only up to their own power-of-two size class, so
+    a large texture neither inflates the small ones nor reallocates their
+    arrays.
+
+    With an ``AssetLoader`` the layer index is handed out immediately and the
+    image is decoded on a worker thread; the layer shows a placeholder until
+    ``upload`` stores the decoded pixels, spending at most ``upload_budget``
+    seconds per frame on them. With a ``TextureCache`` images are read from
+    (and added to) the on-disk cache of decoded textures.
+
+    Layers are reference counted: ``release_layer`` frees a layer once no
+    platform uses its texture, and the slot is reused by the next new texture
+    without reallocating the array.
+    """
+    def __init__(self, ctx, loader=None, upload_budget=0.002, cache=None):
+        self.ctx = ctx
+        self.loader = loader
+        self.decode = cache.decode if cache is not None else decode_image
+        self.upload_budget = upload_budget
+        self.layers = {}  # path -> layer index
+        self.entries = []  # (size class, layer in its array) per layer index; None while loading or free
+        self.refcounts = []  # Users of each layer index
+        self.generations = []  # Bumped when a layer index is freed, so decodes requested before are dropped
+        self.free_layers = []
+        self.pending = 0  # Layers waiting for their image
+        self.classes = [SizeClass(ctx, MIN_LAYER_SIZE << index) for index in range(SIZE_CLASSES)]
+        self.table = np.empty((0, LAYER_TABLE_WIDTH, 2), dtype='f4')  # CPU mirror of the layer table
+        self.table_texture = None
+        self.table_dirty = False
+
+    def layer(self, path):
+        """Return the layer index for an image file, starting its decode the first time it is seen.
+
+        Every call adds a reference that ``release_layer`` drops.
+        """
+        index = self.layers.get(path)
+        if index is not None:
+            self.refcounts[index] += 1
+            return index
+        if self.free_layers:
+            index = self.free_layers.pop()
+            self.refcounts[index] = 1
+        else:
+            index = len(self.entries)
+            self.entries.append(None)
+            self.refcounts.append(1)
+            self.generations.append(0)
+        self.set_entry(index, None)
+        self.layers[path] = index
+        if self.loader is None:
+            self.store(index, self.decode(path))
+        else:
+            self.pending += 1
+            self.loader.submit((index, self.generations[index]), path, self.decode)
+        return index
+
+    def release_layer(self, path):
+        """Drop a reference taken by ``layer``; the layer is freed for reuse at zero."""
+        index = self.layers[path]
+        self.refcounts[index] -= 1
+        if self.refcounts[index] <= 0:
+            del self.layers[path]
+            self.generations[index] += 1
+            if self.entries[index] is not None:
+                size_class, layer = self.entries[index]
+                self.classes[size_class].remove(layer)
+            self.set_entry(index, None)
+            self.free_layers.append(index)
+
+    def set_entry(self, index, entry):
+        """Point a layer index at ``(size class, layer)``, or at the loading placeholder for None."""
+        self.entries[index] = entry
+        row, column = divmod(index, LAYER_TABLE_WIDTH)
+        if row >= len(self.table):
+            table = np.empty((max(1, 2 * len(self.table)), LAYER_TABLE_WIDTH, 2), dtype='f4')
+            table[:] = LOADING
+            table[:len(self.table)] = self.table
+            self.table = table
+        self.table[row, column] = LOADING if entry is None else entry
+        self.table_dirty = True
+
+    def store(self, index, img, profiler=NULL_PROFILER):
+        """Record a decoded image in its size class; it is written now if the class array has room for it."""
+        size_class = size_class_index(img.shape[1], img.shape[0])
+        self.set_entry(index, (size_class, self.classes[size_class].add(img, profiler)))
+
+    def receive(self, profiler=NULL_PROFILER):
+        """Store decoded images from the loader until the per-frame upload budget is spent."""
+        deadline = time.perf_counter() + self.upload_budget
+        while self.pending:
+            done = self.loader.poll()
+            if done is None:
+                break
+            (index, generation), img = done
+            self.pending -= 1
+            if self.generations[index] == generation:  # Skip textures released while they were loading
+                self.store(index, img, profiler)
+            if time.perf_counter() >= deadline:
+                break
+
+    def wait(self):
+        """Block until every requested texture has been decoded and uploaded."""
+        while self.pending:
+            (index, generation), img = self.loader.poll(block=True)
+            self.pending -= 1
+            if self.generations[index] == generation:
+                self.store(index, img)
+        self.upload()
+
+    def upload(self, profiler=NULL_PROFILER):
+        """Bring the textures up to date: store newly decoded images, then reallocate the arrays that grew.
+
+        Only the size classes that gained layers are reallocated. The layer
+        table is written last, so it never points at a layer not yet uploaded.
+        """
+        if self.pending:
+            self.receive(profiler)
+        for size_class in self.classes:
+            if size_class.dirty:
+                size_class.reallocate(profiler)
+        if self.table_dirty:
+            self.write_table(profiler)
+
+    def write_table(self, profiler=NULL_PROFILER):
+        size = (LAYER_TABLE_WIDTH, len(self.table))
+        if self.table_texture is None or self.table_texture.size != size:
+            if self.table_texture is not None:
+                self.table_texture.release()
+            self.table_texture = self.ctx.texture(size, 2, dtype='f4')
+            self.table_texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+        self.table_texture.write(self.table.tobytes())
+        self.table_dirty = False
+        profiler.count('texture_uploads')
+        profiler.count('upload_bytes', self.table.nbytes)
+
+    def attach(self, program):
+        """Point a scene program's samplers at the units ``use`` binds."""
+        program['textures'].value = tuple(range(SIZE_CLASSES))
+        program['layerTable'].value = LAYER_TABLE_UNIT
+
+    def use(self, profiler=NULL_PROFILER, state=None):
+        """Bring the textures up to date and bind them; through a ``RenderState`` binds already in place are skipped."""
+        self.upload(profiler)
+        bindings = [(size_class.texture_array, unit) for unit, size_class in enumerate(self.classes)]
+        bindings.append((self.table_texture, LAYER_TABLE_UNIT))
+        for texture, unit in bindings:
+            if texture is None:
+                continue
+            if state is not None:
+                state.bind_texture(texture, unit, profiler)
+            else:
+                texture.use(unit)
+                profiler.count('texture_binds')
+
+    def nbytes(self):
+        return sum(size_class.nbytes() for size_class in self.classes)
+
+    def stats(self):
+        return {'layers': len(self.layers), 'free_layers': len(self.free_layers), 'pending': self.pending,
+                'size_classes': {size_class.size: len(size_class.images) for size_class in self.classes
+                                 if size_class.images},
+                'bytes_resident': self.nbytes()}
+
+    def release(self):
+        for size_class in self.classes:
+            size_class.release()
+        if self.table_texture is not None:
+            self.table_texture.release()
+            self.table_texture = None
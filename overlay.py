@@ -0,0 +1,83 @@
+import numpy as np
+import pygame
+import moderngl
+
+from materials import TEXTURE_UNITS
+
+OVERLAY_VERTEX_SHADER = 'shaders/overlay_vertex_shader.glsl'
+OVERLAY_FRAGMENT_SHADER = 'shaders/overlay_fragment_shader.glsl'
+OVERLAY_TEXTURE_UNIT = TEXTURE_UNITS  # Kept off the scene's units so their cached bindings stay valid
+
+
+class TextOverlay:
+    """Draws lines of text in the top-left corner of the framebuffer.
+
+    The text is rasterised with pygame.font into a texture only when it
+    changes, so drawing the overlay each frame is a single textured quad.
+    """
+    def __init__(self, ctx, resources, font_size=16, margin=8):
+        self.ctx = ctx
+        self.resources = resources
+        self.margin = margin
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.font = pygame.font.SysFont('monospace', font_size)
+        self.program = resources.acquire_program(OVERLAY_VERTEX_SHADER, OVERLAY_FRAGMENT_SHADER)
+        self.program['texture0'].value = OVERLAY_TEXTURE_UNIT
+        self.vbo = ctx.buffer(reserve=4 * 4 * 4)
+        self.vao = ctx.vertex_array(self.program, [(self.vbo, '2f 2f', 'in_pos', 'in_uv')])
+        self.texture = None
+        self.lines = None
+
+    def set_lines(self, lines):
+        """Re-rasterise the overlay if the text changed."""
+        if lines == self.lines:
+            return
+        self.lines = list(lines)
+        if self.texture is not None:
+            self.texture.release()
+            self.texture = None
+        if not lines:
+            return
+
+        line_height = self.font.get_linesize()
+        width = max(self.font.size(line)[0] for line in lines) + 2 * self.margin
+        height = line_height * len(lines) + 2 * self.margin
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        for row, line in enumerate(lines):
+            surface.blit(self.font.render(line, True, (255, 255, 255)), (self.margin, self.margin + row * line_height))
+        self.texture = self.ctx.texture((width, height), 4, pygame.image.tostring(surface, 'RGBA', True))
+        self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+    def render(self, viewport_size):
+        if self.texture is None:
+            return
+        # Pixel rectangle at the top-left corner, converted to normalized device coordinates
+        viewport_width, viewport_height = viewport_size
+        width, height = self.texture.size
+        left, top = -1.0, 1.0
+        right = left + 2.0 * width / viewport_width
+        bottom = top - 2.0 * height / viewport_height
+        self.vbo.write(np.array([
+            left, bottom, 0.0, 0.0,
+            right, bottom, 1.0, 0.0,
+            left, top, 0.0, 1.0,
+            right, top, 1.0, 1.0,
+        ], dtype='f4').tobytes())
+
+        self.ctx.disable(moderngl.DEPTH_TEST)
+        self.ctx.enable(moderngl.BLEND)
+        self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+        self.texture.use(OVERLAY_TEXTURE_UNIT)
+        self.vao.render(moderngl.TRIANGLE_STRIP)
+        self.ctx.disable(moderngl.BLEND)
+        self.ctx.enable(moderngl.DEPTH_TEST)
+
+    def release(self):
+        if self.texture is not None:
+            self.texture.release()
+            self.texture = None
+        self.vao.release()
+        self.vbo.release()
+        self.resources.release_program(OVERLAY_VERTEX_SHADER, OVERLAY_FRAGMENT_SHADER)
@@ -1,32 +1,38 @@
 import numpy as np
-from PIL import Image
-import moderngl
 
 
 class Platform:
-    def __init__(self, ctx, texture_path, side_texture_path=None, width=8.0, length=8.0, height=1.0,
-                 tile_factor=(8.0, 8.0)):
+    def __init__(self, resources, texture_path, side_texture_path=None, width=8.0, length=8.0, height=1.0,
+                 tile_factor=(8.0, 8.0), position=(0.0, 0.0, 0.0), dynamic=False):
+        self.resources = resources
+        self.position = np.array(position, dtype='f4')
         self.width = width
         self.length = length
         self.height = height
-        self.tile_factor = tile_factor
+        self.tile_factor = tuple(tile_factor)
+        self.texture_path = texture_path
+        self.side_texture_path = side_texture_path or texture_path
 
         self.min_bound = np.array([-self.width / 2, 0, -self.length / 2], dtype='f4')
         self.max_bound = np.array([self.width / 2, self.height, self.length / 2], dtype='f4')
 
-        # Load the main texture and side texture
-        self.texture = self.load_texture(ctx, texture_path)
-        self.side_texture = self.load_texture(ctx, side_texture_path) if side_texture_path else self.texture
-        self.vbo, self.ibo, self.vao = self.create_buffers(ctx)
+        self.collision_id = None  # Slot in the engine's CollisionWorld
+        self.dynamic = dynamic  # Static platforms are baked into the renderer's merged level meshes
 
-    def load_texture(self, ctx, filepath):
-        img = Image.open(filepath).transpose(Image.FLIP_TOP_BOTTOM).convert("RGB")
-        texture = ctx.texture(img.size, 3, img.tobytes())
-        texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
-        texture.use(0)
-        return texture
+        # Textures are packed into the renderer's MaterialLibrary; the mesh is shared with every
+        # platform of the same size. Without a resource manager the platform is collision-only.
+        self.vbo = self.ibo = None
+        if resources is not None:
+            self.vbo, self.ibo = self.create_buffers()
 
-    def create_buffers(self, ctx):
+    def mesh_key(self):
+        """Key identifying this platform's geometry; platforms with equal keys share buffers."""
+        return self.width, self.length, self.height, self.tile_factor
+
+    def create_buffers(self):
+        return self.resources.acquire_mesh(self.mesh_key(), self.build_geometry)
+
+    def build_geometry(self):
         vertices = np.array([
             # Bottom face (Y = 0)
             -self.width / 2, 0, -self.length / 2, 0, -1, 0, 0, 0,
@@ -92,38 +98,56 @@ class Platform:
             20, 22, 23,
         ], dtype='i4')
 
-        vbo = ctx.buffer(vertices.tobytes())
-        ibo = ctx.buffer(indices.tobytes())
-        program = ctx.program(
-            vertex_shader=open('shaders/vertex_shader.glsl').read(),
-            fragment_shader=open('shaders/fragment_shader.glsl').read()
-        )
-        vao = ctx.vertex_array(program, [(vbo, '3f 3f 2f', 'in_vert', 'in_normal', 'in_uv')], ibo)
-        return vbo, ibo, vao
+        return vertices, indices
+
+    def material_key(self):
+        """Key identifying the textures this platform is drawn with."""
+        return self.texture_path, self.side_texture_path
+
+    def model_matrix(self, out=None):
+        """Write the platform's model matrix (column-major, like the view matrix) into ``out``."""
+        if out is None:
+            out = np.empty(16, dtype='f4')
+        out[:] = (1.0, 0.0, 0.0, 0.0,
+                  0.0, 1.0, 0.0, 0.0,
+                  0.0, 0.0, 1.0, 0.0,
+                  self.position[0], self.position[1], self.position[2], 1.0)
+        return out
+
+    def release(self):
+        """Drop this platform's references to its shared GPU resources."""
+        if self.resources is None:
+            return
+        self.resources.release_mesh(self.mesh_key())
+
+    def world_bounds(self):
+        """Return the platform's (min, max) corners in world space."""
+        return self.position + self.min_bound, self.position + self.max_bound
 
     def check_collision(self, player):
+        min_bound, max_bound = self.world_bounds()
         player_min = player.position - np.array([player.width / 2, player.height / 2, player.length / 2])
         player_max = player.position + np.array([player.width / 2, player.height / 2, player.length / 2])
 
         tolerance = 0.01
 
         collision = (
-                player_min[0] < self.max_bound[0] + tolerance and player_max[0] > self.min_bound[0] - tolerance and
-                player_min[1] < self.max_bound[1] + tolerance and player_max[1] > self.min_bound[1] - tolerance and
-                player_min[2] < self.max_bound[2] + tolerance and player_max[2] > self.min_bound[2] - tolerance
+                player_min[0] < max_bound[0] + tolerance and player_max[0] > min_bound[0] - tolerance and
+                player_min[1] < max_bound[1] + tolerance and player_max[1] > min_bound[1] - tolerance and
+                player_min[2] < max_bound[2] + tolerance and player_max[2] > min_bound[2] - tolerance
         )
 
         if not collision:
             return False
 
         # Collision resolution
-        overlap_x = min(player_max[0] - self.min_bound[0], self.max_bound[0] - player_min[0])
-        overlap_y = min(player_max[1] - self.min_bound[1], self.max_bound[1] - player_min[1])
-        overlap_z = min(player_max[2] - self.min_bound[2], self.max_bound[2] - player_min[2])
+        overlap_x = min(player_max[0] - min_bound[0], max_bound[0] - player_min[0])
+        overlap_y = min(player_max[1] - min_bound[1], max_bound[1] - player_min[1])
+        overlap_z = min(player_max[2] - min_bound[2], max_bound[2] - player_min[2])
 
         # Resolve the collision along the Y-axis first
         if overlap_y < overlap_x and overlap_y < overlap_z:
-            if player.position[1] < self.min_bound[1]:  # Player is below the platform
+            if player.position[1] < min_bound[1]:  # Player is below the platform
                 player.position[1] -= overlap_y  # Move the player down
             else:  # Player is above the platform
                 player.position[1] += overlap_y  # Move the player up to prevent sticking
@@ -131,38 +155,23 @@ class Platform:
         else:
             # Handle X and Z axis collisions but do not set grounded state
             if overlap_x < overlap_z:
-                if player.position[0] < self.min_bound[0]:  # Player is on the left side
+                if player.position[0] < min_bound[0]:  # Player is on the left side
                     player.position[0] -= overlap_x  # Move the player to the left
-                elif player.position[0] > self.max_bound[0]:  # Player is on the right side
+                elif player.position[0] > max_bound[0]:  # Player is on the right side
                     player.position[0] += overlap_x  # Move the player to the right
             else:  # Resolve along the Z axis (depth)
-                if player.position[2] < self.min_bound[2]:  # Player is behind
+                if player.position[2] < min_bound[2]:  # Player is behind
                     player.position[2] -= overlap_z  # Move the player back
-                elif player.position[2] > self.max_bound[2]:  # Player is in front
+                elif player.position[2] > max_bound[2]:  # Player is in front
                     player.position[2] += overlap_z  # Move the player forward
 
         # Check if the player is on the sides (X or Z) and set grounded state accordingly
-        if (player.position[0] < self.min_bound[0] + tolerance or
-                player.position[0] > self.max_bound[0] - tolerance or
-                player.position[2] < self.min_bound[2] + tolerance or
-                player.position[2] > self.max_bound[2] - tolerance):
+        if (player.position[0] < min_bound[0] + tolerance or
+                player.position[0] > max_bound[0] - tolerance or
+                player.position[2] < min_bound[2] + tolerance or
+                player.position[2] > max_bound[2] - tolerance):
             player.grounded = False  # Player cannot jump if on the sides
-        elif player.position[1] < self.max_bound[1] and player.position[1] > self.min_bound[1]:
+        elif player.position[1] < max_bound[1] and player.position[1] > min_bound[1]:
             player.grounded = True  # Only set grounded if within the Y bounds of the platform
 
         return True
-
-    def render(self, program, model_matrix, light_pos):
-        program['model'].write(model_matrix.tobytes())
-        program['lightPos'].value = tuple(light_pos)
-
-        # Bind the main texture for the top and bottom faces
-        self.texture.use(0)
-        self.vao.render(moderngl.TRIANGLES)
-
-        # Bind the side texture for all side faces
-        self.side_texture.use(1)
-
-        # Render the side faces separately
-        program['in_uv'].value = (0, 0)  # Reset texture coordinates if needed
-        self.vao.render(moderngl.TRIANGLES)
@@ -1,27 +1,60 @@
 import numpy as np
-from math import sin, cos, radians, pi
+from math import sin, cos, radians, pi, sqrt
+
+# Movement tuning, shared with EntityBatch so bots and server players move exactly like the local player
+SPEED = 36.0  # Increased movement speed
+JUMP_FORCE = 5.0  # Higher jump force for more vertical mobility
+GRAVITY = -12.0  # Increased gravity for faster falling
+FRICTION = 0.3  # Lower friction for more slide
+ACCELERATION = 48.0  # Increased acceleration for quicker movement responsiveness
+MOUSE_SENSITIVITY = 0.1
+PITCH_LIMIT = 89.0  # Degrees either side of level
+BODY_SIZE = (0.6, 1.2, 0.6)  # Width, height and length used for collision detection
 
 class Player:
+    """First-person player with camera, movement and collision attributes.
+
+    Per-frame updates allocate no arrays: vector state lives in persistent
+    float32 arrays that are read and written through memoryviews, so the
+    3-component math runs on plain Python floats. ``position`` and
+    ``velocity`` can be reassigned, but the assignment copies into the
+    existing buffers.
+    """
+    __slots__ = (
+        '_position', '_velocity', 'previous_position', 'render_position', 'up_vector', 'rotation',
+        'yaw', 'pitch', 'front', 'right', 'up', 'view_matrix',
+        'speed', 'jump_force', 'grounded', 'gravity', 'friction', 'acceleration',
+        'width', 'height', 'length',
+        'bob_amplitude', 'bob_frequency', 'bob_time', 'bob_velocity', 'bob_sway', 'bob_sway_speed',
+        'bob_sway_amplitude', 'movement_keys_held', 'bob_damping',
+        'smoothing_factor', 'smoothed_position', 'smoothed_yaw', 'smoothed_pitch',
+        '_pos', '_prev', '_render', '_vel', '_front', '_right', '_up', '_world_up', '_smoothed', '_view',
+    )
+
     def __init__(self, position, up_vector):
-        self.position = np.array(position, dtype='f4')
+        self._position = np.array(position, dtype='f4')
+        self.previous_position = np.array(position, dtype='f4')  # Position at the previous physics tick
+        self.render_position = np.array(position, dtype='f4')  # Scratch buffer for interpolation
         self.up_vector = np.array(up_vector, dtype='f4')
+        self.rotation = np.zeros(3, dtype='f4')
         self.yaw = -90.0  # Looking straight forward
         self.pitch = 0.0  # Level pitch
         self.front = np.array([0.0, 0.0, -1.0], dtype='f4')  # Initial forward direction
+        self.right = np.zeros(3, dtype='f4')
+        self.up = np.zeros(3, dtype='f4')
+        self.view_matrix = np.zeros(16, dtype='f4')  # Rewritten in place every frame
 
         # Player movement attributes
-        self.speed = 36.0  # Increased movement speed
-        self.jump_force = 5.0  # Higher jump force for more vertical mobility
+        self.speed = SPEED
+        self.jump_force = JUMP_FORCE
         self.grounded = False
-        self.gravity = -12.0 # Increased gravity for faster falling
-        self.velocity = np.array([0.0, 0.0, 0.0], dtype='f4')
-        self.friction = 0.3  # Lower friction for more slide
-        self.acceleration = 48.0  # Increased acceleration for quicker movement responsiveness
+        self.gravity = GRAVITY
+        self._velocity = np.array([0.0, 0.0, 0.0], dtype='f4')
+        self.friction = FRICTION
+        self.acceleration = ACCELERATION
 
         # Player size attributes
-        self.width = 0.6  # Width of the player for collision detection
-        self.height = 1.2  # Height of the player for collision detection
-        self.length = 0.6  # Length of the player for collision detection
+        self.width, self.height, self.length = BODY_SIZE  # Collision box
 
         # Camera bobbing attributes
         self.bob_amplitude = 0.025  # Reduced amplitude of bobbing effect
@@ -40,41 +73,110 @@ class Player:
         self.smoothed_yaw = self.yaw  # Smoothed yaw
         self.smoothed_pitch = self.pitch  # Smoothed pitch
 
+        # Scalar views: indexing a float32 memoryview yields a Python float, not a numpy scalar
+        self._pos = memoryview(self._position)
+        self._prev = memoryview(self.previous_position)
+        self._render = memoryview(self.render_position)
+        self._vel = memoryview(self._velocity)
+        self._front = memoryview(self.front)
+        self._right = memoryview(self.right)
+        self._up = memoryview(self.up)
+        self._world_up = memoryview(self.up_vector)
+        self._smoothed = memoryview(self.smoothed_position)
+        self._view = memoryview(self.view_matrix)
+
         self.update_camera_vectors()
 
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position[:] = value
+
+    @property
+    def velocity(self):
+        return self._velocity
+
+    @velocity.setter
+    def velocity(self, value):
+        self._velocity[:] = value
+
     def update_camera_vectors(self):
         """Update the camera front, right, and up vectors based on yaw and pitch."""
-        front = np.array([
-            cos(radians(self.yaw)) * cos(radians(self.pitch)),
-            sin(radians(self.pitch)),
-            sin(radians(self.yaw)) * cos(radians(self.pitch))
-        ], dtype='f4')
-        self.front = front / np.linalg.norm(front)
-        self.right = np.cross(self.front, self.up_vector)
-        self.right /= np.linalg.norm(self.right)
-        self.up = np.cross(self.right, self.front)
-        self.up /= np.linalg.norm(self.up)
-
-    def create_view_matrix(self):
-        """Create a view matrix for the camera based on current position and orientation."""
-        bobbing_height, bob_sway = self.calculate_bobbing()
-        target_camera_position = self.position + np.array([bob_sway, bobbing_height, 0.0])
-
-        # Smooth the camera position
-        self.smoothed_position += (target_camera_position - self.smoothed_position) * self.smoothing_factor
-
-        return np.array([
-            self.right[0], self.up[0], -self.front[0], 0.0,
-            self.right[1], self.up[1], -self.front[1], 0.0,
-            self.right[2], self.up[2], -self.front[2], 0.0,
-            -np.dot(self.right, self.smoothed_position), -np.dot(self.up, self.smoothed_position), np.dot(self.front, self.smoothed_position),
-            1.0
-        ], dtype='f4')
-
-    def calculate_bobbing(self):
+        yaw, pitch = radians(self.yaw), radians(self.pitch)
+        fx = cos(yaw) * cos(pitch)
+        fy = sin(pitch)
+        fz = sin(yaw) * cos(pitch)
+        length = sqrt(fx * fx + fy * fy + fz * fz)
+        fx, fy, fz = fx / length, fy / length, fz / length
+
+        # right = normalize(front x world_up)
+        world_up = self._world_up
+        ux, uy, uz = world_up[0], world_up[1], world_up[2]
+        rx, ry, rz = fy * uz - fz * uy, fz * ux - fx * uz, fx * uy - fy * ux
+        length = sqrt(rx * rx + ry * ry + rz * rz)
+        rx, ry, rz = rx / length, ry / length, rz / length
+
+        # up = normalize(right x front)
+        ux, uy, uz = ry * fz - rz * fy, rz * fx - rx * fz, rx * fy - ry * fx
+        length = sqrt(ux * ux + uy * uy + uz * uz)
+
+        front, right, up = self._front, self._right, self._up
+        front[0], front[1], front[2] = fx, fy, fz
+        right[0], right[1], right[2] = rx, ry, rz
+        up[0], up[1], up[2] = ux / length, uy / length, uz / length
+
+    def interpolated_position(self, alpha):
+        """Blend the last two physics positions; ``alpha`` is the fraction of a tick since the last one.
+
+        The result is written into ``render_position``, which is returned.
+        """
+        pos, prev, out = self._pos, self._prev, self._render
+        out[0] = prev[0] + (pos[0] - prev[0]) * alpha
+        out[1] = prev[1] + (pos[1] - prev[1]) * alpha
+        out[2] = prev[2] + (pos[2] - prev[2]) * alpha
+        return self.render_position
+
+    def create_view_matrix(self, delta_time=0.016, position=None):
+        """Create a view matrix for the camera based on current position and orientation.
+
+        ``position`` overrides the camera position, e.g. with an interpolated one.
+        The matrix is written into ``view_matrix``, which is returned.
+        """
+        if position is None:
+            position = self._pos
+        elif position is self.render_position:
+            position = self._render
+        bobbing_height, bob_sway = self.calculate_bobbing(delta_time)
+
+        # Smooth the camera position towards the bobbing target
+        smoothed, k = self._smoothed, self.smoothing_factor
+        sx = smoothed[0] + (position[0] + bob_sway - smoothed[0]) * k
+        sy = smoothed[1] + (position[1] + bobbing_height - smoothed[1]) * k
+        sz = smoothed[2] + (position[2] - smoothed[2]) * k
+        smoothed[0], smoothed[1], smoothed[2] = sx, sy, sz
+        sx, sy, sz = smoothed[0], smoothed[1], smoothed[2]
+
+        front, right, up, view = self._front, self._right, self._up, self._view
+        fx, fy, fz = front[0], front[1], front[2]
+        rx, ry, rz = right[0], right[1], right[2]
+        ux, uy, uz = up[0], up[1], up[2]
+        view[0], view[1], view[2], view[3] = rx, ux, -fx, 0.0
+        view[4], view[5], view[6], view[7] = ry, uy, -fy, 0.0
+        view[8], view[9], view[10], view[11] = rz, uz, -fz, 0.0
+        view[12] = -(rx * sx + ry * sy + rz * sz)
+        view[13] = -(ux * sx + uy * sy + uz * sz)
+        view[14] = fx * sx + fy * sy + fz * sz
+        view[15] = 1.0
+        return self.view_matrix
+
+    def calculate_bobbing(self, delta_time):
         """Calculate the camera bobbing effect based on movement."""
-        if self.grounded and self.movement_keys_held and np.linalg.norm(self.velocity[:2]) > 0:
-            self.bob_time += 0.016  # Increment time (approx 60 FPS)
+        velocity = self._vel
+        if self.grounded and self.movement_keys_held and (velocity[0] != 0.0 or velocity[1] != 0.0):
+            self.bob_time += delta_time  # Advance by the frame time
 
             # Calculate bobbing effect
             bobbing_height = self.bob_amplitude * sin(self.bob_time * self.bob_frequency * 2 * pi)
@@ -90,11 +192,11 @@ class Player:
 
             return bobbing_height, self.bob_sway
 
-    def process_mouse_movement(self, x_offset, y_offset, sensitivity=0.1):
+    def process_mouse_movement(self, x_offset, y_offset, sensitivity=MOUSE_SENSITIVITY):
         """Process mouse movement to update camera orientation."""
         self.yaw += x_offset * sensitivity
         self.pitch -= y_offset * sensitivity
-        self.pitch = np.clip(self.pitch, -89.0, 89.0)  # Limit pitch
+        self.pitch = min(max(self.pitch, -PITCH_LIMIT), PITCH_LIMIT)
 
         # Smooth the yaw and pitch
         self.smoothed_yaw += (self.yaw - self.smoothed_yaw) * self.smoothing_factor
@@ -105,19 +207,22 @@ class Player:
     def jump(self):
         """Make the player jump if grounded."""
         if self.grounded:
-            self.velocity[1] = self.jump_force
+            self._vel[1] = self.jump_force
             self.grounded = False  # Set to false after jumping
 
     def apply_gravity(self, delta_time):
         """Apply gravity to the player's vertical velocity."""
+        velocity = self._vel
         if not self.grounded:
-            self.velocity[1] += self.gravity * delta_time
-        self.position[1] += self.velocity[1] * delta_time
+            velocity[1] += self.gravity * delta_time
+        self._pos[1] += velocity[1] * delta_time
 
     def update_velocity(self, forward_input, right_input, delta_time):
         """Update horizontal movement based on player input."""
-        horizontal_front = np.array([self.front[0], 0.0, self.front[2]], dtype='f4')
-        horizontal_front /= np.linalg.norm(horizontal_front)
+        front, right, velocity, position = self._front, self._right, self._vel, self._pos
+        front_x, front_z = front[0], front[2]
+        length = sqrt(front_x * front_x + front_z * front_z)
+        front_x, front_z = front_x / length, front_z / length
 
         forward_acceleration = self.acceleration * forward_input
         right_acceleration = self.acceleration * right_input
@@ -125,84 +230,70 @@ class Player:
         # Determine if movement keys are held
         self.movement_keys_held = forward_input != 0 or right_input != 0
 
-        self.velocity[0] += right_acceleration * self.right[0] * delta_time
-        self.velocity[2] += right_acceleration * self.right[2] * delta_time
-        self.velocity[0] += forward_acceleration * horizontal_front[0] * delta_time
-        self.velocity[2] += forward_acceleration * horizontal_front[2] * delta_time
+        velocity_x = velocity[0] + (right_acceleration * right[0] + forward_acceleration * front_x) * delta_time
+        velocity_z = velocity[2] + (right_acceleration * right[2] + forward_acceleration * front_z) * delta_time
 
         # Apply friction
-        self.velocity[0] *= (1.0 - self.friction)
-        self.velocity[2] *= (1.0 - self.friction)
+        velocity[0] = velocity_x * (1.0 - self.friction)
+        velocity[2] = velocity_z * (1.0 - self.friction)
 
         # Update position based on horizontal velocity
-        self.position[0] += self.velocity[0] * delta_time
-        self.position[2] += self.velocity[2] * delta_time
+        position[0] += velocity[0] * delta_time
+        position[2] += velocity[2] * delta_time
+
+    def bounds(self):
+        """Return the feet-anchored bounding box as (min_x, min_y, min_z, max_x, max_y, max_z)."""
+        x, y, z = self._pos[0], self._pos[1], self._pos[2]
+        return (x - self.width / 2, y, z - self.length / 2,
+                x + self.width / 2, y + self.height, z + self.length / 2)
 
     def check_collision(self, min_bound, max_bound):
         """Check for collision with the specified bounding box."""
-        player_min = np.array([
-            self.position[0] - self.width / 2,
-            self.position[1],
-            self.position[2] - self.length / 2
-        ])
-        player_max = np.array([
-            self.position[0] + self.width / 2,
-            self.position[1] + self.height,
-            self.position[2] + self.length / 2
-        ])
-
-        return (player_min[0] < max_bound[0] and player_max[0] > min_bound[0] and
-                player_min[1] < max_bound[1] and player_max[1] > min_bound[1] and
-                player_min[2] < max_bound[2] and player_max[2] > min_bound[2])
+        min_x, min_y, min_z, max_x, max_y, max_z = self.bounds()
+        return (min_x < max_bound[0] and max_x > min_bound[0] and
+                min_y < max_bound[1] and max_y > min_bound[1] and
+                min_z < max_bound[2] and max_z > min_bound[2])
 
     def resolve_collision(self, min_bound, max_bound):
         """Resolve collision with the specified bounding box."""
-        player_min = np.array([
-            self.position[0] - self.width / 2,
-            self.position[1],
-            self.position[2] - self.length / 2
-        ])
-        player_max = np.array([
-            self.position[0] + self.width / 2,
-            self.position[1] + self.height,
-            self.position[2] + self.length / 2
-        ])
-
-        overlap_x = min(max_bound[0] - player_min[0], player_max[0] - min_bound[0])
-        overlap_y = min(max_bound[1] - player_min[1], player_max[1] - min_bound[1])
-        overlap_z = min(max_bound[2] - player_min[2], player_max[2] - min_bound[2])
+        min_x, min_y, min_z, max_x, max_y, max_z = self.bounds()
+        position, velocity = self._pos, self._vel
+
+        overlap_x = min(max_bound[0] - min_x, max_x - min_bound[0])
+        overlap_y = min(max_bound[1] - min_y, max_y - min_bound[1])
+        overlap_z = min(max_bound[2] - min_z, max_z - min_bound[2])
 
         # Resolve collision based on the smallest overlap
         if overlap_x < overlap_y and overlap_x < overlap_z:
             # Colliding with sides
-            if self.position[0] < (min_bound[0] + max_bound[0]) / 2:
-                self.position[0] -= overlap_x  # Move left
+            if position[0] < (min_bound[0] + max_bound[0]) / 2:
+                position[0] -= overlap_x  # Move left
             else:
-                self.position[0] += overlap_x  # Move right
-            self.velocity[0] = 0  # Reset horizontal velocity
+                position[0] += overlap_x  # Move right
+            velocity[0] = 0  # Reset horizontal velocity
             self.grounded = False  # Not grounded when colliding with sides
 
         elif overlap_y < overlap_x and overlap_y < overlap_z:
             # Colliding with the top or bottom
-            if self.position[1] < (min_bound[1] + max_bound[1]) / 2:
-                self.position[1] -= overlap_y  # Move down (land on top)
+            if position[1] < (min_bound[1] + max_bound[1]) / 2:
+                position[1] -= overlap_y  # Move down (land on top)
                 self.grounded = True  # Set grounded when landing
             else:
-                self.position[1] += overlap_y  # Move up
-            self.velocity[1] = 0  # Reset vertical velocity
+                position[1] += overlap_y  # Move up
+            velocity[1] = 0  # Reset vertical velocity
 
         else:
             # Colliding with the front or back
-            if self.position[2] < (min_bound[2] + max_bound[2]) / 2:
-                self.position[2] -= overlap_z  # Move backward
+            if position[2] < (min_bound[2] + max_bound[2]) / 2:
+                position[2] -= overlap_z  # Move backward
             else:
-                self.position[2] += overlap_z  # Move forward
-            self.velocity[2] = 0  # Reset depth velocity
+                position[2] += overlap_z  # Move forward
+            velocity[2] = 0  # Reset depth velocity
             self.grounded = False  # Not grounded when colliding with front or back
 
         # Check if the player is grounded based on Y position
-        if player_min[1] <= min_bound[1]:  # Player is on the ground
-            self.position[1] = min_bound[1] + self.height / 2  # Reset to ground level
+        if min_y <= min_bound[1]:  # Player is on the ground
+            position[1] = min_bound[1] + self.height / 2  # Reset to ground level
             self.grounded = True  # Player is grounded on the ground
 
     def update_physics(self, delta_time, forward_input, right_input, min_bound, max_bound):
@@ -214,6 +305,6 @@ class Player:
             self.resolve_collision(min_bound, max_bound)
 
         # Check if the player is on the ground
-        if self.position[1] <= min_bound[1] + self.height / 2:
-            self.position[1] = min_bound[1] + self.height / 2  # Reset to ground level
+        if self._pos[1] <= min_bound[1] + self.height / 2:
+            self._pos[1] = min_bound[1] + self.height / 2  # Reset to ground level
             self.grounded = True  # Player is grounded on the ground
@@ -0,0 +1,223 @@
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+NULL_SCOPE = nullcontext()  # Shared by every disabled scope, so disabled profiling allocates nothing
+GPU_SCOPES_PER_FRAME = 4
+
+
+class FrameRecord:
+    """Timings and counters collected for one frame."""
+    __slots__ = ('index', 'start', 'duration', 'scopes', 'gpu', 'counters')
+
+    def __init__(self, index, start):
+        self.index = index
+        self.start = start
+        self.duration = 0.0
+        self.scopes = []  # (name, start, duration, depth) in seconds
+        self.gpu = {}  # name -> milliseconds, filled in a few frames later
+        self.counters = {}
+
+
+class CpuScope:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.current.scopes.append((self.name, self.start, end - self.start, profiler.depth))
+
+
+class GpuScope:
+    """Wraps a CPU scope with a GPU timer query whose result is collected later."""
+    __slots__ = ('profiler', 'name', 'cpu', 'query')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.cpu = CpuScope(profiler, name)
+        self.query = profiler.next_query()
+
+    def __enter__(self):
+        self.cpu.__enter__()
+        self.query.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.query.__exit__(*exc)
+        self.cpu.__exit__(*exc)
+        self.profiler.pending.append((self.profiler.current, self.name, self.query))
+
+
+class FrameProfiler:
+    """Per-phase CPU timers, GPU timer queries and counters over a ring buffer of frames.
+
+    When ``enabled`` is False every call returns immediately (scopes return a
+    shared no-op context manager), so the instrumentation can stay in place.
+    GPU queries are read back ``gpu_latency`` frames later to avoid stalling
+    the pipeline.
+    """
+    def __init__(self, ctx=None, enabled=False, history=300, gpu_latency=3):
+        self.ctx = ctx
+        self.enabled = enabled
+        self.frames = deque(maxlen=history)
+        self.current = None
+        self.depth = 0
+        self.frame_index = 0
+        self.gpu_latency = gpu_latency
+        self.queries = []
+        self.query_index = 0
+        self.pending = deque()  # (frame, name, query) awaiting results
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current = FrameRecord(self.frame_index, time.perf_counter())
+        self.frame_index += 1
+        self.query_index = 0
+
+    def end_frame(self):
+        if not self.enabled or self.current is None:
+            return
+        frame = self.current
+        frame.duration = time.perf_counter() - frame.start
+        self.frames.append(frame)
+        self.collect_gpu(frame.index - self.gpu_latency)
+
+    def scope(self, name):
+        """Time a block of CPU work: ``with profiler.scope('physics'): ...``."""
+        if not self.enabled or self.current is None:
+            return NULL_SCOPE
+        return CpuScope(self, name)
+
+    def gpu_scope(self, name):
+        """Time a block on both the CPU and the GPU (timer query)."""
+        if not self.enabled or self.current is None:
+            return NULL_SCOPE
+        if self.ctx is None:
+            return CpuScope(self, name)
+        return GpuScope(self, name)
+
+    def count(self, name, amount=1):
+        """Add to a per-frame counter such as draw calls or bytes uploaded."""
+        if not self.enabled or self.current is None:
+            return
+        counters = self.current.counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def next_query(self):
+        # Queries are recycled once their frame is old enough to have been collected
+        ring = (self.gpu_latency + 1) * GPU_SCOPES_PER_FRAME
+        while len(self.queries) < ring:
+            self.queries.append(self.ctx.query(time=True))
+        query = self.queries[(self.current.index * GPU_SCOPES_PER_FRAME + self.query_index) % ring]
+        self.query_index = (self.query_index + 1) % GPU_SCOPES_PER_FRAME
+        return query
+
+    def collect_gpu(self, up_to_frame):
+        while self.pending and self.pending[0][0].index <= up_to_frame:
+            frame, name, query = self.pending.popleft()
+            elapsed = query.elapsed
+            if elapsed < 2 ** 32 - 1:  # Drivers report this when the query failed
+                frame.gpu[name] = frame.gpu.get(name, 0.0) + elapsed / 1e6
+
+    def summary(self):
+        """Mean milliseconds per scope and mean counters over the recorded frames."""
+        frames = list(self.frames)
+        if not frames:
+            return {}
+        cpu, gpu, counters = {}, {}, {}
+        for frame in frames:
+            for name, _, duration, _ in frame.scopes:
+                cpu[name] = cpu.get(name, 0.0) + duration * 1e3
+            for name, value in frame.gpu.items():
+                gpu[name] = gpu.get(name, 0.0) + value
+            for name, value in frame.counters.items():
+                counters[name] = counters.get(name, 0) + value
+        n = len(frames)
+        return {
+            'frames': n,
+            'frame_ms': sum(frame.duration for frame in frames) * 1e3 / n,
+            'cpu_ms': {name: total / n for name, total in cpu.items()},
+            'gpu_ms': {name: total / n for name, total in gpu.items()},
+            'counters': {name: total / n for name, total in counters.items()},
+        }
+
+    def chrome_trace(self):
+        """Return the recorded frames as a Chrome trace (chrome://tracing, Perfetto)."""
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': 0, 'args': {'name': 'CPU'}},
+                  {'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': 1, 'args': {'name': 'GPU'}}]
+        for frame in self.frames:
+            events.append({'name': f'frame {frame.index}', 'ph': 'X', 'pid': 0, 'tid': 0,
+                           'ts': frame.start * 1e6, 'dur': frame.duration * 1e6, 'args': frame.counters})
+            for name, start, duration, _ in frame.scopes:
+                events.append({'name': name, 'ph': 'X', 'pid': 0, 'tid': 0, 'ts': start * 1e6, 'dur': duration * 1e6})
+            gpu_start = frame.start * 1e6
+            for name, milliseconds in frame.gpu.items():
+                # GPU timestamps are not comparable with CPU ones; lay them out from the frame start
+                events.append({'name': name, 'ph': 'X', 'pid': 0, 'tid': 1, 'ts': gpu_start, 'dur': milliseconds * 1e3})
+                gpu_start += milliseconds * 1e3
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def overlay_text(self):
+        summary = self.summary()
+        if not summary:
+            return []
+        lines = [f"frame {summary['frame_ms']:.2f} ms ({1000.0 / max(summary['frame_ms'], 1e-6):.0f} fps)"]
+        lines += [f"{name:<15} {ms:6.2f} ms" for name, ms in summary['cpu_ms'].items()]
+        lines += [f"gpu {name:<11} {ms:6.2f} ms" for name, ms in summary['gpu_ms'].items()]
+        lines += [f"{name:<15} {value:8.0f}" for name, value in summary['counters'].items()]
+        return lines
+
+
+class StartupProfile:
+    """Wall-clock phases of engine startup, from its imports to the first finished frame.
+
+    Each ``mark`` closes the phase running since the previous mark. The
+    profile is written once and read after startup, so it is always on.
+    """
+    def __init__(self, imports=0.0):
+        self.phases = [('imports', imports)]  # (name, seconds) in order
+        self.last = time.perf_counter()
+        self.first_frame_done = False
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def summary(self):
+        """Seconds per phase, plus ``total`` up to the first frame."""
+        summary = dict(self.phases)
+        total = 0.0
+        for name, seconds in self.phases:
+            total += seconds
+            if name == 'first_frame':
+                break
+        summary['total'] = total
+        return summary
+
+    def report(self):
+        summary = self.summary()
+        total = max(summary['total'], 1e-9)
+        lines = [f"{name:<12} {seconds * 1e3:8.1f} ms {seconds / total:6.1%}" for name, seconds in self.phases]
+        lines.append(f"{'total':<12} {summary['total'] * 1e3:8.1f} ms to the first frame")
+        return '\n'.join(lines)
+
+
+NULL_PROFILER = FrameProfiler(enabled=False)  # Default for code paths created without a profiler
@@ -0,0 +1,75 @@
+import numpy as np
+
+from profiler import NULL_PROFILER
+
+CAMERA_BLOCK = 'Camera'
+CAMERA_BINDING = 0
+# std140 layout of the Camera block: view and projection (column-major mat4), lightPos padded to a vec4
+VIEW, PROJECTION, LIGHT = slice(0, 16), slice(16, 32), slice(32, 35)
+CAMERA_FLOATS = 36
+
+
+class RenderState:
+    """GPU state shared by the scene passes, uploaded or bound only when it changes.
+
+    Camera and light uniforms live in one uniform buffer that every scene
+    program reads through its ``Camera`` block, so a frame writes them once
+    (and not at all while the camera is still) instead of once per program.
+    The projection is only rewritten by ``set_projection``, on startup or
+    resize. Texture bindings are remembered per unit so rebinding the
+    texture already in place is skipped.
+    """
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.camera = np.zeros(CAMERA_FLOATS, dtype='f4')  # CPU mirror of the uniform buffer
+        self.camera_buffer = ctx.buffer(reserve=CAMERA_FLOATS * 4, dynamic=True)
+        self.camera_buffer.bind_to_uniform_block(CAMERA_BINDING)
+        self.dirty = (0, CAMERA_FLOATS)  # Float range of the mirror not yet uploaded, or None
+        self.textures = {}  # Texture unit -> texture bound there
+
+    def attach(self, program):
+        """Point a program's ``Camera`` block at the shared buffer."""
+        program[CAMERA_BLOCK].binding = CAMERA_BINDING
+
+    def mark_dirty(self, start, stop):
+        if self.dirty is None:
+            self.dirty = (start, stop)
+        else:
+            self.dirty = (min(self.dirty[0], start), max(self.dirty[1], stop))
+
+    def set_projection(self, projection):
+        self.camera[PROJECTION] = np.ravel(projection)
+        self.mark_dirty(PROJECTION.start, PROJECTION.stop)
+
+    def set_camera(self, view_matrix, light_pos):
+        """Stage this frame's view matrix and light; unchanged values cost nothing."""
+        view_matrix = np.ravel(view_matrix)
+        if not np.array_equal(self.camera[VIEW], view_matrix):
+            self.camera[VIEW] = view_matrix
+            self.mark_dirty(VIEW.start, VIEW.stop)
+        if not np.array_equal(self.camera[LIGHT], light_pos):
+            self.camera[LIGHT] = light_pos
+            self.mark_dirty(LIGHT.start, LIGHT.stop)
+
+    def upload(self, profiler=NULL_PROFILER):
+        """Write the changed part of the camera block with a single buffer write."""
+        if self.dirty is None:
+            return
+        start, stop = self.dirty
+        self.dirty = None
+        data = self.camera[start:stop].tobytes()
+        self.camera_buffer.write(data, offset=start * 4)
+        profiler.count('uniform_uploads')
+        profiler.count('upload_bytes', len(data))
+
+    def bind_texture(self, texture, location=0, profiler=NULL_PROFILER):
+        if self.textures.get(location) is texture:
+            profiler.count('binds_skipped')
+            return
+        texture.use(location)
+        self.textures[location] = texture
+        profiler.count('texture_binds')
+
+    def release(self):
+        self.camera_buffer.release()
+        self.textures.clear()
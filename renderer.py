@@ -0,0 +1,306 @@
+import sys
+import numpy as np
+import moderngl
+
+from materials import MaterialLibrary
+from profiler import NULL_PROFILER
+from render_state import RenderState
+from static_geometry import StaticGeometry, STATIC_VERTEX_SHADER, STATIC_FRAGMENT_SHADER
+
+VERTEX_SHADER = 'shaders/vertex_shader.glsl'
+FRAGMENT_SHADER = 'shaders/fragment_shader.glsl'
+SHADER_FILES = (VERTEX_SHADER, FRAGMENT_SHADER, STATIC_VERTEX_SHADER, STATIC_FRAGMENT_SHADER)
+
+# Per instance: a column-major mat4 model matrix, then the top and side texture layer indices (materials.py)
+INSTANCE_FLOATS = 16 + 2
+INSTANCE_STRIDE = INSTANCE_FLOATS * 4
+INSTANCE_FORMAT = '16f 2f/i'
+INSTANCE_ATTRIBUTES = ('in_model', 'in_layers')
+# Per draw-indirect command: index count, instance count, first index, base vertex, base instance
+INDIRECT_STRIDE = 5 * 4
+MULTI_DRAW_INDIRECT_VERSION = 430  # glMultiDrawElementsIndirect; base instances need 4.2
+
+
+class InstanceGroup:
+    """All platforms sharing a mesh, drawn with a single instanced call."""
+    def __init__(self, ctx, program, vbo, ibo, capacity=64):
+        self.ctx = ctx
+        self.program = program
+        self.vbo = vbo
+        self.ibo = ibo
+        self.platforms = []
+        self.matrices = np.zeros((capacity, INSTANCE_FLOATS), dtype='f4')  # CPU mirror of the instance buffer
+        self.dirty = set()
+        self.instance_buffer = None
+        self.vao = None
+        # Culled frames draw runs of visible slots straight from the instance buffer, one indirect
+        # command per run. Contexts without multi-draw indirect copy the visible instances instead
+        self.indirect = ctx.version_code >= MULTI_DRAW_INDIRECT_VERSION
+        self.indirect_buffer = None
+        self.visible_buffer = None
+        self.visible_vao = None
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """(Re)create the instance buffer and VAO with room for ``capacity`` instances."""
+        if self.vao is not None:
+            self.release()
+        if capacity > len(self.matrices):
+            matrices = np.zeros((capacity, INSTANCE_FLOATS), dtype='f4')
+            matrices[:len(self.platforms)] = self.matrices[:len(self.platforms)]
+            self.matrices = matrices
+        self.instance_buffer = self.ctx.buffer(reserve=capacity * INSTANCE_STRIDE, dynamic=True)
+        self.instance_buffer.write(self.matrices[:len(self.platforms)].tobytes())
+        self.vao = self.ctx.vertex_array(self.program, [
+            (self.vbo, '3f 3f 2f', 'in_vert', 'in_normal', 'in_uv'),
+            (self.instance_buffer, INSTANCE_FORMAT, *INSTANCE_ATTRIBUTES),
+        ], self.ibo)
+        if self.indirect:
+            self.indirect_buffer = self.ctx.buffer(reserve=capacity * INDIRECT_STRIDE, dynamic=True)
+        else:
+            self.visible_buffer = self.ctx.buffer(reserve=capacity * INSTANCE_STRIDE, dynamic=True)
+            self.visible_vao = self.ctx.vertex_array(self.program, [
+                (self.vbo, '3f 3f 2f', 'in_vert', 'in_normal', 'in_uv'),
+                (self.visible_buffer, INSTANCE_FORMAT, *INSTANCE_ATTRIBUTES),
+            ], self.ibo)
+        self.dirty.clear()
+
+    def add(self, platform, layers):
+        slot = len(self.platforms)
+        if slot >= len(self.matrices):
+            self.allocate(len(self.matrices) * 2)
+        self.platforms.append(platform)
+        platform.model_matrix(self.matrices[slot, :16])
+        self.matrices[slot, 16:] = layers
+        self.dirty.add(slot)
+        return slot
+
+    def remove(self, slot):
+        """Remove the instance in ``slot``, moving the last instance into its place.
+
+        Returns the platform that now occupies ``slot`` (or None if it was the last one).
+        """
+        last = len(self.platforms) - 1
+        moved = None
+        if slot != last:
+            moved = self.platforms[last]
+            self.platforms[slot] = moved
+            self.matrices[slot] = self.matrices[last]
+            self.dirty.add(slot)
+        self.platforms.pop()
+        self.dirty.discard(last)
+        return moved
+
+    def update(self, slot):
+        self.platforms[slot].model_matrix(self.matrices[slot, :16])
+        self.dirty.add(slot)
+
+    def flush(self, profiler=NULL_PROFILER):
+        """Upload only the instance slots that changed since the last frame."""
+        if not self.dirty:
+            return
+        slots = sorted(self.dirty)
+        self.dirty.clear()
+        # Coalesce dirty slots into contiguous runs so each run is a single write
+        start = prev = slots[0]
+        for slot in slots[1:] + [None]:
+            if slot is not None and slot == prev + 1:
+                prev = slot
+                continue
+            self.instance_buffer.write(self.matrices[start:prev + 1].tobytes(), offset=start * INSTANCE_STRIDE)
+            profiler.count('buffer_uploads')
+            profiler.count('upload_bytes', (prev + 1 - start) * INSTANCE_STRIDE)
+            if slot is not None:
+                start = prev = slot
+
+    def set_program(self, program):
+        """Draw with a recompiled program; the buffers and VAOs are recreated from the CPU mirror."""
+        self.program = program
+        self.allocate(len(self.matrices))
+
+    def render(self, profiler=NULL_PROFILER):
+        if not self.platforms:
+            return
+        self.flush(profiler)
+        self.vao.render(moderngl.TRIANGLES, instances=len(self.platforms))
+        profiler.count('draw_calls')
+
+    def render_slots(self, slots, profiler=NULL_PROFILER):
+        """Draw only the given instance slots.
+
+        Changed slots are flushed as usual; the visible ones are then drawn from
+        the instance buffer by one multi-draw call whose indirect commands each
+        cover a run of consecutive slots, so only the commands are uploaded.
+        """
+        if not slots:
+            return
+        self.flush(profiler)
+        if not self.indirect:
+            self.visible_buffer.write(self.matrices[slots].tobytes())
+            self.visible_vao.render(moderngl.TRIANGLES, instances=len(slots))
+            profiler.count('buffer_uploads')
+            profiler.count('upload_bytes', len(slots) * INSTANCE_STRIDE)
+            profiler.count('draw_calls')
+            return
+        slots = np.sort(np.asarray(slots, dtype=np.uint32))
+        starts = np.flatnonzero(np.concatenate(([True], np.diff(slots) != 1)))
+        commands = np.zeros((len(starts), 5), dtype=np.uint32)
+        commands[:, 0] = self.vao.vertices
+        commands[:, 1] = np.diff(np.append(starts, len(slots)))
+        commands[:, 4] = slots[starts]
+        self.indirect_buffer.write(commands.tobytes())
+        self.vao.render_indirect(self.indirect_buffer, moderngl.TRIANGLES, count=len(commands))
+        profiler.count('buffer_uploads')
+        profiler.count('upload_bytes', commands.nbytes)
+        profiler.count('draw_calls')
+
+    def release(self):
+        for name in ('vao', 'instance_buffer', 'indirect_buffer', 'visible_vao', 'visible_buffer'):
+            resource = getattr(self, name)
+            if resource is not None:
+                resource.release()
+                setattr(self, name, None)
+
+
+class InstancedRenderer:
+    """Draws every platform with one instanced draw call per mesh and one set of texture bindings."""
+    def __init__(self, ctx, resources, loader=None, texture_cache=None):
+        self.ctx = ctx
+        self.resources = resources
+        self.program = resources.acquire_program(VERTEX_SHADER, FRAGMENT_SHADER)
+        self.materials = MaterialLibrary(ctx, loader, cache=texture_cache)
+        self.static = StaticGeometry(ctx, resources, self.materials)
+        self.state = RenderState(ctx)  # Camera uniforms and texture bindings shared by both passes
+        self.state.attach(self.program)
+        self.state.attach(self.static.program)
+        self.materials.attach(self.program)
+        self.materials.attach(self.static.program)
+        self.groups = {}
+        self.slots = {}  # platform -> (group key, slot)
+        self.submitted = 0  # Instances drawn last frame
+        self.culled = 0  # Instances skipped by frustum culling last frame
+        self.profiler = NULL_PROFILER  # Counts draw calls, texture binds and uploads when enabled
+
+    def add(self, platform):
+        """Draw a platform from now on: baked into the static meshes, or instanced if it is dynamic."""
+        if not platform.dynamic:
+            self.static.add(platform)
+            return
+        key = platform.mesh_key()
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = InstanceGroup(self.ctx, self.program, platform.vbo, platform.ibo)
+        layers = (self.materials.layer(platform.texture_path), self.materials.layer(platform.side_texture_path))
+        self.slots[platform] = (key, group.add(platform, layers))
+
+    def remove(self, platform):
+        if platform in self.static:
+            self.static.remove(platform)
+            return
+        self.materials.release_layer(platform.texture_path)
+        self.materials.release_layer(platform.side_texture_path)
+        key, slot = self.slots.pop(platform)
+        group = self.groups[key]
+        moved = group.remove(slot)
+        if moved is not None:
+            self.slots[moved] = (key, slot)
+        if not group.platforms:
+            group.release()
+            del self.groups[key]
+
+    def update(self, platform):
+        """Mark a platform's transform as changed; it is uploaded on the next render.
+
+        A static platform that moves is taken out of the baked meshes and drawn
+        as a dynamic instance from then on.
+        """
+        if platform in self.static:
+            platform.dynamic = True
+            self.add(platform)  # Before removing, so the texture layers stay referenced
+            self.static.remove(platform)
+            return
+        key, slot = self.slots[platform]
+        self.groups[key].update(slot)
+
+    def draw_calls(self):
+        return sum(1 for group in self.groups.values() if group.platforms) + self.static.draw_calls()
+
+    def use_programs(self, program, static_program):
+        self.program = program
+        for group in self.groups.values():
+            group.set_program(program)
+        self.static.set_program(static_program)
+        self.state.attach(program)
+        self.state.attach(static_program)
+        self.materials.attach(program)
+        self.materials.attach(static_program)
+
+    def reload_shaders(self):
+        """Recompile the scene programs from their files; returns True if the new ones are in use.
+
+        A program that fails to compile or link, or no longer fits the
+        vertex layout or the Camera block, is reported and the last good
+        programs stay in use.
+        """
+        old = self.program, self.static.program
+        new = []
+        try:
+            new.append(self.resources.compile_program(VERTEX_SHADER, FRAGMENT_SHADER))
+            new.append(self.resources.compile_program(STATIC_VERTEX_SHADER, STATIC_FRAGMENT_SHADER))
+            self.use_programs(*new)
+        except (moderngl.Error, KeyError, OSError) as error:
+            print(f"Shader reload failed, keeping the last good programs: {error}", file=sys.stderr)
+            if self.program is not old[0] or self.static.program is not old[1]:
+                self.use_programs(*old)
+            for program in new:
+                program.release()
+            return False
+        self.resources.replace_program(new[0], VERTEX_SHADER, FRAGMENT_SHADER)
+        self.resources.replace_program(new[1], STATIC_VERTEX_SHADER, STATIC_FRAGMENT_SHADER)
+        return True
+
+    def set_projection(self, projection):
+        """Set the projection matrix; only needed at startup and when the viewport changes."""
+        self.state.set_projection(projection)
+
+    def render(self, view_matrix, light_pos, visible=None, frustum=None):
+        """Draw all platforms, or only the visible ones when culling is in use.
+
+        ``visible`` lists the dynamic platforms to draw (others in it are
+        ignored) and ``frustum`` culls the static chunks.
+        """
+        profiler = self.profiler
+        state = self.state
+        self.static.build(profiler)
+        state.set_camera(view_matrix, light_pos)
+        state.upload(profiler)
+        self.materials.use(profiler, state)
+        static_submitted = self.static.render(frustum, profiler)
+        static_culled = len(self.static) - static_submitted
+        if visible is None:
+            for group in self.groups.values():
+                group.render(profiler)
+            self.submitted, self.culled = static_submitted + len(self.slots), static_culled
+            return
+
+        visible_slots = {}
+        drawn = 0
+        for platform in visible:
+            entry = self.slots.get(platform)
+            if entry is not None:
+                visible_slots.setdefault(entry[0], []).append(entry[1])
+                drawn += 1
+        for key, slots in visible_slots.items():
+            self.groups[key].render_slots(slots, profiler)
+        self.submitted = static_submitted + drawn
+        self.culled = static_culled + len(self.slots) - drawn
+
+    def release(self):
+        for group in self.groups.values():
+            group.release()
+        self.groups.clear()
+        self.slots.clear()
+        self.static.release()
+        self.materials.release()
+        self.state.release()
+        self.resources.release_program(VERTEX_SHADER, FRAGMENT_SHADER)
@@ -0,0 +1,115 @@
+import os
+
+
+class CachedResource:
+    """A GPU object shared between users, together with its reference count."""
+    def __init__(self, obj, nbytes, release=None):
+        self.obj = obj
+        self.nbytes = nbytes
+        self.refcount = 0
+        self.release = release if release is not None else obj.release
+
+
+class ResourceManager:
+    """Deduplicates shader programs and platform meshes across the scene.
+
+    Every resource is keyed by what it was built from (shader paths, mesh
+    dimensions), so loading a scene costs one compile/upload per unique asset
+    rather than one per platform. Textures are packed and reference counted
+    by ``MaterialLibrary``.
+    """
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.programs = {}
+        self.meshes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _acquire(self, cache, key, create):
+        entry = cache.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = cache[key] = create()
+        else:
+            self.hits += 1
+        entry.refcount += 1
+        return entry.obj
+
+    def _release(self, cache, key):
+        entry = cache.get(key)
+        if entry is None:
+            return
+        entry.refcount -= 1
+        if entry.refcount <= 0:
+            entry.release()
+            del cache[key]
+
+    @staticmethod
+    def program_key(vertex_path, fragment_path):
+        return os.path.normpath(vertex_path), os.path.normpath(fragment_path)
+
+    def acquire_program(self, vertex_path='shaders/vertex_shader.glsl',
+                        fragment_path='shaders/fragment_shader.glsl'):
+        """Return the shader program for a vertex/fragment pair, compiling it only once."""
+        key = self.program_key(vertex_path, fragment_path)
+        return self._acquire(self.programs, key, lambda: self._create_program(vertex_path, fragment_path))
+
+    def release_program(self, vertex_path='shaders/vertex_shader.glsl',
+                        fragment_path='shaders/fragment_shader.glsl'):
+        self._release(self.programs, self.program_key(vertex_path, fragment_path))
+
+    def _create_program(self, vertex_path, fragment_path):
+        return CachedResource(self.compile_program(vertex_path, fragment_path), 0)
+
+    def compile_program(self, vertex_path, fragment_path):
+        """Compile a program from the current shader files, bypassing the cache (raises moderngl.Error)."""
+        with open(vertex_path) as f:
+            vertex_shader = f.read()
+        with open(fragment_path) as f:
+            fragment_shader = f.read()
+        return self.ctx.program(vertex_shader=vertex_shader, fragment_shader=fragment_shader)
+
+    def replace_program(self, program, vertex_path='shaders/vertex_shader.glsl',
+                        fragment_path='shaders/fragment_shader.glsl'):
+        """Swap a cached program for a recompiled one, releasing the old program; refcounts are kept."""
+        entry = self.programs[self.program_key(vertex_path, fragment_path)]
+        entry.release()
+        entry.obj = program
+        entry.release = program.release
+
+    def acquire_mesh(self, key, build_geometry):
+        """Return the (vbo, ibo) pair for the mesh described by ``key``.
+
+        ``build_geometry`` is only called on a cache miss and must return the
+        interleaved vertex array and the index array.
+        """
+        return self._acquire(self.meshes, key, lambda: self._create_mesh(build_geometry))
+
+    def release_mesh(self, key):
+        self._release(self.meshes, key)
+
+    def _create_mesh(self, build_geometry):
+        vertices, indices = build_geometry()
+        vbo = self.ctx.buffer(vertices.tobytes())
+        ibo = self.ctx.buffer(indices.tobytes())
+
+        def release():
+            vbo.release()
+            ibo.release()
+
+        return CachedResource((vbo, ibo), vbo.size + ibo.size, release)
+
+    def bytes_resident(self):
+        """Total size of the cached buffers in bytes."""
+        return sum(entry.nbytes for cache in (self.programs, self.meshes)
+                   for entry in cache.values())
+
+    def stats(self):
+        """Cache hit/miss counters and resident memory, for logging scene loads."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'programs': len(self.programs),
+            'meshes': len(self.meshes),
+            'bytes_resident': self.bytes_resident(),
+        }
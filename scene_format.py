@@ -0,0 +1,180 @@
+"""Binary scene format and a loader that accepts either it or the JSON scenes.
+
+Layout (little-endian, arrays 16-byte aligned):
+
+    header      magic b'PQSC', version, platform count, texture count,
+                string table size, flags, player position/velocity/rotation
+    positions   float32 (N, 3)
+    sizes       float32 (N, 3)  width, height, length
+    textures    int32   (N, 2)  top and side texture index into the string table
+    flags       uint8   (N,)    bit 0: dynamic (drawn as an instance, not baked; version 2+)
+    strings     uint32 (T + 1) offsets followed by the UTF-8 texture paths
+
+Binary files are memory-mapped and the arrays are views into the mapping,
+so loading does no per-platform parsing. What remains per platform is
+World.add_scene creating a Platform object and registering it in the
+spatial grid: on 100k platforms that is over 1 s against a few ms to map
+the file, so the binary format speeds up loading large levels by about a
+quarter, not by orders of magnitude.
+
+    python scene_format.py scenes/testing.json scenes/testing.pqs
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+
+MAGIC = b'PQSC'
+VERSION = 2
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct('<4sIIIII9f')
+HEADER_SIZE = 64
+FLAG_PLAYER = 1
+PLATFORM_DYNAMIC = 1
+DEFAULT_SIZE = (8.0, 1.0, 8.0)  # Platform's default width, height, length
+
+
+def align(offset, alignment=16):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SceneData:
+    """Scene contents as flat arrays, whichever file format they came from."""
+    def __init__(self, positions, sizes, texture_indices, texture_paths, player=None, buffer=None, flags=None):
+        self.positions = positions
+        self.sizes = sizes
+        self.texture_indices = texture_indices
+        self.flags = flags if flags is not None else np.zeros(len(positions), dtype='u1')
+        self.texture_paths = texture_paths
+        self.player = player  # {'position', 'velocity', 'rotation'} or None
+        self.buffer = buffer  # Keeps the memory map alive while the arrays are in use
+
+    def __len__(self):
+        return len(self.positions)
+
+    def bounds(self):
+        """World-space (min, max) corners of every platform, matching Platform.world_bounds."""
+        half = self.sizes * np.array([0.5, 0.0, 0.5], dtype='f4')
+        top = self.sizes * np.array([0.5, 1.0, 0.5], dtype='f4')
+        return self.positions - half, self.positions + top
+
+    def close(self):
+        if self.buffer is not None:
+            self.positions = self.sizes = self.texture_indices = self.flags = None
+            self.buffer.close()
+            self.buffer = None
+
+
+def scene_from_json(scene_data):
+    """Convert the JSON scene schema into a SceneData."""
+    platforms = scene_data['platforms']
+    texture_paths, texture_index = [], {}
+
+    def index(path):
+        if path not in texture_index:
+            texture_index[path] = len(texture_paths)
+            texture_paths.append(path)
+        return texture_index[path]
+
+    positions = np.array([p['position'] for p in platforms], dtype='f4').reshape(-1, 3)
+    sizes = np.array([p.get('size', DEFAULT_SIZE) for p in platforms], dtype='f4').reshape(-1, 3)
+    texture_indices = np.array([(index(p['texture_top']), index(p.get('texture_side') or p['texture_top']))
+                                for p in platforms], dtype='i4').reshape(-1, 2)
+    flags = np.array([PLATFORM_DYNAMIC if p.get('dynamic') else 0 for p in platforms], dtype='u1')
+    return SceneData(positions, sizes, texture_indices, texture_paths, scene_data.get('player'), flags=flags)
+
+
+def write_binary(scene, path):
+    """Write a SceneData in the binary format."""
+    encoded = [p.encode('utf-8') for p in scene.texture_paths]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    strings = offsets.tobytes() + b''.join(encoded)
+
+    player = scene.player
+    flags = FLAG_PLAYER if player else 0
+    player_values = (list(player['position']) + list(player['velocity']) + list(player['rotation'])
+                     if player else [0.0] * 9)
+    header = HEADER.pack(MAGIC, VERSION, len(scene), len(encoded), len(strings), flags, *player_values)
+
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        for array, dtype in ((scene.positions, '<f4'), (scene.sizes, '<f4'), (scene.texture_indices, '<i4'),
+                             (scene.flags, 'u1')):
+            data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+            f.write(data)
+            f.write(b'\0' * (align(f.tell()) - f.tell()))
+        f.write(strings)
+
+
+def read_binary(path):
+    """Memory-map a binary scene; the returned arrays are read-only views of the file.
+
+    Raises ValueError for files that are not binary scenes or are truncated.
+    """
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise ValueError(f"{path} is not a readable binary scene: empty file")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return parse_binary(buffer)
+    except ValueError as error:
+        buffer.close()  # Nothing views it yet: every size is checked before the arrays are mapped
+        raise ValueError(f"{path} is not a readable binary scene: {error}") from None
+
+
+def parse_binary(buffer):
+    if len(buffer) < HEADER_SIZE:
+        raise ValueError("truncated header")
+    magic, version, count, texture_count, strings_size, flags, *player_values = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version not in READABLE_VERSIONS:
+        raise ValueError(f"not a version {'/'.join(map(str, READABLE_VERSIONS))} scene")
+
+    layout = [('<f4', 3), ('<f4', 3), ('<i4', 2)] + ([('u1', 1)] if version >= 2 else [])
+    offsets = []
+    offset = HEADER_SIZE
+    for dtype, columns in layout:
+        offsets.append(offset)
+        offset = align(offset + count * columns * np.dtype(dtype).itemsize)
+    strings_offset = offset
+    if strings_offset + strings_size > len(buffer) or strings_size < (texture_count + 1) * 4:
+        raise ValueError("truncated file")
+
+    string_offsets = np.frombuffer(buffer, dtype='<u4', count=texture_count + 1, offset=strings_offset).tolist()
+    blob = buffer[strings_offset + (texture_count + 1) * 4:strings_offset + strings_size]
+    if string_offsets != sorted(string_offsets) or string_offsets[-1] > len(blob):
+        raise ValueError("bad string table")
+    try:
+        texture_paths = [blob[start:end].decode('utf-8') for start, end in zip(string_offsets, string_offsets[1:])]
+    except UnicodeDecodeError as error:
+        raise ValueError(f"bad string table: {error}") from None
+
+    arrays = [np.frombuffer(buffer, dtype=dtype, count=count * columns, offset=array_offset).reshape(count, columns)
+              for (dtype, columns), array_offset in zip(layout, offsets)]
+    positions, sizes, texture_indices = arrays[:3]
+    platform_flags = arrays[3].reshape(count) if version >= 2 else None
+
+    player = None
+    if flags & FLAG_PLAYER:
+        player = {'position': player_values[0:3], 'velocity': player_values[3:6], 'rotation': player_values[6:9]}
+    return SceneData(positions, sizes, texture_indices, texture_paths, player, buffer, platform_flags)
+
+
+def load_scene_data(path):
+    """Load a scene file, detecting the binary format by its magic number."""
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        return read_binary(path)
+    with open(path, 'r') as f:
+        return scene_from_json(json.load(f))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python scene_format.py <scene.json> <scene.pqs>")
+    scene = load_scene_data(sys.argv[1])
+    write_binary(scene, sys.argv[2])
+    print(f"Wrote {len(scene)} platforms and {len(scene.texture_paths)} textures to {sys.argv[2]}")
@@ -0,0 +1,301 @@
+"""Headless game sessions sharded across a process pool.
+
+A ``Session`` is one authoritative ``World`` whose players are entities
+driven by client commands instead of pygame input. ``SessionHost`` spreads
+sessions over worker processes and advances them in lockstep: every tick it
+sends each worker one message with the queued joins, leaves and inputs,
+the worker steps its sessions, and it replies with their state snapshots.
+
+    python server.py [scene_file] [sessions] [players_per_session] [ticks] [workers] [discrete|swept]
+
+runs the host against scripted ``LocalClient`` players and prints the
+throughput metrics as JSON. Nothing leaves the machine.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+import numpy as np
+
+from world import World, InputState, COLLISION_MODES
+from scene_format import load_scene_data
+
+DEFAULT_SPAWN = (0.0, 2.0, 0.0)  # Used when the scene has no player start
+
+
+class Session:
+    """One game: a headless world plus the players connected to it.
+
+    Players are slots in ``world.entities``. Movement commands are held until
+    the client sends new ones, like held keys; jumps and mouse look apply to
+    a single tick. With ``collision_mode='swept'`` the entity batch is swept,
+    so players cannot tunnel at low tick rates.
+    """
+    def __init__(self, session_id, scene, tick_rate=60, collision_mode='discrete'):
+        self.session_id = session_id
+        self.world = World(tick_rate, collision_mode)
+        self.world.add_scene(scene)
+        self.spawn = scene.player['position'] if scene.player is not None else DEFAULT_SPAWN
+        self.players = {}  # player id -> entity slot
+
+    def join(self, player_id):
+        if player_id not in self.players:
+            self.players[player_id] = self.world.entities.spawn(self.spawn)
+
+    def leave(self, player_id):
+        slot = self.players.pop(player_id, None)
+        if slot is not None:
+            self.world.entities.despawn(slot)
+
+    def apply(self, player_id, commands):
+        """Set a player's commands for the next tick from an ``InputState``."""
+        slot = self.players.get(player_id)
+        if slot is None:
+            return  # Input that raced a leave
+        entities = self.world.entities
+        entities.forward[slot], entities.right[slot] = commands.forward, commands.right
+        entities.jump[slot] = commands.jump
+        entities.look_x[slot], entities.look_y[slot] = commands.look_x, commands.look_y
+
+    def step(self):
+        entities = self.world.entities
+        self.world.step(None)
+        entities.jump[:entities.count] = False
+        entities.look_x[:entities.count] = entities.look_y[:entities.count] = 0.0
+
+    def snapshot(self):
+        """Tick number and ``player id -> (x, y, z, yaw, pitch, grounded)`` for every player."""
+        entities = self.world.entities
+        ids = list(self.players)
+        slots = np.fromiter(self.players.values(), dtype=np.intp, count=len(ids))
+        states = zip(entities.positions[slots].tolist(), entities.yaw[slots].tolist(),
+                     entities.pitch[slots].tolist(), entities.grounded[slots].tolist())
+        return {'tick': self.world.tick,
+                'players': {player_id: (*position, yaw, pitch, grounded)
+                            for player_id, (position, yaw, pitch, grounded) in zip(ids, states)}}
+
+
+def worker_main(worker_index, inbox, outbox, tick_rate):
+    """Worker process loop: apply the events in each tick message, step every session, reply."""
+    sessions = {}
+    scenes = {}  # scene file -> SceneData, shared by every session on this worker that uses it
+    try:
+        while True:
+            message = inbox.get()
+            if message is None:
+                break
+            start = time.perf_counter()
+            for event in message:
+                kind, session_id = event[0], event[1]
+                if kind == 'input':
+                    sessions[session_id].apply(event[2], InputState(*event[3:]))
+                elif kind == 'join':
+                    sessions[session_id].join(event[2])
+                elif kind == 'leave':
+                    sessions[session_id].leave(event[2])
+                elif kind == 'create':
+                    scene_file, collision_mode = event[2], event[3]
+                    if scene_file not in scenes:
+                        scenes[scene_file] = load_scene_data(scene_file)
+                    sessions[session_id] = Session(session_id, scenes[scene_file], tick_rate, collision_mode)
+                elif kind == 'close':
+                    del sessions[session_id]
+            snapshots = {}
+            for session_id, session in sessions.items():
+                session.step()
+                snapshots[session_id] = session.snapshot()
+            outbox.put((worker_index, snapshots, time.perf_counter() - start, None))
+    except Exception:
+        outbox.put((worker_index, None, 0.0, traceback.format_exc()))
+
+
+class SessionHost:
+    """Runs sessions on ``workers`` processes and steps them all once per ``step``.
+
+    Calls that change a session (create, join, leave, input) are queued and
+    delivered with the next tick, so each worker gets exactly one message
+    per tick and sends one reply holding all of its snapshots.
+    """
+    def __init__(self, workers=None, tick_rate=60):
+        self.tick_rate = tick_rate
+        self.tick_time = 1.0 / tick_rate
+        context = multiprocessing.get_context('spawn')  # Same behaviour on every platform
+        self.outbox = context.Queue()
+        self.inboxes = []
+        self.processes = []
+        for index in range(workers or os.cpu_count() or 1):
+            inbox = context.Queue()
+            process = context.Process(target=worker_main, args=(index, inbox, self.outbox, tick_rate),
+                                      name=f'session-worker-{index}', daemon=True)
+            process.start()
+            self.inboxes.append(inbox)
+            self.processes.append(process)
+        self.events = [[] for _ in self.processes]  # Pending events per worker
+        self.shard = {}  # session id -> worker index
+        self.load = [0] * len(self.processes)  # Sessions per worker
+        self.next_session = 0
+        self.tick = 0
+        self.reset_metrics()
+
+    def create_session(self, scene_file, collision_mode='discrete'):
+        """Start a session on the least loaded worker and return its id."""
+        if collision_mode not in COLLISION_MODES:
+            raise ValueError(f"unknown collision mode {collision_mode!r}")  # Here, not later inside a worker
+        session_id = self.next_session
+        self.next_session += 1
+        worker = self.load.index(min(self.load))
+        self.shard[session_id] = worker
+        self.load[worker] += 1
+        self.events[worker].append(('create', session_id, scene_file, collision_mode))
+        return session_id
+
+    def close_session(self, session_id):
+        worker = self.shard.pop(session_id)
+        self.load[worker] -= 1
+        self.events[worker].append(('close', session_id))
+
+    def join(self, session_id, player_id):
+        self.events[self.shard[session_id]].append(('join', session_id, player_id))
+
+    def leave(self, session_id, player_id):
+        self.events[self.shard[session_id]].append(('leave', session_id, player_id))
+
+    def send_input(self, session_id, player_id, commands):
+        self.events[self.shard[session_id]].append(
+            ('input', session_id, player_id, commands.forward, commands.right, commands.jump,
+             commands.look_x, commands.look_y))
+
+    def step(self):
+        """Advance every session by one tick and return ``session id -> snapshot``."""
+        start = time.perf_counter()
+        for inbox, events in zip(self.inboxes, self.events):
+            inbox.put(events)
+        self.events = [[] for _ in self.processes]
+        snapshots = {}
+        for _ in self.processes:
+            worker_index, worker_snapshots, busy, error = self.outbox.get()
+            if error is not None:
+                raise RuntimeError(f"session worker {worker_index} failed:\n{error}")
+            snapshots.update(worker_snapshots)
+            self.busy_seconds += busy
+        self.tick_ms.append((time.perf_counter() - start) * 1e3)
+        self.session_ticks += len(snapshots)
+        self.tick += 1
+        return snapshots
+
+    def run(self, ticks, clients=(), realtime=False):
+        """Step ``ticks`` times, feeding ``clients`` their snapshots and sending their inputs.
+
+        With ``realtime`` the host sleeps to hold ``tick_rate``; otherwise it runs flat out.
+        """
+        next_tick = time.perf_counter()
+        for _ in range(ticks):
+            for client in clients:
+                self.send_input(client.session_id, client.player_id, client.commands(self.tick))
+            snapshots = self.step()
+            for client in clients:
+                client.receive(snapshots[client.session_id])
+            if realtime:
+                next_tick += self.tick_time
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def reset_metrics(self):
+        self.tick_ms = []  # Host round trip per tick
+        self.busy_seconds = 0.0  # Worker time spent on events and simulation
+        self.session_ticks = 0
+
+    def metrics(self):
+        """Throughput and latency over every tick so far.
+
+        ``sessions_per_core`` is how many sessions one core could keep at
+        ``tick_rate`` given the worker time measured per session tick.
+        """
+        samples = np.asarray(self.tick_ms, dtype='f8')
+        core_seconds = self.busy_seconds / max(self.session_ticks, 1)
+        return {
+            'workers': len(self.processes),
+            'sessions': len(self.shard),
+            'ticks': len(self.tick_ms),
+            'session_ticks': self.session_ticks,
+            'tick_ms': {'mean': float(samples.mean()), 'p50': float(np.percentile(samples, 50)),
+                        'p95': float(np.percentile(samples, 95)), 'max': float(samples.max())} if self.tick else None,
+            'session_tick_us': core_seconds * 1e6,
+            'sessions_per_core': self.tick_time / core_seconds if core_seconds else None,
+            'host_ticks_per_second': 1e3 / samples.mean() if self.tick else None,
+        }
+
+    def close(self):
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for process in self.processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+
+
+class LocalClient:
+    """Scripted stand-in for a remote player: wanders, turns and jumps, and keeps the latest state."""
+    def __init__(self, session_id, player_id, tick_rate=60, seed=0):
+        self.session_id = session_id
+        self.player_id = player_id
+        self.tick_rate = tick_rate
+        self.rng = np.random.default_rng(seed)
+        self.walk = InputState(forward=1)
+        self.state = None  # (x, y, z, yaw, pitch, grounded) from the last snapshot
+        self.last_tick = 0
+        self.snapshots = 0
+
+    def commands(self, tick):
+        if tick % self.tick_rate == 0:  # Pick a new direction every second
+            self.walk = InputState(forward=int(self.rng.integers(-1, 2)), right=int(self.rng.integers(-1, 2)))
+        jump = self.rng.random() < 0.02
+        look_x = float(self.rng.uniform(-10.0, 10.0)) if self.rng.random() < 0.1 else 0.0
+        return InputState(self.walk.forward, self.walk.right, jump, look_x)
+
+    def receive(self, snapshot):
+        self.state = snapshot['players'].get(self.player_id)
+        self.last_tick = snapshot['tick']
+        self.snapshots += 1
+
+
+if __name__ == "__main__":
+    scene_file = sys.argv[1] if len(sys.argv) > 1 else 'scenes/testing.json'
+    session_count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    players_per_session = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    ticks = int(sys.argv[4]) if len(sys.argv) > 4 else 600
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 and sys.argv[5] != '0' else None
+    collision_mode = sys.argv[6] if len(sys.argv) > 6 else 'discrete'
+
+    host = SessionHost(workers)
+    clients = []
+    for _ in range(session_count):
+        session_id = host.create_session(scene_file, collision_mode)
+        for player_id in range(players_per_session):
+            host.join(session_id, player_id)
+            clients.append(LocalClient(session_id, player_id, host.tick_rate, seed=len(clients)))
+    try:
+        host.step()  # Sessions are created and players joined with the first tick
+        host.reset_metrics()
+        host.run(ticks, clients)
+        metrics = host.metrics()
+    finally:
+        host.close()
+
+    # The pooled result must match the same session stepped in this process
+    reference = Session(0, load_scene_data(scene_file), host.tick_rate, collision_mode)
+    replay = [LocalClient(0, player_id, host.tick_rate, seed=player_id) for player_id in range(players_per_session)]
+    for player_id in range(players_per_session):
+        reference.join(player_id)
+    reference.step()
+    for tick in range(1, ticks + 1):
+        for client in replay:
+            reference.apply(client.player_id, client.commands(tick))
+        reference.step()
+    expected = reference.snapshot()['players']
+    metrics['matches_in_process'] = all(client.state == expected[client.player_id]
+                                        for client in clients if client.session_id == 0)
+    print(json.dumps(metrics, indent=2))
@@ -3,18 +3,43 @@
 in vec2 fragUV;          // Texture coordinates
 in vec3 fragNormal;      // Transformed normal
 in vec3 fragPosition;    // World position
+flat in vec4 fragLayers; // Size class and array layer of the top, then the side texture
 
 out vec4 fragColorOut;   // Final output color
 
-uniform sampler2D texture0; // Texture sampler
-uniform vec3 lightPos;      // Light source position
+uniform sampler2DArray textures[8]; // One texture array per size class, 16 to 2048 texels square (materials.py)
+layout(std140) uniform Camera { // Shared uniform buffer, written once per frame (render_state.py)
+    mat4 view;           // View matrix
+    mat4 projection;     // Projection matrix
+    vec4 lightPos;       // Light source position (xyz)
+};
 
-void main() {
-    vec3 texColor = texture(texture0, fragUV).rgb; // Sample the texture using UV coordinates
+vec3 layerColor(vec2 entry, vec2 uv) {
+    vec3 coord = vec3(uv, entry.y);
+    switch (int(entry.x)) { // Constant sampler indices; textureLod since the branch is not uniform
+        case 0: return textureLod(textures[0], coord, 0.0).rgb;
+        case 1: return textureLod(textures[1], coord, 0.0).rgb;
+        case 2: return textureLod(textures[2], coord, 0.0).rgb;
+        case 3: return textureLod(textures[3], coord, 0.0).rgb;
+        case 4: return textureLod(textures[4], coord, 0.0).rgb;
+        case 5: return textureLod(textures[5], coord, 0.0).rgb;
+        case 6: return textureLod(textures[6], coord, 0.0).rgb;
+        case 7: return textureLod(textures[7], coord, 0.0).rgb;
+    }
+    // Still loading: magenta and grey checker, 8 squares across the texture
+    vec2 square = floor(fract(uv) * 8.0);
+    return mod(square.x + square.y, 2.0) < 1.0 ? vec3(1.0, 0.0, 1.0) : vec3(40.0 / 255.0);
+}
 
-    vec3 lightDir = normalize(lightPos - fragPosition); // Direction to light source
+void main() {
     vec3 norm = normalize(fragNormal); // Normal at the fragment
 
+    // Top and bottom faces use the top texture, the four sides use the side texture
+    vec2 layer = abs(norm.y) > 0.5 ? fragLayers.xy : fragLayers.zw;
+    vec3 texColor = layerColor(layer, fragUV); // Sample the texture using UV coordinates
+
+    vec3 lightDir = normalize(lightPos.xyz - fragPosition); // Direction to light source
+
     // Ambient and diffuse lighting
     vec3 ambient = 0.4 * texColor; // Ambient light contribution
     float diff = max(dot(norm, lightDir), 0.0); // Diffuse lighting factor
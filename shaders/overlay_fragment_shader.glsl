@@ -0,0 +1,11 @@
+#version 330 core
+
+in vec2 fragUV;          // Texture coordinates
+
+out vec4 fragColorOut;   // Final output color
+
+uniform sampler2D texture0; // Overlay text, with a translucent background
+
+void main() {
+    fragColorOut = texture(texture0, fragUV);
+}
@@ -0,0 +1,11 @@
+#version 330 core
+
+in vec2 in_pos;         // Quad corner in normalized device coordinates
+in vec2 in_uv;          // Texture coordinates
+
+out vec2 fragUV;        // Pass texture coordinates to fragment shader
+
+void main() {
+    gl_Position = vec4(in_pos, 0.0, 1.0);
+    fragUV = in_uv;
+}
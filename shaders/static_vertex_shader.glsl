@@ -0,0 +1,32 @@
+#version 330 core
+
+in vec3 in_vert;        // World-space vertex position (baked)
+in vec3 in_normal;      // Vertex normal
+in vec2 in_uv;          // Texture coordinates
+in vec2 in_layers;      // Texture layer indices (top, side) of the platform this vertex belongs to
+
+out vec2 fragUV;        // Pass texture coordinates to fragment shader
+out vec3 fragNormal;    // Pass normal to fragment shader
+out vec3 fragPosition;  // Pass world position to fragment shader
+flat out vec4 fragLayers; // Size class and array layer of the top, then the side texture
+
+layout(std140) uniform Camera { // Shared uniform buffer, written once per frame (render_state.py)
+    mat4 view;           // View matrix
+    mat4 projection;     // Projection matrix
+    vec4 lightPos;       // Light source position (xyz)
+};
+uniform sampler2D layerTable; // Layer index -> (size class, layer in its array); class -1 while loading
+
+vec2 lookupLayer(float index) {
+    int i = int(index);
+    return texelFetch(layerTable, ivec2(i % 256, i / 256), 0).xy; // 256 = LAYER_TABLE_WIDTH (materials.py)
+}
+
+void main() {
+    gl_Position = projection * view * vec4(in_vert, 1.0);
+
+    fragUV = in_uv;
+    fragNormal = in_normal; // Static geometry is only translated, so normals are already in world space
+    fragPosition = in_vert;
+    fragLayers = vec4(lookupLayer(in_layers.x), lookupLayer(in_layers.y));
+}
@@ -3,20 +3,32 @@
 in vec3 in_vert;        // Vertex position
 in vec3 in_normal;      // Vertex normal
 in vec2 in_uv;          // Texture coordinates
+in mat4 in_model;       // Per-instance model matrix
+in vec2 in_layers;      // Per-instance texture layer indices (top, side), resolved through layerTable
 
 out vec2 fragUV;        // Pass texture coordinates to fragment shader
 out vec3 fragNormal;    // Pass transformed normal to fragment shader
 out vec3 fragPosition;  // Pass world position to fragment shader
+flat out vec4 fragLayers; // Size class and array layer of the top, then the side texture
 
-uniform mat4 model;      // Model matrix
-uniform mat4 view;       // View matrix
-uniform mat4 projection; // Projection matrix
+layout(std140) uniform Camera { // Shared uniform buffer, written once per frame (render_state.py)
+    mat4 view;           // View matrix
+    mat4 projection;     // Projection matrix
+    vec4 lightPos;       // Light source position (xyz)
+};
+uniform sampler2D layerTable; // Layer index -> (size class, layer in its array); class -1 while loading
+
+vec2 lookupLayer(float index) {
+    int i = int(index);
+    return texelFetch(layerTable, ivec2(i % 256, i / 256), 0).xy; // 256 = LAYER_TABLE_WIDTH (materials.py)
+}
 
 void main() {
-    vec4 worldPosition = model * vec4(in_vert, 1.0);
+    vec4 worldPosition = in_model * vec4(in_vert, 1.0);
     gl_Position = projection * view * worldPosition;
 
     fragUV = in_uv;
-    fragNormal = normalize(mat3(model) * in_normal); // Transform the normal using the model matrix
+    fragNormal = normalize(mat3(in_model) * in_normal); // Transform the normal using the model matrix
     fragPosition = vec3(worldPosition); // Store world position
+    fragLayers = vec4(lookupLayer(in_layers.x), lookupLayer(in_layers.y));
 }
@@ -0,0 +1,249 @@
+from math import floor, inf
+import numpy as np
+
+
+def cells_covered(low, high):
+    """Expand ``(N, 3)`` inclusive cell ranges into one ``(owner, i, j, k)`` row per covered cell."""
+    spans = high - low + 1
+    cells_per_item = spans.prod(axis=1)
+    owner = np.repeat(np.arange(len(low)), cells_per_item)
+    local = np.arange(len(owner)) - np.repeat(np.cumsum(cells_per_item) - cells_per_item, cells_per_item)
+    span_y, span_z = spans[owner, 1], spans[owner, 2]
+    cell_i = low[owner, 0] + local // (span_y * span_z)
+    cell_j = low[owner, 1] + (local // span_z) % span_y
+    cell_k = low[owner, 2] + local % span_z
+    return owner, cell_i, cell_j, cell_k
+
+
+class UniformGrid:
+    """Broad-phase index that buckets axis-aligned boxes into uniform grid cells.
+
+    Items are any hashable objects (the engine stores platforms) registered with
+    their world-space bounds. Queries only visit the cells a box or ray touches,
+    and results are returned in insertion order so callers that stop at the
+    first hit behave the same as a linear scan over the scene.
+    """
+    def __init__(self, cell_size=8.0):
+        self.cell_size = float(cell_size)
+        self.cells = {}  # (i, j, k) -> set of items
+        self.bounds = {}  # item -> (min_bound, max_bound, cell range)
+        self.order = {}  # item -> insertion sequence number
+        self.next_order = 0
+        self.lowest_cell = inf  # Lowest occupied cell row, bounds downward searches
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __contains__(self, item):
+        return item in self.bounds
+
+    def cell_range(self, min_bound, max_bound):
+        size = self.cell_size
+        return (floor(min_bound[0] / size), floor(min_bound[1] / size), floor(min_bound[2] / size),
+                floor(max_bound[0] / size), floor(max_bound[1] / size), floor(max_bound[2] / size))
+
+    def _cells(self, cell_range):
+        x0, y0, z0, x1, y1, z1 = cell_range
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                for k in range(z0, z1 + 1):
+                    yield i, j, k
+
+    def insert(self, item, min_bound, max_bound):
+        min_bound = tuple(float(v) for v in min_bound)
+        max_bound = tuple(float(v) for v in max_bound)
+        cell_range = self.cell_range(min_bound, max_bound)
+        self.bounds[item] = (min_bound, max_bound, cell_range)
+        self.order[item] = self.next_order
+        self.next_order += 1
+        for cell in self._cells(cell_range):
+            self.cells.setdefault(cell, set()).add(item)
+        self.lowest_cell = min(self.lowest_cell, cell_range[1])
+
+    def insert_many(self, items, min_bounds, max_bounds):
+        """Insert a block of items from ``(N, 3)`` bound arrays, bucketing them with NumPy.
+
+        Equivalent to calling ``insert`` for each item in order, but the
+        per-cell work is grouped so loading large scenes avoids a Python
+        loop over every (item, cell) pair.
+        """
+        count = len(items)
+        if count == 0:
+            return
+        min_bounds = np.asarray(min_bounds, dtype='f8')
+        max_bounds = np.asarray(max_bounds, dtype='f8')
+        low = np.floor(min_bounds / self.cell_size).astype(np.int64)
+        high = np.floor(max_bounds / self.cell_size).astype(np.int64)
+
+        owner, cell_i, cell_j, cell_k = cells_covered(low, high)
+
+        # Group the pairs by cell so each bucket is touched once
+        order = np.lexsort((cell_k, cell_j, cell_i))
+        cell_i, cell_j, cell_k, owner = cell_i[order], cell_j[order], cell_k[order], owner[order]
+        starts = np.flatnonzero(np.concatenate(([True], (np.diff(cell_i) != 0) | (np.diff(cell_j) != 0) |
+                                                (np.diff(cell_k) != 0))))
+        ends = np.append(starts[1:], len(owner))
+        item_array = np.empty(count, dtype=object)
+        item_array[:] = items
+        members = item_array[owner].tolist()  # List slices are much cheaper to turn into sets than object arrays
+        cells = self.cells
+        for cell, start, end in zip(zip(cell_i[starts].tolist(), cell_j[starts].tolist(), cell_k[starts].tolist()),
+                                    starts.tolist(), ends.tolist()):
+            bucket = cells.get(cell)
+            if bucket is None:
+                cells[cell] = set(members[start:end])
+            else:
+                bucket.update(members[start:end])
+
+        ranges = map(tuple, np.concatenate((low, high), axis=1).tolist())
+        self.bounds.update(zip(items, zip(map(tuple, min_bounds.tolist()), map(tuple, max_bounds.tolist()), ranges)))
+        self.order.update(zip(items, range(self.next_order, self.next_order + count)))
+        self.next_order += count
+        self.lowest_cell = min(self.lowest_cell, int(low[:, 1].min()))
+
+    def remove(self, item):
+        _, _, cell_range = self.bounds.pop(item)
+        del self.order[item]
+        for cell in self._cells(cell_range):
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def update(self, item, min_bound, max_bound):
+        """Move an item; cell buckets are only touched if it crossed a cell boundary."""
+        min_bound = tuple(float(v) for v in min_bound)
+        max_bound = tuple(float(v) for v in max_bound)
+        _, _, old_range = self.bounds[item]
+        cell_range = self.cell_range(min_bound, max_bound)
+        self.bounds[item] = (min_bound, max_bound, cell_range)
+        if cell_range == old_range:
+            return
+        old_cells = set(self._cells(old_range))
+        new_cells = set(self._cells(cell_range))
+        for cell in old_cells - new_cells:
+            bucket = self.cells[cell]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+        for cell in new_cells - old_cells:
+            self.cells.setdefault(cell, set()).add(item)
+        self.lowest_cell = min(self.lowest_cell, cell_range[1])
+
+    def query_aabb(self, min_bound, max_bound):
+        """Return the items whose bounds overlap the given box, in insertion order."""
+        found = set()
+        for cell in self._cells(self.cell_range(min_bound, max_bound)):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        hits = []
+        for item in found:
+            item_min, item_max, _ = self.bounds[item]
+            if (item_min[0] <= max_bound[0] and item_max[0] >= min_bound[0] and
+                    item_min[1] <= max_bound[1] and item_max[1] >= min_bound[1] and
+                    item_min[2] <= max_bound[2] and item_max[2] >= min_bound[2]):
+                hits.append(item)
+        hits.sort(key=self.order.__getitem__)
+        return hits
+
+    @staticmethod
+    def ray_box(origin, inv_direction, min_bound, max_bound):
+        """Slab test; return the entry distance along the ray, or None on a miss."""
+        t_near, t_far = -inf, inf
+        for axis in range(3):
+            inv = inv_direction[axis]
+            if inv == inf:  # Ray parallel to this slab
+                if origin[axis] < min_bound[axis] or origin[axis] > max_bound[axis]:
+                    return None
+                continue
+            t0 = (min_bound[axis] - origin[axis]) * inv
+            t1 = (max_bound[axis] - origin[axis]) * inv
+            if t0 > t1:
+                t0, t1 = t1, t0
+            t_near = max(t_near, t0)
+            t_far = min(t_far, t1)
+            if t_near > t_far:
+                return None
+        if t_far < 0:
+            return None
+        return max(t_near, 0.0)
+
+    def raycast(self, origin, direction, max_distance=1000.0):
+        """Return ``(item, distance)`` for the first item hit by the ray, or None.
+
+        ``direction`` need not be normalised; distances are in units of its length.
+        Cells are walked front to back (Amanatides & Woo) so the search stops as
+        soon as the nearest hit is known.
+        """
+        size = self.cell_size
+        inv_direction = tuple(1.0 / d if d != 0 else inf for d in direction)
+        cell = [floor(origin[axis] / size) for axis in range(3)]
+        step, t_max, t_delta = [0, 0, 0], [inf, inf, inf], [inf, inf, inf]
+        for axis in range(3):
+            d = direction[axis]
+            if d > 0:
+                step[axis] = 1
+                t_max[axis] = ((cell[axis] + 1) * size - origin[axis]) / d
+                t_delta[axis] = size / d
+            elif d < 0:
+                step[axis] = -1
+                t_max[axis] = (cell[axis] * size - origin[axis]) / d
+                t_delta[axis] = -size / d
+
+        best_item, best_t = None, inf
+        visited = set()
+        t_cell_start = 0.0
+        while t_cell_start <= max_distance:
+            bucket = self.cells.get(tuple(cell))
+            if bucket:
+                for item in bucket:
+                    if item in visited:
+                        continue
+                    visited.add(item)
+                    item_min, item_max, _ = self.bounds[item]
+                    t = self.ray_box(origin, inv_direction, item_min, item_max)
+                    if t is not None and t <= max_distance and (
+                            t < best_t or (t == best_t and self.order[item] < self.order[best_item])):
+                        best_item, best_t = item, t
+            axis = t_max.index(min(t_max))
+            if best_item is not None and best_t <= t_max[axis]:
+                break  # Nothing in a later cell can be closer
+            if t_max[axis] == inf:
+                break
+            t_cell_start = t_max[axis]
+            cell[axis] += step[axis]
+            t_max[axis] += t_delta[axis]
+        if best_item is None:
+            return None
+        return best_item, best_t
+
+    def nearest_below(self, min_bound, max_bound, max_distance=inf):
+        """Return ``(item, gap)`` for the highest item top at or below ``min_bound[1]``.
+
+        The box's XZ footprint must overlap the item; ``gap`` is the vertical
+        distance from the bottom of the box down to the item's top. Used for
+        ground checks.
+        """
+        size = self.cell_size
+        x0, _, z0, x1, j, z1 = self.cell_range(min_bound, (max_bound[0], min_bound[1], max_bound[2]))
+        bottom = self.lowest_cell if max_distance == inf else floor((min_bound[1] - max_distance) / size)
+        best_item, best_gap = None, inf
+        while j >= bottom:
+            for i in range(x0, x1 + 1):
+                for k in range(z0, z1 + 1):
+                    for item in self.cells.get((i, j, k), ()):
+                        item_min, item_max, _ = self.bounds[item]
+                        if not (item_min[0] <= max_bound[0] and item_max[0] >= min_bound[0] and
+                                item_min[2] <= max_bound[2] and item_max[2] >= min_bound[2]):
+                            continue
+                        gap = min_bound[1] - item_max[1]
+                        if 0 <= gap <= max_distance and (
+                                gap < best_gap or (gap == best_gap and self.order[item] < self.order[best_item])):
+                            best_item, best_gap = item, gap
+            if best_item is not None and min_bound[1] - best_gap >= j * size:
+                break  # Lower rows can only contain lower tops
+            j -= 1
+        if best_item is None:
+            return None
+        return best_item, best_gap
@@ -0,0 +1,243 @@
+from math import ceil, floor
+import numpy as np
+import moderngl
+
+from collision import CollisionWorld
+from profiler import NULL_PROFILER
+
+STATIC_VERTEX_SHADER = 'shaders/static_vertex_shader.glsl'
+STATIC_FRAGMENT_SHADER = 'shaders/fragment_shader.glsl'
+VERTEX_FLOATS = 8 + 2  # Position, normal, uv, then the top and side texture layers
+VERTEX_FORMAT = '3f 3f 2f 2f'
+VERTEX_ATTRIBUTES = ('in_vert', 'in_normal', 'in_uv', 'in_layers')
+FACE_INDICES = np.array([0, 1, 2, 0, 2, 3], dtype='i4')
+# Platform.build_geometry face order as (axis, outward direction): bottom, top, front, back, left, right
+FACES = ((1, -1), (1, 1), (2, -1), (2, 1), (0, -1), (0, 1))
+
+
+def hidden_faces(min_bounds, max_bounds):
+    """Return an ``(N, 6)`` mask of box faces covered by another box, in ``FACES`` order.
+
+    A face is hidden when a single other box covers its whole rectangle and
+    extends outward from it, which includes faces shared by touching boxes.
+    """
+    hidden = np.zeros((len(min_bounds), 6), dtype=bool)
+    if len(min_bounds) < 2:
+        return hidden
+    boxes = CollisionWorld(capacity=len(min_bounds))
+    boxes.add_many(min_bounds, max_bounds)
+    a, b = boxes.candidate_pairs(min_bounds.astype('f8'), max_bounds.astype('f8'))
+    keep = a != b
+    a, b = a[keep], b[keep]
+    a_min, a_max, b_min, b_max = min_bounds[a], max_bounds[a], min_bounds[b], max_bounds[b]
+    for face, (axis, direction) in enumerate(FACES):
+        u, v = [other for other in range(3) if other != axis]
+        covers = ((b_min[:, u] <= a_min[:, u]) & (b_max[:, u] >= a_max[:, u]) &
+                  (b_min[:, v] <= a_min[:, v]) & (b_max[:, v] >= a_max[:, v]))
+        if direction > 0:
+            plane = a_max[:, axis]
+            covers &= (b_min[:, axis] <= plane) & (plane < b_max[:, axis])
+        else:
+            plane = a_min[:, axis]
+            covers &= (b_min[:, axis] < plane) & (plane <= b_max[:, axis])
+        hidden[a[covers], face] = True
+    return hidden
+
+
+class StaticChunk:
+    """The merged vertex and index buffers for the static platforms in one chunk of the level."""
+    def __init__(self):
+        self.platforms = []
+        self.vbo = self.ibo = self.vao = None
+        self.index_count = 0
+        self.min_bound = np.zeros(3, dtype='f4')
+        self.max_bound = np.zeros(3, dtype='f4')
+        self.dirty = True
+
+    def release(self):
+        if self.vao is not None:
+            self.vao.release()
+            self.vbo.release()
+            self.ibo.release()
+            self.vbo = self.ibo = self.vao = None
+
+
+class StaticGeometry:
+    """Bakes platforms that never move into world-space meshes, one per chunk of the level.
+
+    Every chunk is a single draw call with a single vertex/index buffer. The
+    texture layers are baked into the vertices, so chunks mix materials
+    freely. Faces hidden by a touching static platform are dropped when
+    baking. Chunks are only rebuilt when a platform in or next to them is
+    added or removed.
+    """
+    def __init__(self, ctx, resources, materials, chunk_size=64.0):
+        self.ctx = ctx
+        self.resources = resources
+        self.materials = materials
+        self.chunk_size = chunk_size
+        self.program = resources.acquire_program(STATIC_VERTEX_SHADER, STATIC_FRAGMENT_SHADER)
+        self.chunks = {}  # (i, k) chunk cell -> StaticChunk
+        self.chunk_of = {}  # platform -> chunk cell
+        self.bounds = {}  # platform -> world bounds when it was added, so removal dirties the right chunks
+        self.layers = {}  # platform -> (top, side) texture layer indices
+        self.geometry = {}  # Platform.mesh_key() -> (6, 4, 8) local face vertices
+        self.max_extent = 0.0  # Widest platform footprint, bounds the chunks one platform can touch
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.chunk_of)
+
+    def __contains__(self, platform):
+        return platform in self.chunk_of
+
+    def chunk_key(self, platform):
+        return self.chunk_key_at(platform.position[0], platform.position[2])
+
+    def add(self, platform):
+        key = self.chunk_key(platform)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = StaticChunk()
+        chunk.platforms.append(platform)
+        chunk.dirty = True
+        self.chunk_of[platform] = key
+        self.bounds[platform] = bounds = platform.world_bounds()
+        self.layers[platform] = (self.materials.layer(platform.texture_path),
+                                 self.materials.layer(platform.side_texture_path))
+        self.max_extent = max(self.max_extent, platform.width, platform.length)
+        self.mark_dirty(*bounds)
+
+    def remove(self, platform):
+        key = self.chunk_of.pop(platform)
+        chunk = self.chunks[key]
+        chunk.platforms.remove(platform)
+        chunk.dirty = True
+        if not chunk.platforms:
+            chunk.release()
+            del self.chunks[key]
+        del self.layers[platform]
+        self.materials.release_layer(platform.texture_path)
+        self.materials.release_layer(platform.side_texture_path)
+        self.mark_dirty(*self.bounds.pop(platform))
+
+    def mark_dirty(self, min_bound, max_bound):
+        """Schedule a rebuild of the chunks touching this box, since their hidden faces may change."""
+        self.dirty = True
+        tolerance = CollisionWorld.TOLERANCE
+        low = self.chunk_key_at(min_bound[0] - self.max_extent, min_bound[2] - self.max_extent)
+        high = self.chunk_key_at(max_bound[0] + self.max_extent, max_bound[2] + self.max_extent)
+        for i in range(low[0], high[0] + 1):
+            for k in range(low[1], high[1] + 1):
+                chunk = self.chunks.get((i, k))
+                if chunk is None or chunk.dirty:
+                    continue
+                if ((chunk.min_bound <= max_bound + tolerance).all() and
+                        (chunk.max_bound >= min_bound - tolerance).all()):
+                    chunk.dirty = True
+
+    def chunk_key_at(self, x, z):
+        return floor(x / self.chunk_size), floor(z / self.chunk_size)
+
+    def local_faces(self, platform):
+        key = platform.mesh_key()
+        faces = self.geometry.get(key)
+        if faces is None:
+            vertices, _ = platform.build_geometry()
+            faces = self.geometry[key] = vertices.reshape(6, 4, 8)
+        return faces
+
+    def build(self, profiler=NULL_PROFILER):
+        """Rebuild the dirty chunks; called by the renderer before each frame."""
+        if not self.dirty:
+            return
+        dirty = [chunk for chunk in self.chunks.values() if chunk.dirty]
+        if len(dirty) == len(self.chunks):
+            platforms = list(self.bounds)
+        else:
+            # Only platforms close enough to touch one in a dirty chunk can hide its faces
+            reach = ceil(self.max_extent / self.chunk_size)
+            nearby = {(i + di, k + dk) for (i, k), chunk in self.chunks.items() if chunk.dirty
+                      for di in range(-reach, reach + 1) for dk in range(-reach, reach + 1)}
+            platforms = [platform for key in nearby if key in self.chunks for platform in self.chunks[key].platforms]
+        min_bounds = np.array([self.bounds[platform][0] for platform in platforms], dtype='f4').reshape(-1, 3)
+        max_bounds = np.array([self.bounds[platform][1] for platform in platforms], dtype='f4').reshape(-1, 3)
+        hidden = dict(zip(platforms, hidden_faces(min_bounds, max_bounds)))
+        for chunk in dirty:
+            self.build_chunk(chunk, hidden, profiler)
+        self.dirty = False
+
+    def build_chunk(self, chunk, hidden, profiler=NULL_PROFILER):
+        chunk.release()
+        platforms = chunk.platforms
+        faces = np.stack([self.local_faces(platform) for platform in platforms])  # (M, 6, 4, 8)
+        visible = ~np.stack([hidden[platform] for platform in platforms])  # (M, 6)
+        positions = np.array([platform.position for platform in platforms], dtype='f4')
+        layers = np.array([self.layers[platform] for platform in platforms], dtype='f4')
+
+        vertices = np.empty(faces.shape[:3] + (VERTEX_FLOATS,), dtype='f4')
+        vertices[..., :8] = faces
+        vertices[..., :3] += positions[:, None, None, :]
+        vertices[..., 8:] = layers[:, None, None, :]
+        vertices = vertices[visible]  # (F, 4, VERTEX_FLOATS) for the F faces kept
+        indices = (np.arange(len(vertices), dtype='i4')[:, None] * 4 + FACE_INDICES).ravel()
+
+        world_min = positions + np.array([platform.min_bound for platform in platforms], dtype='f4')
+        world_max = positions + np.array([platform.max_bound for platform in platforms], dtype='f4')
+        chunk.min_bound, chunk.max_bound = world_min.min(axis=0), world_max.max(axis=0)
+        chunk.index_count = len(indices)
+        chunk.dirty = False
+        if not len(indices):
+            return  # Completely enclosed by neighbours
+        chunk.vbo = self.ctx.buffer(vertices.tobytes())
+        chunk.ibo = self.ctx.buffer(indices.tobytes())
+        chunk.vao = self.create_vao(chunk)
+        profiler.count('buffer_uploads', 2)
+        profiler.count('upload_bytes', vertices.nbytes + indices.nbytes)
+
+    def create_vao(self, chunk):
+        return self.ctx.vertex_array(self.program, [(chunk.vbo, VERTEX_FORMAT) + VERTEX_ATTRIBUTES],
+                                     index_buffer=chunk.ibo)
+
+    def set_program(self, program):
+        """Draw with a recompiled program; only the vertex arrays are rebuilt, not the baked buffers."""
+        self.program = program
+        for chunk in self.chunks.values():
+            if chunk.vao is not None:
+                chunk.vao.release()
+                chunk.vao = self.create_vao(chunk)
+
+    def visible_chunks(self, frustum=None):
+        chunks = [chunk for chunk in self.chunks.values() if chunk.vao is not None]
+        if frustum is None or not chunks:
+            return chunks
+        mask = frustum.test_aabbs(np.array([chunk.min_bound for chunk in chunks]),
+                                  np.array([chunk.max_bound for chunk in chunks]))
+        return [chunk for chunk, inside in zip(chunks, mask) if inside]
+
+    def render(self, frustum=None, profiler=NULL_PROFILER):
+        """Draw the static chunks (inside ``frustum`` if given); returns the platforms submitted.
+
+        Camera and light come from the shared uniform buffer (see render_state.py).
+        """
+        chunks = self.visible_chunks(frustum)
+        if not chunks:
+            return 0
+        submitted = 0
+        for chunk in chunks:
+            chunk.vao.render(moderngl.TRIANGLES, vertices=chunk.index_count)
+            profiler.count('draw_calls')
+            submitted += len(chunk.platforms)
+        return submitted
+
+    def draw_calls(self):
+        return sum(1 for chunk in self.chunks.values() if chunk.index_count)
+
+    def release(self):
+        for chunk in self.chunks.values():
+            chunk.release()
+        self.chunks.clear()
+        self.chunk_of.clear()
+        self.bounds.clear()
+        self.layers.clear()
+        self.resources.release_program(STATIC_VERTEX_SHADER, STATIC_FRAGMENT_SHADER)
@@ -0,0 +1,209 @@
+"""Chunked scenes on disk and a manager that streams them in around the player.
+
+A scene is partitioned into square XZ chunks, each written as a binary
+scene file, plus a ``manifest.json`` listing every chunk's bounds:
+
+    python streaming.py scenes/big.json scenes/big_chunks [chunk_size]
+
+``RyanEngine`` streams a scene when given the chunk directory instead of a
+scene file.
+"""
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from math import floor
+import numpy as np
+
+from assets import AssetLoader
+from scene_format import SceneData, load_scene_data, read_binary, write_binary
+
+MANIFEST = 'manifest.json'
+MANIFEST_VERSION = 1
+# Rough resident cost of one platform: baked vertices and indices, collision and grid entries
+PLATFORM_BYTES = 24 * 10 * 4 + 36 * 4 + 256
+
+
+def partition_scene(scene_file, directory, chunk_size=64.0):
+    """Split a scene into chunk files plus a manifest in ``directory``; returns the manifest."""
+    scene = load_scene_data(scene_file)
+    os.makedirs(directory, exist_ok=True)
+    min_bounds, max_bounds = scene.bounds()
+    keys = np.floor(scene.positions[:, [0, 2]] / chunk_size).astype(np.int64)
+    chunks = []
+    for key in np.unique(keys, axis=0).tolist():
+        members = np.flatnonzero((keys == key).all(axis=1))
+        used = np.unique(scene.texture_indices[members])
+        remap = np.zeros(len(scene.texture_paths), dtype='i4')
+        remap[used] = np.arange(len(used))
+        chunk_scene = SceneData(scene.positions[members], scene.sizes[members],
+                                remap[scene.texture_indices[members]], [scene.texture_paths[i] for i in used],
+                                flags=scene.flags[members])
+        name = f'chunk_{key[0]}_{key[1]}.pqs'
+        write_binary(chunk_scene, os.path.join(directory, name))
+        chunks.append({'key': key, 'file': name, 'platforms': len(members),
+                       'min': min_bounds[members].min(axis=0).tolist(), 'max': max_bounds[members].max(axis=0).tolist()})
+    manifest = {'version': MANIFEST_VERSION, 'chunk_size': chunk_size, 'player': scene.player, 'chunks': chunks}
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    scene.close()
+    return manifest
+
+
+def load_chunk(path):
+    """Worker-side chunk load: map the file and compute its platform bounds."""
+    scene = read_binary(path)
+    return scene, scene.bounds()
+
+
+class StreamedChunk:
+    """One chunk of the manifest and its residency state."""
+    __slots__ = ('key', 'path', 'min_bound', 'max_bound', 'platform_count', 'state', 'platforms', 'last_used')
+
+    def __init__(self, key, path, min_bound, max_bound, platform_count):
+        self.key = key
+        self.path = path
+        self.min_bound = min_bound
+        self.max_bound = max_bound
+        self.platform_count = platform_count
+        self.state = 'unloaded'  # 'unloaded', 'loading' or 'resident'
+        self.platforms = []
+        self.last_used = 0.0
+
+    def nbytes(self):
+        return self.platform_count * PLATFORM_BYTES
+
+    def distance(self, x, z):
+        """Horizontal distance from (x, z) to the chunk's bounds."""
+        dx = max(self.min_bound[0] - x, 0.0, x - self.max_bound[0])
+        dz = max(self.min_bound[2] - z, 0.0, z - self.max_bound[2])
+        return (dx * dx + dz * dz) ** 0.5
+
+
+class ChunkStreamer:
+    """Keeps the chunks within ``radius`` of the player resident in a World (and renderer).
+
+    ``update`` queues missing chunks on a worker thread, adds finished ones to
+    the world within ``integrate_budget`` seconds per call, and evicts the
+    least recently needed chunks outside the radius once the resident set
+    exceeds ``budget_bytes``. Textures are reference counted by the
+    renderer's MaterialLibrary, so they go when their last chunk does.
+    """
+    def __init__(self, world, directory, renderer=None, resources=None, radius=96.0,
+                 budget_bytes=32 * 1024 * 1024, integrate_budget=0.004, loader=None):
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"{directory} has an unsupported chunk manifest")
+        self.world = world
+        self.renderer = renderer
+        self.resources = resources
+        self.radius = radius
+        self.budget_bytes = budget_bytes
+        self.integrate_budget = integrate_budget
+        self.loader = loader if loader is not None else AssetLoader(max_workers=2)
+        self.chunk_size = manifest['chunk_size']
+        self.player = manifest['player']
+        self.chunks = {tuple(c['key']): StreamedChunk(tuple(c['key']), os.path.join(directory, c['file']),
+                                                      c['min'], c['max'], c['platforms'])
+                       for c in manifest['chunks']}
+        self.resident = OrderedDict()  # key -> chunk, least recently needed first
+        self.loads = 0
+        self.evictions = 0
+
+    def wanted(self, position):
+        """Chunks within the streaming radius of ``position``, nearest first."""
+        x, z = float(position[0]), float(position[2])
+        reach = self.radius + self.chunk_size
+        i0, i1 = floor((x - reach) / self.chunk_size), floor((x + reach) / self.chunk_size)
+        k0, k1 = floor((z - reach) / self.chunk_size), floor((z + reach) / self.chunk_size)
+        found = []
+        for i in range(i0, i1 + 1):
+            for k in range(k0, k1 + 1):
+                chunk = self.chunks.get((i, k))
+                if chunk is not None:
+                    distance = chunk.distance(x, z)
+                    if distance <= self.radius:
+                        found.append((distance, chunk))
+        found.sort(key=lambda item: item[0])
+        return [chunk for _, chunk in found]
+
+    def update(self, position):
+        """Request, integrate and evict chunks for a player at ``position``."""
+        now = time.perf_counter()
+        for chunk in self.wanted(position):
+            chunk.last_used = now
+            if chunk.state == 'unloaded':
+                chunk.state = 'loading'
+                self.loader.submit(chunk.key, chunk.path, load_chunk)
+            elif chunk.state == 'resident':
+                self.resident.move_to_end(chunk.key)
+
+        deadline = now + self.integrate_budget
+        while self.loader.in_flight:
+            done = self.loader.poll()
+            if done is None:
+                break
+            self.integrate(*done)
+            if time.perf_counter() >= deadline:
+                break
+        self.evict(now)
+
+    def wait(self, position):
+        """Block until every chunk within the radius of ``position`` is resident."""
+        self.update(position)
+        while self.loader.in_flight:
+            self.integrate(*self.loader.poll(block=True))
+
+    def integrate(self, key, loaded):
+        scene, bounds = loaded
+        chunk = self.chunks[key]
+        chunk.platforms = self.world.add_scene(scene, self.resources, bounds)
+        scene.close()
+        if self.renderer is not None:
+            for platform in chunk.platforms:
+                self.renderer.add(platform)
+        chunk.state = 'resident'
+        self.resident[key] = chunk
+        self.loads += 1
+
+    def resident_bytes(self):
+        return sum(chunk.nbytes() for chunk in self.resident.values())
+
+    def evict(self, now):
+        """Unload least recently needed chunks outside the radius while over the memory budget."""
+        total = self.resident_bytes()
+        while total > self.budget_bytes and self.resident:
+            chunk = next(iter(self.resident.values()))
+            if chunk.last_used == now:
+                break  # Everything left is in range
+            self.unload(chunk)
+            total -= chunk.nbytes()
+
+    def unload(self, chunk):
+        del self.resident[chunk.key]
+        if self.renderer is not None:
+            for platform in chunk.platforms:
+                self.renderer.remove(platform)
+        self.world.remove_platforms(chunk.platforms)
+        for platform in chunk.platforms:
+            platform.release()
+        chunk.platforms = []
+        chunk.state = 'unloaded'
+        self.evictions += 1
+
+    def stats(self):
+        return {'chunks': len(self.chunks), 'resident': len(self.resident), 'loading': self.loader.in_flight,
+                'resident_bytes': self.resident_bytes(), 'loads': self.loads, 'evictions': self.evictions}
+
+    def shutdown(self):
+        self.loader.shutdown()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.exit("usage: python streaming.py <scene file> <chunk directory> [chunk_size]")
+    chunk_size = float(sys.argv[3]) if len(sys.argv) == 4 else 64.0
+    manifest = partition_scene(sys.argv[1], sys.argv[2], chunk_size)
+    print(f"Wrote {len(manifest['chunks'])} chunks of {chunk_size:g} units to {sys.argv[2]}")
@@ -0,0 +1,55 @@
+"""Synthetic scenes shared by the benchmarks and the tests.
+
+``generate_scene`` writes a scene file with textures to disk;
+``random_platforms`` builds platforms and their CollisionWorld in memory.
+"""
+import json
+import os
+import numpy as np
+from PIL import Image
+
+
+def generate_scene(directory, platform_count, texture_count, texture_size=64, seed=0):
+    """Write a scene with a square grid of platforms and random textures; return its path."""
+    rng = np.random.default_rng(seed)
+    texture_paths = []
+    for i in range(texture_count):
+        pixels = rng.integers(0, 256, (texture_size, texture_size, 3), dtype=np.uint8)
+        path = os.path.join(directory, f'texture_{i}.png')
+        Image.fromarray(pixels, 'RGB').save(path)
+        texture_paths.append(path)
+
+    side = int(np.ceil(np.sqrt(platform_count)))
+    platforms = []
+    for i in range(platform_count):
+        row, column = divmod(i, side)
+        platforms.append({
+            'position': [(column - side / 2) * 8.0, float(rng.integers(-2, 3)), -(row - side / 2) * 8.0],
+            'texture_top': texture_paths[i % texture_count],
+            'texture_side': texture_paths[(i + 1) % texture_count],
+        })
+    scene = {
+        'platforms': platforms,
+        'player': {'position': [0.0, 5.0, 0.0], 'velocity': [0.0, 0.0, 0.0], 'rotation': [0.0, 0.0, 0.0]},
+    }
+    path = os.path.join(directory, 'synthetic.json')
+    with open(path, 'w') as f:
+        json.dump(scene, f)
+    return path
+
+
+def random_platforms(count, rng):
+    """Default-sized platforms scattered over a square of about 8 units per platform, and their CollisionWorld."""
+    from collision import CollisionWorld
+    from platform import Platform
+
+    half = 4 * count ** 0.5
+    positions = np.column_stack((rng.uniform(-half, half, count), rng.uniform(-2.0, 2.0, count),
+                                 rng.uniform(-half, half, count))).astype('f4')
+    platforms = [Platform(None, None, position=position) for position in positions]
+    world = CollisionWorld()
+    bounds = [platform.world_bounds() for platform in platforms]
+    collision_ids = world.add_many(np.array([low for low, _ in bounds]), np.array([high for _, high in bounds]))
+    for platform, collision_id in zip(platforms, collision_ids.tolist()):
+        platform.collision_id = collision_id
+    return platforms, world
@@ -0,0 +1,31 @@
+"""Shared test setup. Run from the repository root with ``pytest tests``.
+
+The engine is a set of top-level modules, one of which (``platform.py``)
+shadows the standard library module pytest has already imported. The
+repository root goes first on ``sys.path`` and ``platform`` is imported
+again from there, which is how the modules resolve when run as scripts.
+(``python -m pytest`` from the root cannot work: the shadowing happens
+before pytest starts.)
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.modules.pop('platform', None)
+import platform  # noqa: E402,F401  (the engine's Platform module)
+
+from synthetic import random_platforms  # noqa: E402
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def random_world(rng):
+    """``random_world(count)`` -> ``(platforms, CollisionWorld)``, laid out as in the benchmarks."""
+    return lambda count: random_platforms(count, rng)
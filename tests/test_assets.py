@@ -0,0 +1,52 @@
+"""TextureCache hits and pruning."""
+import os
+import time
+import numpy as np
+from PIL import Image
+
+from assets import TextureCache, decode_image
+
+
+def write_texture(path, value, size=16):
+    Image.fromarray(np.full((size, size, 3), value, dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def age(path, seconds):
+    modified = time.time() - seconds
+    os.utime(path, (modified, modified))
+
+
+def test_hit_matches_decode(tmp_path):
+    texture = write_texture(tmp_path / 'a.png', 10)
+    TextureCache(tmp_path / 'cache').decode(texture)
+    cache = TextureCache(tmp_path / 'cache')
+    assert np.array_equal(cache.decode(texture), decode_image(texture))
+    assert cache.stats() == {'hits': 1, 'misses': 0, 'pruned': 0}
+
+
+def test_prune_expired(tmp_path):
+    directory = tmp_path / 'cache'
+    cache = TextureCache(directory)
+    cache.decode(write_texture(tmp_path / 'old.png', 1))
+    cache.decode(write_texture(tmp_path / 'new.png', 2))
+    old, new = sorted(directory.iterdir(), key=lambda entry: entry.stat().st_mtime)
+    age(old, 60.0)
+    assert TextureCache(directory, max_age=30.0).pruned == 1
+    assert list(directory.iterdir()) == [new]
+
+
+def test_prune_least_recently_used(tmp_path):
+    directory = tmp_path / 'cache'
+    cache = TextureCache(directory)
+    textures = [write_texture(tmp_path / f'{i}.png', i) for i in range(4)]
+    for texture in textures:
+        cache.decode(texture)
+    for seconds, entry in zip((40.0, 30.0, 20.0, 10.0), sorted(directory.iterdir())):
+        age(entry, seconds)
+    cache.decode(textures[0])  # A hit makes it the most recently used
+    entry_size = next(directory.iterdir()).stat().st_size
+    cache = TextureCache(directory, max_bytes=2 * entry_size)
+    assert cache.pruned == 2
+    assert len(list(directory.iterdir())) == 2
+    assert cache.decode(textures[0]) is not None and cache.hits == 1
@@ -0,0 +1,79 @@
+"""CollisionWorld against the per-platform rules it replaced (``Platform.check_collision``)."""
+import numpy as np
+
+from player import Player
+
+
+def scalar_resolve(platforms, player):
+    """The original collision loop: the first platform that reports a hit resolves the player."""
+    for platform in platforms:
+        if platform.check_collision(player):
+            return True
+    player.grounded = False
+    return False
+
+
+def test_resolve_player_matches_platform_loop(random_world, rng):
+    platforms, world = random_world(200)
+    for _ in range(5000):
+        start = platforms[rng.integers(len(platforms))].position + rng.uniform(-5.0, 5.0, 3).astype('f4')
+        grounded = bool(rng.integers(2))
+        reference, vectorized = Player(start, [0.0, 1.0, 0.0]), Player(start, [0.0, 1.0, 0.0])
+        reference.grounded = vectorized.grounded = grounded
+        scalar_resolve(platforms, reference)
+        if not world.resolve_player(vectorized):
+            vectorized.grounded = False
+        assert np.array_equal(reference.position, vectorized.position), start
+        assert reference.grounded == vectorized.grounded, start
+
+
+def test_resolve_bodies_matches_resolve(random_world, rng):
+    # The cell-index broad phase must pick the same first box as the brute-force pass
+    platforms, world = random_world(400)
+    starts = np.array([platform.position for platform in platforms], dtype='f4')[rng.integers(400, size=1000)]
+    positions = starts + rng.uniform(-5.0, 5.0, (1000, 3)).astype('f4')
+    half_extents = np.array([0.3, 0.6, 0.3])
+    grounded = rng.random(1000) < 0.5
+    brute_positions, brute_grounded = positions.copy(), grounded.copy()
+    collided = world.resolve_bodies(positions, half_extents, grounded)
+    brute_collided = world.resolve(brute_positions, half_extents, brute_grounded)
+    assert collided.any()
+    assert np.array_equal(collided, brute_collided)
+    assert np.array_equal(positions, brute_positions)
+    assert np.array_equal(grounded, brute_grounded)
+
+
+def test_removed_slots_reused_keep_world_order(rng):
+    # Re-added platforms land in freed low slots; both paths must still prefer the earlier-added box
+    from platform import Platform
+    from world import World
+
+    world = World()
+
+    def add_block(count):
+        for position in rng.uniform(-6.0, 6.0, (count, 3)):
+            world.add_platform(Platform(None, 'top.png', width=4.0, length=4.0, height=2.0, position=position))
+
+    add_block(40)
+    world.remove_platforms(world.platforms[:20:2])
+    add_block(10)
+    reused = [platform.collision_id for platform in world.platforms[-10:]]
+    assert max(reused) < 20  # The new boxes took the freed slots
+
+    world.player = Player([0.0, 0.0, 0.0], [0.0, 1.0, 0.0])
+    half_extents = np.array([world.player.width, world.player.height, world.player.length]) / 2
+    positions = rng.uniform(-8.0, 8.0, (500, 3)).astype('f4')
+    grounded = rng.random(500) < 0.5
+    bodies, body_grounded = positions.copy(), grounded.copy()
+    collided = world.collision.resolve_bodies(bodies, half_extents, body_grounded)
+    body_grounded &= collided  # check_collisions clears grounded when nothing was hit
+    brute = positions.copy()
+    world.collision.resolve(brute, half_extents, grounded.copy())
+    assert collided.sum() > 100
+    assert np.array_equal(bodies, brute)
+    for position, was_grounded, body, body_was_grounded in zip(positions, grounded, bodies, body_grounded):
+        world.player.position[:] = position
+        world.player.grounded = bool(was_grounded)
+        world.check_collisions()
+        assert np.array_equal(world.player.position, body), position
+        assert world.player.grounded == body_was_grounded, position
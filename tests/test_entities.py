@@ -0,0 +1,52 @@
+"""EntityBatch against Player objects stepped one at a time with the same commands."""
+import numpy as np
+
+from entities import EntityBatch
+from player import Player
+
+DELTA_TIME = 1 / 60
+
+
+def random_commands(rng, count):
+    return (rng.integers(-1, 2, count).astype('f4'), rng.integers(-1, 2, count).astype('f4'),
+            rng.random(count) < 0.1, np.where(rng.random(count) < 0.3, rng.uniform(-20, 20, count), 0.0),
+            np.where(rng.random(count) < 0.3, rng.uniform(-20, 20, count), 0.0))
+
+
+def test_batch_matches_players(random_world, rng):
+    platforms, world = random_world(400)
+    centers = np.array([platform.position for platform in platforms], dtype='f4')
+    starts = centers[rng.integers(len(centers), size=200)] + rng.uniform(-3.0, 3.0, (200, 3)).astype('f4')
+    starts[:, 1] += 2.0
+    players = [Player(start, [0.0, 1.0, 0.0]) for start in starts]
+    batch = EntityBatch(capacity=16)  # Small capacity exercises growth
+    batch.spawn_many(starts)
+    for _ in range(300):
+        forward, right, jump, look_x, look_y = random_commands(rng, len(players))
+        for i, player in enumerate(players):  # The World.step sequence for each player
+            player.previous_position[:] = player.position
+            player.update_velocity(int(forward[i]), int(right[i]), DELTA_TIME)
+            if jump[i]:
+                player.jump()
+            if look_x[i] or look_y[i]:
+                player.process_mouse_movement(float(look_x[i]), float(look_y[i]))
+            player.apply_gravity(DELTA_TIME)
+            if not world.resolve_player(player):
+                player.grounded = False
+        batch.forward[:200], batch.right[:200], batch.jump[:200] = forward, right, jump
+        batch.look_x[:200], batch.look_y[:200] = look_x, look_y
+        batch.step(DELTA_TIME, world)
+    assert np.array_equal(np.array([player.position for player in players]), batch.positions[:200])
+    assert [player.grounded for player in players] == batch.grounded[:200].tolist()
+    assert batch.grounded[:200].any()
+
+
+def test_despawned_slots_are_reused():
+    batch = EntityBatch(capacity=2)
+    first = batch.spawn((0.0, 0.0, 0.0))
+    batch.spawn_many(np.zeros((3, 3), dtype='f4'))
+    batch.despawn(first)
+    assert len(batch) == 3
+    assert batch.spawn((1.0, 2.0, 3.0)) == first
+    assert batch.positions[first].tolist() == [1.0, 2.0, 3.0]
+    assert len(batch) == 4
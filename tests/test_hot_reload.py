@@ -0,0 +1,195 @@
+"""Hot reload: scene diffs applied to a headless World, and shader reloads in an offscreen engine."""
+import json
+import os
+import shutil
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from hot_reload import HotReloader, diff_scene
+from world import World
+
+TOP = os.path.join(ROOT, 'textures', 'placeholder_top.png')
+SIDE = os.path.join(ROOT, 'textures', 'placeholder_side.png')
+
+
+class DrawList:
+    """Stands in for the renderer: records which platforms would be drawn."""
+    def __init__(self):
+        self.drawn = set()
+
+    def add(self, platform):
+        self.drawn.add(platform)
+
+    def remove(self, platform):
+        self.drawn.remove(platform)
+
+    def update(self, platform):
+        assert platform in self.drawn
+
+
+class HeadlessEngine:
+    """The parts of RyanEngine that HotReloader uses, around a collision-only World."""
+    def __init__(self, scene_file):
+        self.world = World()
+        self.world.load_scene(scene_file)
+        self.resources = None
+        self.renderer = DrawList()
+        for platform in self.world.platforms:
+            self.renderer.add(platform)
+
+    def move_platform(self, platform, position):
+        self.world.move_platform(platform, position)
+        self.renderer.update(platform)
+
+
+def platform(x, z=0.0, y=0.0, dynamic=False, texture=TOP):
+    return {'position': [x, y, z], 'texture_top': texture, 'texture_side': SIDE, 'dynamic': dynamic}
+
+
+def write_scene(path, platforms):
+    path.write_text(json.dumps({'platforms': platforms}))
+
+
+def scene_state(world):
+    """Sorted platform records, checked against the collision and spatial indices they must agree with."""
+    assert len(world.spatial) == len(world.platforms) == len(world.collision)
+    records = []
+    for item in world.platforms:
+        min_bound, max_bound = item.world_bounds()
+        assert item in world.spatial
+        assert np.array_equal(world.collision.min_bounds[item.collision_id], min_bound)
+        assert np.array_equal(world.collision.max_bounds[item.collision_id], max_bound)
+        records.append((tuple(item.position.tolist()), (item.width, item.height, item.length),
+                        item.texture_path, item.side_texture_path, bool(item.dynamic)))
+    return sorted(records)
+
+
+def reload(tmp_path, before, after):
+    """Load ``before``, rewrite the file as ``after`` and hot-reload it; returns the engine and the counts."""
+    scene_file = tmp_path / 'scene.json'
+    write_scene(scene_file, before)
+    engine = HeadlessEngine(str(scene_file))
+    reloader = HotReloader(engine, str(scene_file), shader_files=())
+    write_scene(scene_file, after)
+    counts = reloader.reload_scene()
+    fresh = World()
+    fresh.load_scene(str(scene_file))
+    assert scene_state(engine.world) == scene_state(fresh)
+    assert engine.renderer.drawn == set(engine.world.platforms)
+    return engine, counts
+
+
+def test_added_and_removed(tmp_path):
+    before = [platform(8.0 * i) for i in range(6)]
+    after = before[:2] + before[4:] + [platform(100.0), platform(108.0, texture=SIDE)]
+    engine, counts = reload(tmp_path, before, after)
+    assert counts == (2, 0, 2)
+
+
+def test_unchanged_scene_is_a_no_op(tmp_path):
+    before = [platform(8.0 * i, dynamic=i % 2 == 0) for i in range(6)]
+    engine, counts = reload(tmp_path, before, before)
+    assert counts == (0, 0, 0)
+
+
+def test_dynamic_platforms_move_in_place(tmp_path):
+    before = [platform(8.0 * i, dynamic=True) for i in range(4)] + [platform(-8.0)]
+    after = [dict(item, position=[item['position'][0], 2.0, 1.0]) for item in before[:2]] + before[2:]
+    scene_file = tmp_path / 'scene.json'
+    write_scene(scene_file, before)
+    engine = HeadlessEngine(str(scene_file))
+    originals = list(engine.world.platforms[:2])
+    reloader = HotReloader(engine, str(scene_file), shader_files=())
+    write_scene(scene_file, after)
+    assert reloader.reload_scene() == (0, 2, 0)
+    assert all(item in engine.world.platforms for item in originals)  # Same objects, only moved
+    assert sorted(tuple(item.position.tolist()) for item in originals) == [(0.0, 2.0, 1.0), (8.0, 2.0, 1.0)]
+    fresh = World()
+    fresh.load_scene(str(scene_file))
+    assert scene_state(engine.world) == scene_state(fresh)
+
+
+def test_duplicate_records(tmp_path):
+    twin = platform(0.0)
+    _, counts = reload(tmp_path, [twin, twin, twin, platform(8.0)], [twin, twin, platform(8.0)])
+    assert counts == (0, 0, 1)
+    _, counts = reload(tmp_path, [twin, platform(8.0)], [twin, twin, twin, platform(8.0)])
+    assert counts == (2, 0, 0)
+
+
+def test_static_platform_is_recreated_when_moved_or_made_dynamic(tmp_path):
+    before = [platform(0.0), platform(8.0), platform(16.0)]
+    after = [platform(0.0, y=3.0), platform(8.0, dynamic=True), platform(16.0)]
+    engine, counts = reload(tmp_path, before, after)
+    assert counts == (2, 0, 2)  # Baked platforms cannot move: both are removed and added again
+    assert [item.dynamic for item in engine.world.platforms if item.position[0] == 8.0] == [True]
+
+
+def test_diff_pairs_moved_dynamic_platforms_in_file_order():
+    loaded = {'a': b'\0' * 12 + b'shape', 'b': b'\1' * 12 + b'shape', 'c': b'\2' * 12 + b'other'}
+    new_keys = [b'\3' * 12 + b'shape', b'\4' * 12 + b'shape', b'\2' * 12 + b'other']
+    added, moved, removed = diff_scene(loaded, new_keys, lambda item: item != 'c')
+    assert (added, moved, removed) == ([], [('a', 0), ('b', 1)], [])
+
+
+@pytest.mark.parametrize('contents', ['{"platforms": [{"position": [0.0, 0.0', '', '{"platforms": [{}]}'])
+def test_invalid_scene_file_leaves_the_world_unchanged(tmp_path, contents):
+    scene_file = tmp_path / 'scene.json'
+    write_scene(scene_file, [platform(8.0 * i) for i in range(3)])
+    engine = HeadlessEngine(str(scene_file))
+    before = scene_state(engine.world)
+    reloader = HotReloader(engine, str(scene_file), shader_files=())
+    scene_file.write_text(contents)  # A half-saved file, as an editor may leave it
+    assert reloader.reload_scene() is None
+    assert scene_state(engine.world) == before
+    assert engine.renderer.drawn == set(engine.world.platforms)
+
+
+def test_poll_reloads_changed_scene(tmp_path):
+    scene_file = tmp_path / 'scene.json'
+    write_scene(scene_file, [platform(0.0)])
+    engine = HeadlessEngine(str(scene_file))
+    reloader = HotReloader(engine, str(scene_file), shader_files=())
+    write_scene(scene_file, [platform(0.0), platform(8.0)])
+    os.utime(scene_file, ns=(0, reloader.mtimes[str(scene_file)] + 1))
+    reloader.poll(now=reloader.next_check)
+    assert len(engine.world.platforms) == 2
+
+
+def test_broken_shader_keeps_the_last_good_program(tmp_path, monkeypatch):
+    from engine import RyanEngine
+
+    shutil.copytree(os.path.join(ROOT, 'shaders'), tmp_path / 'shaders')
+    monkeypatch.chdir(tmp_path)  # Shader paths are relative, so the copies can be broken safely
+    scene_file = tmp_path / 'scene.json'
+    scene_file.write_text(json.dumps({'platforms': [platform(0.0), platform(8.0, dynamic=True)],
+                                      'player': {'position': [0.0, 5.0, 10.0], 'velocity': [0.0, 0.0, 0.0],
+                                                 'rotation': [0.0, 0.0, 0.0]}}))
+    engine = RyanEngine(120, 90, scene_file=str(scene_file), offscreen=True, async_assets=False,
+                        hot_reload=True, texture_cache=None)
+
+    def frame():
+        engine.render()
+        return np.frombuffer(engine.fbo.read(), dtype=np.uint8).copy()
+
+    try:
+        expected = frame()
+        assert len(np.unique(expected)) > 2  # Platforms in view, not just the clear colour
+        programs = engine.renderer.program, engine.renderer.static.program
+        fragment_file = os.path.join('shaders', 'fragment_shader.glsl')
+        with open(fragment_file) as f:
+            source = f.read()
+        with open(fragment_file, 'w') as f:
+            f.write(source.replace('void main() {', 'void main() { undefined_symbol;'))
+        assert not engine.renderer.reload_shaders()
+        assert (engine.renderer.program, engine.renderer.static.program) == programs
+        assert np.array_equal(frame(), expected)
+
+        with open(fragment_file, 'w') as f:
+            f.write(source + '// Edited\n')
+        assert engine.renderer.reload_shaders()
+        assert engine.renderer.program is not programs[0]
+        assert np.array_equal(frame(), expected)
+    finally:
+        engine.renderer.release()
@@ -0,0 +1,81 @@
+"""MaterialLibrary: size classes, and textures released while their decode is in flight."""
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+
+from assets import AssetLoader, decode_image
+from materials import MaterialLibrary
+
+
+@pytest.fixture
+def ctx():
+    from engine import RyanEngine
+
+    ctx = RyanEngine.create_standalone_context()
+    yield ctx
+    ctx.release()
+
+
+def texture(tmp_path, name, size):
+    path = str(tmp_path / f'{name}.png')
+    Image.new('RGB', (size, size), (size % 256, 90, 200)).save(path)
+    return path
+
+
+def used_layers(library):
+    """Layers holding an image, over every size class."""
+    return sum(img is not None for size_class in library.classes for img in size_class.images)
+
+
+def test_textures_keep_their_size_class(ctx, tmp_path):
+    library = MaterialLibrary(ctx)
+    for name, size in (('small', 64), ('large', 1024), ('odd', 40)):
+        library.layer(texture(tmp_path, name, size))
+    library.upload()
+    assert library.stats()['size_classes'] == {64: 2, 1024: 1}
+    assert library.nbytes() == (2 * 64 * 64 + 1024 * 1024) * 3
+    library.release()
+
+
+def test_layer_freed_while_loading_is_dropped(ctx, tmp_path):
+    gate = threading.Event()
+    loader = AssetLoader(max_workers=1)
+    library = MaterialLibrary(ctx, loader)
+    library.decode = lambda path: (gate.wait(), decode_image(path))[1]
+    path = texture(tmp_path, 'a', 64)
+    try:
+        library.layer(path)
+        library.release_layer(path)
+        gate.set()
+        library.wait()
+        assert used_layers(library) == 0
+        assert library.table[0, 0].tolist() == [-1.0, 0.0]  # Still the loading placeholder
+    finally:
+        loader.shutdown()
+        library.release()
+
+
+def test_rerequest_while_loading_stores_one_layer(ctx, tmp_path):
+    gate = threading.Event()
+    loader = AssetLoader(max_workers=1)
+    library = MaterialLibrary(ctx, loader)
+    library.decode = lambda path: (gate.wait(), decode_image(path))[1]
+    path = texture(tmp_path, 'a', 64)
+    try:
+        index = library.layer(path)
+        library.release_layer(path)
+        assert library.layer(path) == index  # The freed index comes straight back
+        gate.set()
+        library.wait()
+        assert library.pending == 0
+        assert used_layers(library) == 1  # The first decode's result was dropped, not stored over
+        size_class, layer = library.entries[index]
+        assert library.classes[size_class].images[layer] is not None
+
+        library.release_layer(path)
+        assert used_layers(library) == 0
+        assert library.classes[size_class].free_layers == [layer]
+    finally:
+        loader.shutdown()
+        library.release()
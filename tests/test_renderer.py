@@ -0,0 +1,65 @@
+"""InstancedRenderer culled drawing, in an offscreen engine."""
+import json
+import os
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from renderer import INDIRECT_STRIDE, INSTANCE_STRIDE
+
+TOP = os.path.join(ROOT, 'textures', 'placeholder_top.png')
+SIDE = os.path.join(ROOT, 'textures', 'placeholder_side.png')
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Dynamic platforms on a grid around the player, about half of them behind the camera."""
+    from engine import RyanEngine
+
+    monkeypatch.chdir(ROOT)  # Shader paths are relative to the repository root
+    platforms = [{'position': [x * 10.0, float((x + z) % 3), z * 10.0], 'texture_top': TOP, 'texture_side': SIDE,
+                  'dynamic': True} for x in range(-10, 10) for z in range(-10, 10)]
+    scene_file = tmp_path / 'scene.json'
+    scene_file.write_text(json.dumps({'platforms': platforms, 'player': {
+        'position': [0.5, 6.0, 0.5], 'velocity': [0.0, 0.0, 0.0], 'rotation': [-20.0, -60.0, 0.0]}}))
+    engine = RyanEngine(160, 120, scene_file=str(scene_file), offscreen=True, async_assets=False,
+                        profile=True, texture_cache=None)
+    yield engine
+    engine.renderer.release()
+
+
+def frame(engine, culling):
+    engine.culling = culling
+    engine.profiler.begin_frame()
+    engine.render()
+    engine.profiler.end_frame()
+    return np.frombuffer(engine.fbo.read(), dtype=np.uint8).copy()
+
+
+def test_culled_frame_matches_full_frame(engine):
+    renderer = engine.renderer
+    culled = frame(engine, True)
+    assert renderer.culled > 0 and renderer.submitted > 0
+    assert np.array_equal(culled, frame(engine, False))
+
+    for platform in engine.world.platforms[::7]:  # Moved while culled: the dirty slots must still be uploaded
+        engine.move_platform(platform, platform.position + np.array([1.0, 0.5, -1.0], dtype='f4'))
+    culled = frame(engine, True)
+    assert np.array_equal(culled, frame(engine, False))
+
+
+def test_culled_frame_uploads_only_draw_commands(engine):
+    frame(engine, True)
+    frame(engine, True)  # Nothing moved, so nothing but the indirect commands is written
+    uploaded = engine.profiler.frames[-1].counters['upload_bytes']
+    assert uploaded % INDIRECT_STRIDE == 0
+    assert uploaded < engine.renderer.submitted * INSTANCE_STRIDE
+
+
+def test_copy_fallback_matches_indirect(engine):
+    indirect = frame(engine, True)
+    for group in engine.renderer.groups.values():
+        group.release()
+        group.indirect = False  # As on contexts older than OpenGL 4.3
+        group.allocate(len(group.matrices))
+    assert np.array_equal(frame(engine, True), indirect)
@@ -0,0 +1,114 @@
+"""Binary scene format: round trips through JSON, both flag layouts, and damaged files."""
+import json
+import numpy as np
+import pytest
+
+from scene_format import (HEADER, HEADER_SIZE, MAGIC, FLAG_PLAYER, PLATFORM_DYNAMIC, align, load_scene_data,
+                          read_binary, scene_from_json, write_binary)
+from world import World
+
+PLAYER = {'position': [1.0, 5.0, -2.0], 'velocity': [0.5, -1.0, 0.0], 'rotation': [10.0, 45.0, 0.0]}
+
+
+def json_scene(rng, count=50, player=PLAYER):
+    textures = ['textures/placeholder_top.png', 'textures/placeholder_side.png', 'textures/é.png']
+    platforms = []
+    for i in range(count):
+        platform = {'position': rng.uniform(-100.0, 100.0, 3).tolist(), 'texture_top': textures[i % 3]}
+        if i % 2:
+            platform['size'] = rng.uniform(0.5, 10.0, 3).tolist()
+        if i % 3:
+            platform['texture_side'] = textures[(i + 1) % 3]
+        if i % 4 == 0:
+            platform['dynamic'] = True
+        platforms.append(platform)
+    data = {'platforms': platforms}
+    if player is not None:
+        data['player'] = player
+    return data
+
+
+def write_version_1(scene, path):
+    """The version 1 layout: no per-platform flags array."""
+    encoded = [p.encode('utf-8') for p in scene.texture_paths]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    player = scene.player
+    values = player['position'] + player['velocity'] + player['rotation'] if player else [0.0] * 9
+    header = HEADER.pack(MAGIC, 1, len(scene), len(encoded), offsets.nbytes + sum(map(len, encoded)),
+                         FLAG_PLAYER if player else 0, *values)
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        for array, dtype in ((scene.positions, '<f4'), (scene.sizes, '<f4'), (scene.texture_indices, '<i4')):
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            f.write(b'\0' * (align(f.tell()) - f.tell()))
+        f.write(offsets.tobytes() + b''.join(encoded))
+
+
+def assert_same_scene(loaded, expected, flags=True):
+    assert np.array_equal(loaded.positions, expected.positions)
+    assert np.array_equal(loaded.sizes, expected.sizes)
+    assert np.array_equal(loaded.texture_indices, expected.texture_indices)
+    assert loaded.texture_paths == expected.texture_paths
+    assert np.array_equal(loaded.flags, expected.flags if flags else np.zeros(len(expected), dtype='u1'))
+    if expected.player is None:
+        assert loaded.player is None
+    else:
+        assert {key: list(value) for key, value in loaded.player.items()} == expected.player
+
+
+@pytest.mark.parametrize('player', [PLAYER, None])
+def test_round_trip(tmp_path, rng, player):
+    data = json_scene(rng, player=player)
+    json_file = tmp_path / 'scene.json'
+    json_file.write_text(json.dumps(data))
+    expected = load_scene_data(str(json_file))
+    write_binary(expected, tmp_path / 'scene.pqs')
+    for loaded in (read_binary(tmp_path / 'scene.pqs'), load_scene_data(str(tmp_path / 'scene.pqs'))):
+        assert_same_scene(loaded, expected)
+        assert (loaded.flags & PLATFORM_DYNAMIC).sum() == sum(1 for p in data['platforms'] if p.get('dynamic'))
+        loaded.close()
+
+
+def test_version_1_is_read_without_flags(tmp_path, rng):
+    expected = scene_from_json(json_scene(rng))
+    write_version_1(expected, tmp_path / 'scene.pqs')
+    loaded = load_scene_data(str(tmp_path / 'scene.pqs'))
+    assert_same_scene(loaded, expected, flags=False)  # Every platform static
+    loaded.close()
+
+
+def test_worlds_match(tmp_path, rng):
+    json_file = tmp_path / 'scene.json'
+    json_file.write_text(json.dumps(json_scene(rng)))
+    write_binary(load_scene_data(str(json_file)), tmp_path / 'scene.pqs')
+    worlds = []
+    for scene_file in (json_file, tmp_path / 'scene.pqs'):
+        world = World()
+        world.load_scene(str(scene_file))
+        worlds.append(world)
+    from_json, from_binary = worlds
+    assert [(p.position.tolist(), p.width, p.height, p.length, p.texture_path, p.side_texture_path, p.dynamic)
+            for p in from_json.platforms] == \
+           [(p.position.tolist(), p.width, p.height, p.length, p.texture_path, p.side_texture_path, p.dynamic)
+            for p in from_binary.platforms]
+    assert np.array_equal(from_json.player.position, from_binary.player.position)
+    assert np.array_equal(from_json.player.rotation, from_binary.player.rotation)
+
+
+def test_bad_magic(tmp_path, rng):
+    write_binary(scene_from_json(json_scene(rng)), tmp_path / 'scene.pqs')
+    data = bytearray((tmp_path / 'scene.pqs').read_bytes())
+    data[:4] = b'PQSX'
+    (tmp_path / 'scene.pqs').write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        read_binary(tmp_path / 'scene.pqs')
+
+
+@pytest.mark.parametrize('keep', [0, 10, HEADER_SIZE, HEADER_SIZE + 100, -1])
+def test_truncated_file(tmp_path, rng, keep):
+    write_binary(scene_from_json(json_scene(rng)), tmp_path / 'scene.pqs')
+    data = (tmp_path / 'scene.pqs').read_bytes()
+    (tmp_path / 'scene.pqs').write_bytes(data[:keep])
+    with pytest.raises(ValueError):
+        read_binary(tmp_path / 'scene.pqs')
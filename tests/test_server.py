@@ -0,0 +1,62 @@
+"""Server sessions: collision modes, and the process pool against an in-process session."""
+import json
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from scene_format import SceneData
+from server import Session
+
+
+def floor_scene(thickness=0.1):
+    """One 8x8 platform at the origin, no player start."""
+    return SceneData(np.zeros((1, 3), dtype='f4'), np.array([[8.0, thickness, 8.0]], dtype='f4'),
+                     np.zeros((1, 2), dtype='i4'), ['floor.png'])
+
+
+def drop(collision_mode, tick_rate=10):
+    """Drop a player onto a thin floor at 80 units/s and return its final snapshot state."""
+    session = Session(0, floor_scene(), tick_rate, collision_mode)
+    session.spawn = (0.0, 30.0, 0.0)
+    session.join('a')
+    session.world.entities.velocities[session.players['a']] = (0.0, -80.0, 0.0)
+    for _ in range(2 * tick_rate):
+        session.step()
+    return session.snapshot()['players']['a']
+
+
+def test_swept_session_does_not_tunnel():
+    x, y, z, yaw, pitch, grounded = drop('swept')
+    assert abs(y - 0.6 - 0.1) < 0.05
+    assert grounded
+
+
+def test_discrete_session_tunnels():
+    assert drop('discrete')[1] < -10.0
+
+
+def test_unknown_collision_mode_is_rejected():
+    with pytest.raises(ValueError):
+        Session(0, floor_scene(), 20, 'continuous')
+
+
+def test_pool_matches_in_process(tmp_path):
+    # Through the CLI: worker processes are spawned, and spawning from inside pytest re-imports pytest itself
+    scene_file = tmp_path / 'scene.json'
+    scene_file.write_text('{"platforms": [{"position": [0.0, 0.0, 0.0], "texture_top": "floor.png"}]}')
+    result = subprocess.run([sys.executable, 'server.py', str(scene_file), '2', '3', '120', '1', 'swept'],
+                            cwd=ROOT, capture_output=True, text=True, check=True, timeout=120)
+    metrics = json.loads(result.stdout)
+    assert metrics['sessions'] == 2
+    assert metrics['matches_in_process']
+
+
+def test_host_rejects_unknown_collision_mode(tmp_path):
+    scene_file = tmp_path / 'scene.json'
+    scene_file.write_text('{"platforms": []}')
+    result = subprocess.run([sys.executable, 'server.py', str(scene_file), '1', '1', '1', '1', 'continuous'],
+                            cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode != 0
+    assert "unknown collision mode 'continuous'" in result.stderr
@@ -0,0 +1,137 @@
+"""UniformGrid queries against brute-force scans over every item."""
+from math import inf
+import numpy as np
+import pytest
+
+from spatial import UniformGrid
+
+
+class Box:
+    """A hashable grid item with its own bounds."""
+    def __init__(self, min_bound, max_bound):
+        self.min_bound, self.max_bound = tuple(min_bound), tuple(max_bound)
+
+
+def random_grid(rng, count=300, cell_size=4.0):
+    grid = UniformGrid(cell_size)
+    boxes = []
+    for center, size in zip(rng.uniform(-40.0, 40.0, (count, 3)), rng.uniform(0.2, 10.0, (count, 3))):
+        box = Box((center - size / 2).tolist(), (center + size / 2).tolist())
+        grid.insert(box, box.min_bound, box.max_bound)
+        boxes.append(box)
+    return grid, boxes
+
+
+def move_and_remove(grid, boxes, rng):
+    """Move a third of the boxes (some far across cells), remove a sixth; returns the live boxes in order."""
+    for box in boxes[::3]:
+        offset = rng.uniform(-1.0, 1.0, 3) * (1.0 if rng.random() < 0.5 else 30.0)
+        box.min_bound = tuple((np.array(box.min_bound) + offset).tolist())
+        box.max_bound = tuple((np.array(box.max_bound) + offset).tolist())
+        grid.update(box, box.min_bound, box.max_bound)
+    for box in boxes[1::6]:
+        grid.remove(box)
+    return [box for box in boxes if box in grid]
+
+
+def brute_aabb(boxes, min_bound, max_bound):
+    return [box for box in boxes
+            if all(box.min_bound[axis] <= max_bound[axis] and box.max_bound[axis] >= min_bound[axis]
+                   for axis in range(3))]
+
+
+def brute_raycast(boxes, origin, direction, max_distance):
+    inv_direction = tuple(1.0 / d if d != 0 else inf for d in direction)
+    best = None
+    for box in boxes:  # Insertion order, so the first box at the nearest distance wins
+        t = UniformGrid.ray_box(origin, inv_direction, box.min_bound, box.max_bound)
+        if t is not None and t <= max_distance and (best is None or t < best[1]):
+            best = box, t
+    return best
+
+
+def brute_nearest_below(boxes, min_bound, max_bound, max_distance):
+    best = None
+    for box in boxes:
+        if not (box.min_bound[0] <= max_bound[0] and box.max_bound[0] >= min_bound[0] and
+                box.min_bound[2] <= max_bound[2] and box.max_bound[2] >= min_bound[2]):
+            continue
+        gap = min_bound[1] - box.max_bound[1]
+        if 0 <= gap <= max_distance and (best is None or gap < best[1]):
+            best = box, gap
+    return best
+
+
+def rays(rng, boxes, count):
+    """Random rays, axis-aligned rays and rays that start inside a box."""
+    for _ in range(count):
+        origin = tuple(rng.uniform(-50.0, 50.0, 3).tolist())
+        yield origin, tuple(rng.normal(size=3).tolist())
+        axis_direction = [0.0, 0.0, 0.0]
+        axis_direction[rng.integers(3)] = float(rng.choice((-1.0, 1.0)) * rng.uniform(0.5, 2.0))
+        yield origin, tuple(axis_direction)
+        box = boxes[rng.integers(len(boxes))]
+        inside = tuple(((np.array(box.min_bound) + np.array(box.max_bound)) / 2).tolist())
+        yield inside, tuple(rng.normal(size=3).tolist())
+        yield inside, tuple(axis_direction)
+
+
+@pytest.mark.parametrize('changed', [False, True])
+def test_query_aabb_matches_brute_force(rng, changed):
+    grid, boxes = random_grid(rng)
+    if changed:
+        boxes = move_and_remove(grid, boxes, rng)
+    for center, size in zip(rng.uniform(-50.0, 50.0, (300, 3)), rng.uniform(0.0, 20.0, (300, 3))):
+        min_bound, max_bound = tuple((center - size / 2).tolist()), tuple((center + size / 2).tolist())
+        assert grid.query_aabb(min_bound, max_bound) == brute_aabb(boxes, min_bound, max_bound)
+
+
+@pytest.mark.parametrize('changed', [False, True])
+def test_raycast_matches_brute_force(rng, changed):
+    grid, boxes = random_grid(rng)
+    if changed:
+        boxes = move_and_remove(grid, boxes, rng)
+    hits = 0
+    for origin, direction in rays(rng, boxes, 150):
+        for max_distance in (1000.0, 15.0):
+            expected = brute_raycast(boxes, origin, direction, max_distance)
+            assert grid.raycast(origin, direction, max_distance) == expected, (origin, direction, max_distance)
+            hits += expected is not None
+    assert hits > 300
+
+
+def test_raycast_from_inside_a_box_hits_it_at_zero():
+    grid = UniformGrid(4.0)
+    outer, behind = Box((-10.0, -1.0, -1.0), (10.0, 1.0, 1.0)), Box((12.0, -1.0, -1.0), (14.0, 1.0, 1.0))
+    for box in (outer, behind):
+        grid.insert(box, box.min_bound, box.max_bound)
+    assert grid.raycast((9.0, 0.0, 0.0), (1.0, 0.0, 0.0)) == (outer, 0.0)
+    grid.remove(outer)
+    assert grid.raycast((9.0, 0.0, 0.0), (1.0, 0.0, 0.0)) == (behind, 3.0)
+    assert grid.raycast((9.0, 0.0, 0.0), (1.0, 0.0, 0.0), max_distance=2.0) is None
+    assert grid.raycast((9.0, 0.0, 0.0), (0.0, 1.0, 0.0)) is None
+
+
+@pytest.mark.parametrize('changed', [False, True])
+def test_nearest_below_matches_brute_force(rng, changed):
+    grid, boxes = random_grid(rng)
+    if changed:
+        boxes = move_and_remove(grid, boxes, rng)
+    hits = 0
+    for center, size in zip(rng.uniform(-50.0, 50.0, (300, 3)), rng.uniform(0.1, 6.0, (300, 3))):
+        min_bound, max_bound = tuple((center - size / 2).tolist()), tuple((center + size / 2).tolist())
+        for max_distance in (inf, 5.0):
+            expected = brute_nearest_below(boxes, min_bound, max_bound, max_distance)
+            assert grid.nearest_below(min_bound, max_bound, max_distance) == expected, (min_bound, max_bound)
+            hits += expected is not None
+    assert hits > 100
+
+
+def test_nearest_below_prefers_the_first_inserted_on_ties():
+    grid = UniformGrid(4.0)
+    first, second = Box((0.0, -2.0, 0.0), (2.0, 0.0, 2.0)), Box((1.0, -5.0, 1.0), (3.0, 0.0, 3.0))
+    for box in (first, second):
+        grid.insert(box, box.min_bound, box.max_bound)
+    assert grid.nearest_below((1.5, 1.0, 1.5), (1.8, 2.0, 1.8)) == (first, 1.0)
+    grid.update(first, (0.0, -3.0, 0.0), (2.0, -1.0, 2.0))
+    assert grid.nearest_below((1.5, 1.0, 1.5), (1.8, 2.0, 1.8)) == (second, 1.0)
@@ -0,0 +1,198 @@
+"""Chunk partitioning and the ChunkStreamer, against a headless World (and a real renderer for textures)."""
+import json
+import os
+import numpy as np
+import pytest
+from PIL import Image
+
+from scene_format import PLATFORM_DYNAMIC, load_scene_data, read_binary
+from streaming import MANIFEST, PLATFORM_BYTES, ChunkStreamer, partition_scene
+from world import World
+
+CHUNK_SIZE = 16.0
+COLUMNS = 12  # Platforms along x and z, two per chunk side
+SPACING = 8.0
+
+
+@pytest.fixture
+def chunk_directory(tmp_path):
+    """A 12x12 grid of 8x8 platforms, partitioned into 6x6 chunks; every chunk column has its own top texture."""
+    platforms = []
+    for i in range(COLUMNS):
+        top = str(tmp_path / f'column_{i // 2}.png')
+        for k in range(COLUMNS):
+            platforms.append({'position': [i * SPACING + 4.0, float(k % 3), k * SPACING + 4.0], 'texture_top': top,
+                              'texture_side': str(tmp_path / 'side.png'), 'dynamic': (i + k) % 5 == 0})
+    for path in {platform['texture_top'] for platform in platforms} | {str(tmp_path / 'side.png')}:
+        Image.new('RGB', (8, 8), (len(path) * 7 % 256, 80, 160)).save(path)
+    scene_file = tmp_path / 'scene.json'
+    scene_file.write_text(json.dumps({'platforms': platforms}))
+    directory = tmp_path / 'chunks'
+    partition_scene(str(scene_file), str(directory), CHUNK_SIZE)
+    return str(directory)
+
+
+def center(key):
+    return np.array([(key[0] + 0.5) * CHUNK_SIZE, 0.0, (key[1] + 0.5) * CHUNK_SIZE])
+
+
+def streamer(world, directory, chunks_in_budget=100, radius=4.0, renderer=None, resources=None):
+    # A radius below half a chunk keeps only the chunk under the player wanted
+    return ChunkStreamer(world, directory, renderer, resources, radius=radius,
+                         budget_bytes=chunks_in_budget * 4 * PLATFORM_BYTES)
+
+
+def visit(chunks, position):
+    chunks.wait(position)
+    chunks.update(position)  # Integrates nothing new; evicts against the budget
+
+
+def collision_boxes(world):
+    """Active collision boxes as sorted rows, independent of slot order."""
+    collision = world.collision
+    live = np.flatnonzero(collision.active[:collision.count])
+    rows = np.concatenate((collision.min_bounds[live], collision.max_bounds[live]), axis=1)
+    return rows[np.lexsort(rows.T[::-1])]
+
+
+def assert_world_matches_resident(world, chunks):
+    platforms = [platform for chunk in chunks.resident.values() for platform in chunk.platforms]
+    assert sorted(map(id, world.platforms)) == sorted(map(id, platforms))
+    assert len(world.spatial) == len(world.collision) == len(platforms)
+    for platform in platforms:
+        assert platform in world.spatial
+        assert world.collision.active[platform.collision_id]
+        assert np.array_equal(world.collision.min_bounds[platform.collision_id], platform.world_bounds()[0])
+
+
+def test_partition_keeps_every_platform_in_exactly_one_chunk(chunk_directory, tmp_path):
+    scene = load_scene_data(str(tmp_path / 'scene.json'))
+    expected = sorted((tuple(position), tuple(size), scene.texture_paths[top], scene.texture_paths[side], flags)
+                      for position, size, (top, side), flags in zip(scene.positions.tolist(), scene.sizes.tolist(),
+                                                                     scene.texture_indices.tolist(),
+                                                                     scene.flags.tolist()))
+    with open(os.path.join(chunk_directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    assert len(manifest['chunks']) == (COLUMNS // 2) ** 2
+    found = []
+    for entry in manifest['chunks']:
+        chunk = read_binary(os.path.join(chunk_directory, entry['file']))
+        assert len(chunk) == entry['platforms']
+        keys = np.floor(chunk.positions[:, [0, 2]] / CHUNK_SIZE).astype(int)
+        assert (keys == entry['key']).all()
+        min_bounds, max_bounds = chunk.bounds()
+        assert np.allclose(min_bounds.min(axis=0), entry['min']) and np.allclose(max_bounds.max(axis=0), entry['max'])
+        found += [(tuple(position), tuple(size), chunk.texture_paths[top], chunk.texture_paths[side], flags)
+                  for position, size, (top, side), flags in zip(chunk.positions.tolist(), chunk.sizes.tolist(),
+                                                                 chunk.texture_indices.tolist(), chunk.flags.tolist())]
+        chunk.close()
+    assert sorted(found) == expected
+    assert any(flags & PLATFORM_DYNAMIC for *_, flags in found)
+
+
+def test_chunks_in_radius_are_integrated_and_others_evicted(chunk_directory):
+    world = World()
+    chunks = streamer(world, chunk_directory, chunks_in_budget=0, radius=20.0)
+    try:
+        for position in ([8.0, 0.0, 8.0], [88.0, 0.0, 40.0], [40.0, 0.0, 88.0]):
+            visit(chunks, position)
+            in_range = {key for key, chunk in chunks.chunks.items() if chunk.distance(position[0], position[2]) <= 20.0}
+            assert set(chunks.resident) == in_range
+            assert all(chunks.chunks[key].state == 'unloaded' for key in set(chunks.chunks) - in_range)
+            assert_world_matches_resident(world, chunks)
+        assert chunks.evictions > 0
+    finally:
+        chunks.shutdown()
+
+
+def test_budget_evicts_least_recently_used_first(chunk_directory):
+    world = World()
+    chunks = streamer(world, chunk_directory, chunks_in_budget=2)
+    try:
+        a, b, c, d = (0, 0), (1, 0), (2, 0), (3, 0)
+        for key in (a, b, a):  # a used again after b
+            visit(chunks, center(key))
+        assert list(chunks.resident) == [b, a]
+        visit(chunks, center(c))
+        assert list(chunks.resident) == [a, c]  # b was the least recently used
+        visit(chunks, center(d))
+        assert list(chunks.resident) == [c, d]
+        assert chunks.evictions == 2
+        assert_world_matches_resident(world, chunks)
+    finally:
+        chunks.shutdown()
+
+
+def test_eviction_removes_collision_and_spatial_entries(chunk_directory):
+    world = World()
+    chunks = streamer(world, chunk_directory, chunks_in_budget=1)
+    try:
+        visit(chunks, center((0, 0)))
+        evicted = list(chunks.resident[(0, 0)].platforms)
+        slots = [platform.collision_id for platform in evicted]
+        visit(chunks, center((5, 5)))
+        assert list(chunks.resident) == [(5, 5)]
+        assert not any(platform in world.spatial for platform in evicted)
+        assert not world.collision.active[slots].any()
+        assert not world.spatial.query_aabb((0.0, -10.0, 0.0), (CHUNK_SIZE, 10.0, CHUNK_SIZE))
+        assert not world.collision.overlaps(np.array([1.0, -10.0, 1.0]), np.array([15.0, 10.0, 15.0])).any()
+        assert_world_matches_resident(world, chunks)
+    finally:
+        chunks.shutdown()
+
+
+def test_eviction_releases_texture_layers(chunk_directory):
+    from engine import RyanEngine
+    from renderer import InstancedRenderer
+    from resources import ResourceManager
+
+    ctx = RyanEngine.create_standalone_context()
+    resources = ResourceManager(ctx)
+    renderer = InstancedRenderer(ctx, resources)
+    world = World()
+    chunks = streamer(world, chunk_directory, chunks_in_budget=1, renderer=renderer, resources=resources)
+    try:
+        visit(chunks, center((0, 0)))
+        first = chunks.resident[(0, 0)].platforms[0]
+        own_texture, shared_texture = first.texture_path, first.side_texture_path
+        index = renderer.materials.layers[shared_texture]
+        assert renderer.materials.refcounts[index] == len(chunks.resident[(0, 0)].platforms)
+
+        visit(chunks, center((3, 3)))
+        assert own_texture not in renderer.materials.layers  # Only chunk column 0 used it
+        assert renderer.materials.layers[shared_texture] == index
+        assert renderer.materials.refcounts[index] == len(chunks.resident[(3, 3)].platforms)
+        assert len(renderer.slots) + len(renderer.static) == len(world.platforms)
+    finally:
+        chunks.shutdown()
+        renderer.release()
+        ctx.release()
+
+
+def test_reentering_a_chunk_restores_collision_state(chunk_directory):
+    world = World()
+    chunks = streamer(world, chunk_directory, chunks_in_budget=1)
+    home = center((2, 2))
+    rng = np.random.default_rng(0)
+    bodies = np.column_stack((rng.uniform(32.0, 48.0, 64), rng.uniform(0.0, 3.0, 64), rng.uniform(32.0, 48.0, 64)))
+    half_extents = np.array([0.3, 0.6, 0.3])
+
+    def state():
+        positions = bodies.copy()
+        grounded = np.zeros(len(positions), dtype=bool)
+        world.collision.resolve(positions, half_extents, grounded)
+        found = world.spatial.query_aabb((32.0, -10.0, 32.0), (48.0, 10.0, 48.0))
+        return collision_boxes(world), positions, grounded, sorted(tuple(p.position.tolist()) for p in found)
+
+    try:
+        visit(chunks, home)
+        before = state()
+        for key in ((0, 0), (5, 1), (1, 5)):
+            visit(chunks, center(key))
+        assert (2, 2) not in chunks.resident
+        visit(chunks, home)
+        after = state()
+        for expected, actual in zip(before, after):
+            assert np.array_equal(np.asarray(expected), np.asarray(actual))
+    finally:
+        chunks.shutdown()
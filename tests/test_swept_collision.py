@@ -0,0 +1,183 @@
+"""Swept (continuous) collision at low tick rates, for the local player and for batched entities."""
+import numpy as np
+import pytest
+
+from collision import CollisionWorld
+from platform import Platform
+from player import Player
+from world import World, InputState
+
+GROUND_CHECK = 0.05  # How close to a surface counts as standing on it
+FLOOR = ((0.0, 0.0, 0.0), 8.0, 0.1, 8.0)  # Thin: 0.1 units thick
+WIDE_FLOOR = ((0.0, -1.0, 0.0), 64.0, 1.0, 64.0)
+
+
+class Body:
+    """One body in a world, either the local ``Player`` or a slot in ``world.entities``."""
+    def __init__(self, world, kind, start, velocity, grounded):
+        self.world = world
+        self.kind = kind
+        if kind == 'player':
+            world.player = Player(start, [0.0, 1.0, 0.0])
+            world.player.velocity = velocity
+            world.player.grounded = grounded
+        else:
+            self.slot = world.entities.spawn(start)
+            world.entities.velocities[self.slot] = velocity
+            world.entities.grounded[self.slot] = grounded
+
+    def step(self, commands=InputState()):
+        if self.kind == 'player':
+            self.world.step(commands)
+            return
+        entities, slot = self.world.entities, self.slot
+        entities.forward[slot], entities.right[slot] = commands.forward, commands.right
+        entities.jump[slot] = commands.jump
+        self.world.step(None)
+        entities.jump[slot] = False
+
+    @property
+    def position(self):
+        if self.kind == 'player':
+            return self.world.player.position.copy()
+        return self.world.entities.positions[self.slot].copy()
+
+    @property
+    def grounded(self):
+        if self.kind == 'player':
+            return bool(self.world.player.grounded)
+        return bool(self.world.entities.grounded[self.slot])
+
+    @property
+    def feet(self):
+        return float(self.position[1]) - 0.6
+
+
+def scenario(kind, mode, tick_rate, boxes, start, velocity=(0.0, 0.0, 0.0), seconds=0.0,
+             commands=InputState(), grounded=False, record=None):
+    world = World(tick_rate, collision_mode=mode)
+    for position, width, height, length in boxes:
+        world.add_platform(Platform(None, None, width=width, length=length, height=height, position=position))
+    body = Body(world, kind, start, velocity, grounded)
+    for _ in range(int(seconds * tick_rate)):
+        body.step(commands)
+        if record is not None:
+            record.append((body.position, body.grounded))
+    return body
+
+
+def inside_any(body):
+    """True if the body strictly penetrates a platform by more than the collision tolerance."""
+    half = np.array([0.3, 0.6, 0.3]) - CollisionWorld.TOLERANCE
+    return bool(body.world.collision.overlaps(body.position - half, body.position + half).any())
+
+
+@pytest.fixture(params=[10, 20, 30])
+def tick_rate(request):
+    return request.param
+
+
+@pytest.fixture(params=['player', 'entity'])
+def kind(request):
+    return request.param
+
+
+def test_fast_fall(kind, tick_rate):
+    body = scenario(kind, 'swept', tick_rate, [FLOOR], (0.0, 30.0, 0.0), (0.0, -80.0, 0.0), seconds=2.0)
+    assert abs(body.feet - 0.1) < GROUND_CHECK
+    assert body.grounded
+
+
+def test_very_fast_fall(kind, tick_rate):
+    body = scenario(kind, 'swept', tick_rate, [FLOOR], (0.0, 200.0, 0.0), (0.0, -400.0, 0.0), seconds=2.0)
+    assert abs(body.feet - 0.1) < GROUND_CHECK
+    assert body.grounded
+
+
+def test_thin_wall(kind, tick_rate):
+    wall = ((10.0, 0.0, 0.0), 0.2, 4.0, 8.0)
+    body = scenario(kind, 'swept', tick_rate, [WIDE_FLOOR, wall], (0.0, 0.6, 0.0), (400.0, 0.0, 0.0),
+                    seconds=1.0, grounded=True)
+    assert float(body.position[0]) + 0.3 <= 9.9 + CollisionWorld.TOLERANCE
+
+
+def test_slide_across_seams(kind, tick_rate):
+    tiles = [((0.0, 0.0, -8.0 * i), 8.0, 1.0, 8.0) for i in range(4)]
+    record = []
+    body = scenario(kind, 'swept', tick_rate, tiles, (0.0, 1.6, -3.0), seconds=2.0,
+                    commands=InputState(forward=1), grounded=True, record=record)
+    assert all(grounded and abs(position[1] - 1.6) < GROUND_CHECK for position, grounded in record)
+    assert float(body.position[2]) < -5.0  # Crossed at least one seam
+
+
+def test_corner_landing(kind, tick_rate):
+    block = ((0.0, 0.0, 0.0), 8.0, 1.0, 8.0)
+    body = scenario(kind, 'swept', tick_rate, [block], (4.2, 12.0, 4.2), (-1.0, -120.0, -1.0), seconds=1.0)
+    assert not inside_any(body)
+    assert body.grounded or body.feet < 0.0
+
+
+def test_walk_off_edge(kind, tick_rate):
+    record = []
+    body = scenario(kind, 'swept', tick_rate, [FLOOR], (0.0, 0.7, -3.0), seconds=2.0,
+                    commands=InputState(forward=1), grounded=True, record=record)
+    assert record[0][1]  # Standing on the floor at first
+    assert not body.grounded
+    assert body.feet < 0.0
+
+
+def test_resting(kind, tick_rate):
+    record = []
+    scenario(kind, 'swept', tick_rate, [WIDE_FLOOR], (0.0, 0.6, 0.0), seconds=5.0, grounded=True, record=record)
+    assert all(grounded and abs(position[1] - 0.6) < GROUND_CHECK for position, grounded in record)
+
+
+def test_jump_and_land(kind, tick_rate):
+    body = scenario(kind, 'swept', tick_rate, [WIDE_FLOOR], (0.0, 0.6, 0.0), grounded=True)
+    body.step()
+    body.step(InputState(jump=True))
+    peak = float(body.position[1])
+    for _ in range(2 * tick_rate):
+        body.step()
+    assert peak > 0.6
+    assert body.grounded
+    assert abs(body.feet) < GROUND_CHECK
+
+
+def test_low_ceiling(kind, tick_rate):
+    ceiling = ((0.0, 5.0, 0.0), 8.0, 0.1, 8.0)
+    body = scenario(kind, 'swept', tick_rate, [WIDE_FLOOR, ceiling], (0.0, 0.6, 0.0), (0.0, 200.0, 0.0))
+    body.step()
+    assert float(body.position[1]) + 0.6 <= 5.0 + CollisionWorld.TOLERANCE
+
+
+def test_discrete_mode_tunnels(kind):
+    # The failure swept mode exists for: one 10 Hz tick carries the body straight through the floor
+    body = scenario(kind, 'discrete', 10, [FLOOR], (0.0, 30.0, 0.0), (0.0, -80.0, 0.0), seconds=2.0)
+    assert body.feet < -10.0
+
+
+def test_entities_match_player():
+    # The batched sweep follows the same rules as World.sweep_collisions, tick for tick
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        world = World(int(rng.choice([10, 20, 30, 60])), 'swept')
+        for _ in range(40):
+            position = (rng.uniform(-20.0, 20.0), rng.uniform(-3.0, 3.0), rng.uniform(-20.0, 20.0))
+            world.add_platform(Platform(None, None, width=float(rng.uniform(0.2, 8.0)),
+                                        height=float(rng.uniform(0.1, 3.0)), length=float(rng.uniform(0.2, 8.0)),
+                                        position=position))
+        start = (rng.uniform(-10.0, 10.0), 20.0, rng.uniform(-10.0, 10.0))
+        velocity = (0.0, -float(rng.uniform(0.0, 200.0)), 0.0)
+        player = Body(world, 'player', start, velocity, False)
+        entity = Body(world, 'entity', start, velocity, False)
+        entities = world.entities
+        for _ in range(100):
+            commands = InputState(int(rng.integers(-1, 2)), int(rng.integers(-1, 2)), bool(rng.random() < 0.05),
+                                  float(rng.uniform(-10.0, 10.0)))
+            entities.forward[entity.slot], entities.right[entity.slot] = commands.forward, commands.right
+            entities.jump[entity.slot], entities.look_x[entity.slot] = commands.jump, commands.look_x
+            world.step(commands)
+            entities.jump[entity.slot], entities.look_x[entity.slot] = False, 0.0
+            assert np.array_equal(player.position, entity.position)
+            assert player.grounded == entity.grounded
@@ -0,0 +1,246 @@
+import gc
+import sys
+import time
+import numpy as np
+from player import Player
+from platform import Platform
+from spatial import UniformGrid
+from collision import CollisionWorld, SWEEP_ITERATIONS, SKIN, GROUND_PROBE
+from entities import EntityBatch
+from scene_format import load_scene_data, PLATFORM_DYNAMIC
+from profiler import NULL_PROFILER
+
+COLLISION_MODES = ('discrete', 'swept')
+
+
+class InputState:
+    """Player commands for one physics tick, decoupled from where they came from."""
+    def __init__(self, forward=0, right=0, jump=False, look_x=0.0, look_y=0.0):
+        self.forward = forward
+        self.right = right
+        self.jump = jump
+        self.look_x = look_x
+        self.look_y = look_y
+
+
+class World:
+    """Simulation state (platforms, player, collision) stepped at a fixed tick rate.
+
+    The world never touches pygame or moderngl, so it can be stepped headless
+    as fast as the CPU allows; ``RyanEngine`` wraps it with input and rendering.
+    """
+    def __init__(self, tick_rate=60, collision_mode='discrete'):
+        if collision_mode not in COLLISION_MODES:
+            raise ValueError(f"unknown collision mode {collision_mode!r}")
+        self.collision_mode = collision_mode  # 'swept' moves bodies by time of impact, so they cannot tunnel
+        self.tick_rate = tick_rate
+        self.tick_time = 1.0 / tick_rate
+        self.tick = 0
+        self.platforms = []
+        self.player = None
+        self.spatial = UniformGrid(cell_size=8.0)
+        self.collision = CollisionWorld()
+        self.entities = EntityBatch()  # Bots and other movable bodies, stepped as one batch
+        self.profiler = NULL_PROFILER  # Replaced by the engine's profiler to time the tick phases
+
+    def load_scene(self, scene_file, resources=None):
+        """Load platforms and the player from a JSON or binary scene file.
+
+        Without ``resources`` the platforms are collision-only (headless).
+        """
+        scene = load_scene_data(scene_file)
+        self.add_scene(scene, resources)
+        if scene.player is not None:
+            self.load_player(scene.player)
+        scene.close()
+
+    def load_player(self, player_data):
+        self.player = Player(player_data['position'], [0.0, 1.0, 0.0])
+        self.player.velocity = player_data['velocity']
+        self.player.rotation[:] = player_data['rotation']
+
+    def add_scene(self, scene, resources=None, bounds=None):
+        """Create and register the platforms of a SceneData; returns them.
+
+        ``bounds`` may pass precomputed ``scene.bounds()``.
+        """
+        # Collision boxes are added as one block straight from the arrays
+        min_bounds, max_bounds = bounds if bounds is not None else scene.bounds()
+        collision_ids = self.collision.add_many(min_bounds, max_bounds).tolist()
+        texture_paths = scene.texture_paths
+        platforms = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()  # Nothing here creates cycles; collections during bulk creation only cost time
+        try:
+            dynamic = (scene.flags & PLATFORM_DYNAMIC).astype(bool).tolist()
+            for position, (width, height, length), (top, side), is_dynamic, collision_id in zip(
+                    scene.positions.tolist(), scene.sizes.tolist(), scene.texture_indices.tolist(), dynamic,
+                    collision_ids):
+                platform = Platform(resources, texture_paths[top], texture_paths[side], width=width,
+                                    length=length, height=height, position=position, dynamic=is_dynamic)
+                platform.collision_id = collision_id
+                platforms.append(platform)
+            self.platforms.extend(platforms)
+            self.spatial.insert_many(platforms, min_bounds, max_bounds)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return platforms
+
+    def add_platform(self, platform):
+        self.platforms.append(platform)
+        self.spatial.insert(platform, *platform.world_bounds())
+        platform.collision_id = self.collision.add(*platform.world_bounds())
+
+    def remove_platform(self, platform):
+        self.platforms.remove(platform)
+        self.spatial.remove(platform)
+        self.collision.remove(platform.collision_id)
+
+    def remove_platforms(self, platforms):
+        """Remove a block of platforms with one pass over the platform list."""
+        removed = set(platforms)
+        self.platforms = [platform for platform in self.platforms if platform not in removed]
+        for platform in platforms:
+            self.spatial.remove(platform)
+            self.collision.remove(platform.collision_id)
+
+    def move_platform(self, platform, position):
+        platform.position[:] = position
+        self.spatial.update(platform, *platform.world_bounds())
+        self.collision.update(platform.collision_id, *platform.world_bounds())
+
+    def check_collisions(self):
+        """Check for collisions with the platforms overlapping the player's bounding box."""
+        player = self.player
+        margin_x = player.width / 2 + 0.01  # Same tolerance as Platform.check_collision
+        margin_y = player.height / 2 + 0.01
+        margin_z = player.length / 2 + 0.01
+        x, y, z = player.position
+        candidates = self.spatial.query_aabb((x - margin_x, y - margin_y, z - margin_z),
+                                             (x + margin_x, y + margin_y, z + margin_z))
+        # Resolve against the first overlapping candidate in one vectorized pass
+        indices = [platform.collision_id for platform in candidates]
+        if not indices or not self.collision.resolve_player(player, indices):
+            player.grounded = False  # Reset grounded state if no collision is detected
+
+    def sweep_collisions(self):
+        """Swept (continuous) collision: move from ``previous_position`` by this tick's motion.
+
+        The movement already applied by ``update_velocity`` and ``apply_gravity``
+        is undone and replayed as a swept box. Each hit stops the player
+        ``SKIN`` short of the surface, zeroes the velocity along its axis and
+        slides the rest of the motion along it, so nothing is skipped however
+        long the tick is.
+        """
+        player = self.player
+        collision = self.collision
+        half = np.array([player.width / 2, player.height / 2, player.length / 2])
+        position = player.previous_position.astype('f8')
+        remaining = player.position.astype('f8') - position
+        landed = False
+
+        for _ in range(SWEEP_ITERATIONS):
+            if not remaining.any():
+                break
+            end = position + remaining
+            swept_min = np.minimum(position, end) - half
+            swept_max = np.maximum(position, end) + half
+            candidates = self.spatial.query_aabb(swept_min, swept_max)
+            hit = collision.sweep(position - half, position + half, remaining,
+                                  [platform.collision_id for platform in candidates]) if candidates else None
+            if hit is None:
+                position = end
+                break
+            t, _, axis = hit
+            direction = 1.0 if remaining[axis] > 0 else -1.0
+            position = position + remaining * t
+            position[axis] -= direction * SKIN
+            remaining = remaining * (1.0 - t)
+            remaining[axis] = 0.0
+            player.velocity[axis] = 0.0
+            if axis == 1 and direction < 0:
+                landed = True
+        player.position = position
+
+        if not landed and player.velocity[1] <= 0:
+            # Resting contact: no vertical motion this tick, so probe just below the feet. The probe
+            # starts SKIN higher so float32 rounding cannot leave the feet a hair inside the ground
+            probe_min = position - half + (0.0, SKIN, 0.0)
+            probe_max = position + half + (0.0, SKIN, 0.0)
+            candidates = self.spatial.query_aabb(probe_min - (0.0, SKIN + GROUND_PROBE, 0.0), probe_max)
+            landed = bool(candidates) and collision.sweep(
+                probe_min, probe_max, (0.0, -(SKIN + GROUND_PROBE), 0.0),
+                [platform.collision_id for platform in candidates]) is not None
+        player.grounded = landed
+
+    def step_player(self, commands, delta_time):
+        """Move the local player by one tick's commands and resolve its collisions."""
+        player = self.player
+        profiler = self.profiler
+        player.previous_position[:] = player.position
+        with profiler.scope('movement'):
+            player.update_velocity(commands.forward, commands.right, delta_time)
+            if commands.jump:
+                player.jump()
+            if commands.look_x or commands.look_y:
+                player.process_mouse_movement(commands.look_x, commands.look_y)
+        with profiler.scope('gravity'):
+            player.apply_gravity(delta_time)
+        with profiler.scope('collisions'):
+            if self.collision_mode == 'swept':
+                self.sweep_collisions()
+            else:
+                self.check_collisions()
+
+    def step(self, commands):
+        """Advance the simulation by exactly one fixed tick.
+
+        ``commands`` drive the local player; a world without one (a server
+        session whose players are all entities) may pass None.
+        """
+        delta_time = self.tick_time
+        if self.player is not None:
+            self.step_player(commands, delta_time)
+        if self.entities.count:
+            with self.profiler.scope('entities'):
+                self.entities.step(delta_time, self.collision, self.collision_mode)
+        self.tick += 1
+
+    def run(self, ticks, commands):
+        """Step ``ticks`` times without any real-time pacing; ``commands(tick)`` supplies inputs."""
+        for _ in range(ticks):
+            self.step(commands(self.tick))
+
+
+if __name__ == "__main__":
+    # Headless soak run: python world.py [scene_file] [ticks] [tick_rate] [bots] [discrete|swept]
+    scene_file = sys.argv[1] if len(sys.argv) > 1 else 'scenes/testing.json'
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 60_000
+    tick_rate = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    bots = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    collision_mode = sys.argv[5] if len(sys.argv) > 5 else 'discrete'
+
+    world = World(tick_rate, collision_mode)
+    world.load_scene(scene_file)
+    if bots:
+        # Drop the bots above random platforms, walking forward and turning
+        rng = np.random.default_rng(0)
+        platforms = rng.integers(len(world.platforms), size=bots)
+        starts = np.array([world.platforms[i].position for i in platforms], dtype='f4')
+        starts[:, 1] += 2.0
+        bot_ids = world.entities.spawn_many(starts, yaw=rng.uniform(-180.0, 180.0, bots))
+        world.entities.forward[bot_ids] = 1.0
+        world.entities.look_x[bot_ids] = rng.uniform(-5.0, 5.0, bots)
+    walk = InputState(forward=1)
+    walk_and_jump = InputState(forward=1, jump=True, look_x=2.0)
+
+    start = time.perf_counter()
+    world.run(ticks, lambda tick: walk_and_jump if tick % tick_rate == 0 else walk)
+    elapsed = time.perf_counter() - start
+    simulated = ticks / tick_rate
+    print(f"{ticks} ticks ({simulated:.1f}s simulated) in {elapsed:.3f}s: "
+          f"{ticks / elapsed:.0f} ticks/s, {simulated / elapsed:.0f}x real time")
+    print(f"player at {world.player.position}, grounded={world.player.grounded}")
+    if bots:
+        print(f"{bots} bots, {int(world.entities.grounded[:bots].sum())} grounded")